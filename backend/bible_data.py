@@ -1,3 +1,7 @@
+from array import array
+from collections.abc import Sequence
+import json
+
 # Extended Bible Dictionary with more terms
 EXTENDED_BIBLE_DICTIONARY = {
     "grace": {
@@ -620,10 +624,77 @@ YEARLY_DEVOTIONALS = [
     {"day": 59, "title": "Resurrection and Life", "scripture": "John 11:25", "verse_text": "Jesus said unto her, I am the resurrection, and the life: he that believeth in me, though he were dead, yet shall he live.", "reflection": "Jesus is the resurrection and the life. Those who believe in Him will live forever.", "prayer": "Jesus, You are my resurrection and my life. I believe in You."},
 ]
 
-# Generate remaining devotionals for the year (days 60-365)
+DEVOTIONAL_FIELDS = ("title", "scripture", "verse_text", "reflection", "prayer")
+
+class DevotionalYear(Sequence):
+    """A year of devotionals stored as unique bodies plus a day -> body index.
+
+    Days past the hand-written ones reuse the scripture pool, so most bodies
+    are shared by several days. Each body is kept (and JSON-encoded) once and
+    a day's devotional is only materialized when it is read.
+    """
+
+    def __init__(self, bodies, day_index):
+        self.bodies = tuple(bodies)
+        self.day_index = array("H", day_index)
+        # Pre-encoded `"title":...,"prayer":...` fragment for each body
+        self.fragments = tuple(
+            json.dumps(body, ensure_ascii=False, separators=(",", ":"))[1:-1].encode("utf-8")
+            for body in self.bodies
+        )
+
+    @classmethod
+    def from_items(cls, items):
+        bodies, day_index, seen = [], [], {}
+        for item in items:
+            body = {field: item.get(field) for field in DEVOTIONAL_FIELDS}
+            key = tuple(body.values())
+            if key not in seen:
+                seen[key] = len(bodies)
+                bodies.append(body)
+            day_index.append(seen[key])
+        return cls(bodies, day_index)
+
+    def replace_days(self, updates):
+        """Return a new year with the given {day: devotional} replacements applied"""
+        items = {day: self[day - 1] for day in updates}
+        bodies = list(self.bodies)
+        day_index = array("H", self.day_index)
+        seen = {tuple(body.values()): i for i, body in enumerate(bodies)}
+        for day, item in updates.items():
+            body = {field: item.get(field, items[day].get(field)) for field in DEVOTIONAL_FIELDS}
+            key = tuple(body.values())
+            if key not in seen:
+                seen[key] = len(bodies)
+                bodies.append(body)
+            day_index[day - 1] = seen[key]
+        # Drop bodies no day points at any more
+        used = sorted(set(day_index))
+        remap = {old: new for new, old in enumerate(used)}
+        return DevotionalYear([bodies[i] for i in used], [remap[i] for i in day_index])
+
+    def __len__(self):
+        return len(self.day_index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("devotional day out of range")
+        return {"day": index + 1, **self.bodies[self.day_index[index]]}
+
+    def encode_day(self, index):
+        return b'{"day":%d,%s}' % (index + 1, self.fragments[self.day_index[index]])
+
+    def encode_range(self, start, end):
+        """JSON array contents for days start+1..end, built from the shared fragments"""
+        return b",".join(self.encode_day(i) for i in range(*slice(start, end).indices(len(self))))
+
+# Build the full year: the hand-written days 1-59, then the scripture pool
+# cycled through days 60-365 with each pool entry stored only once
 def generate_yearly_devotionals():
-    base_devotionals = YEARLY_DEVOTIONALS.copy()
-    
     # Scripture pool for generating more devotionals
     scripture_pool = [
         {"scripture": "Psalm 27:1", "verse_text": "The LORD is my light and my salvation; whom shall I fear? the LORD is the strength of my life; of whom shall I be afraid?", "title": "No Fear", "reflection": "When the Lord is our light, salvation, and strength, we have nothing to fear.", "prayer": "Lord, You are my light and salvation. I will not fear."},
@@ -672,18 +743,191 @@ def generate_yearly_devotionals():
         {"scripture": "Revelation 21:4", "verse_text": "And God shall wipe away all tears from their eyes; and there shall be no more death, neither sorrow, nor crying, neither shall there be any more pain: for the former things are passed away.", "title": "No More Tears", "reflection": "In eternity, God will wipe away every tear. Pain and sorrow will be no more.", "prayer": "Lord, I look forward to the day when You wipe away every tear."},
     ]
     
+    bodies = [{field: d[field] for field in DEVOTIONAL_FIELDS} for d in YEARLY_DEVOTIONALS]
+    day_index = list(range(len(YEARLY_DEVOTIONALS)))
+
     # Fill in remaining days by cycling through scripture pool
-    day = 60
-    while len(base_devotionals) < 365:
-        for devotional in scripture_pool:
-            if len(base_devotionals) >= 365:
-                break
-            base_devotionals.append({
-                "day": day,
-                **devotional
-            })
-            day += 1
-    
-    return base_devotionals
+    pool_start = len(bodies)
+    bodies.extend({field: d[field] for field in DEVOTIONAL_FIELDS} for d in scripture_pool)
+    while len(day_index) < 365:
+        day_index.append(pool_start + (len(day_index) - pool_start) % len(scripture_pool))
+
+    return DevotionalYear(bodies, day_index)
 
 FULL_YEAR_DEVOTIONALS = generate_yearly_devotionals()
+
+# ==================== CANON ====================
+
+BIBLE_BOOKS = [
+    {"name": "Genesis", "chapters": 50, "testament": "Old"},
+    {"name": "Exodus", "chapters": 40, "testament": "Old"},
+    {"name": "Leviticus", "chapters": 27, "testament": "Old"},
+    {"name": "Numbers", "chapters": 36, "testament": "Old"},
+    {"name": "Deuteronomy", "chapters": 34, "testament": "Old"},
+    {"name": "Joshua", "chapters": 24, "testament": "Old"},
+    {"name": "Judges", "chapters": 21, "testament": "Old"},
+    {"name": "Ruth", "chapters": 4, "testament": "Old"},
+    {"name": "1 Samuel", "chapters": 31, "testament": "Old"},
+    {"name": "2 Samuel", "chapters": 24, "testament": "Old"},
+    {"name": "1 Kings", "chapters": 22, "testament": "Old"},
+    {"name": "2 Kings", "chapters": 25, "testament": "Old"},
+    {"name": "1 Chronicles", "chapters": 29, "testament": "Old"},
+    {"name": "2 Chronicles", "chapters": 36, "testament": "Old"},
+    {"name": "Ezra", "chapters": 10, "testament": "Old"},
+    {"name": "Nehemiah", "chapters": 13, "testament": "Old"},
+    {"name": "Esther", "chapters": 10, "testament": "Old"},
+    {"name": "Job", "chapters": 42, "testament": "Old"},
+    {"name": "Psalms", "chapters": 150, "testament": "Old"},
+    {"name": "Proverbs", "chapters": 31, "testament": "Old"},
+    {"name": "Ecclesiastes", "chapters": 12, "testament": "Old"},
+    {"name": "Song of Solomon", "chapters": 8, "testament": "Old"},
+    {"name": "Isaiah", "chapters": 66, "testament": "Old"},
+    {"name": "Jeremiah", "chapters": 52, "testament": "Old"},
+    {"name": "Lamentations", "chapters": 5, "testament": "Old"},
+    {"name": "Ezekiel", "chapters": 48, "testament": "Old"},
+    {"name": "Daniel", "chapters": 12, "testament": "Old"},
+    {"name": "Hosea", "chapters": 14, "testament": "Old"},
+    {"name": "Joel", "chapters": 3, "testament": "Old"},
+    {"name": "Amos", "chapters": 9, "testament": "Old"},
+    {"name": "Obadiah", "chapters": 1, "testament": "Old"},
+    {"name": "Jonah", "chapters": 4, "testament": "Old"},
+    {"name": "Micah", "chapters": 7, "testament": "Old"},
+    {"name": "Nahum", "chapters": 3, "testament": "Old"},
+    {"name": "Habakkuk", "chapters": 3, "testament": "Old"},
+    {"name": "Zephaniah", "chapters": 3, "testament": "Old"},
+    {"name": "Haggai", "chapters": 2, "testament": "Old"},
+    {"name": "Zechariah", "chapters": 14, "testament": "Old"},
+    {"name": "Malachi", "chapters": 4, "testament": "Old"},
+    {"name": "Matthew", "chapters": 28, "testament": "New"},
+    {"name": "Mark", "chapters": 16, "testament": "New"},
+    {"name": "Luke", "chapters": 24, "testament": "New"},
+    {"name": "John", "chapters": 21, "testament": "New"},
+    {"name": "Acts", "chapters": 28, "testament": "New"},
+    {"name": "Romans", "chapters": 16, "testament": "New"},
+    {"name": "1 Corinthians", "chapters": 16, "testament": "New"},
+    {"name": "2 Corinthians", "chapters": 13, "testament": "New"},
+    {"name": "Galatians", "chapters": 6, "testament": "New"},
+    {"name": "Ephesians", "chapters": 6, "testament": "New"},
+    {"name": "Philippians", "chapters": 4, "testament": "New"},
+    {"name": "Colossians", "chapters": 4, "testament": "New"},
+    {"name": "1 Thessalonians", "chapters": 5, "testament": "New"},
+    {"name": "2 Thessalonians", "chapters": 3, "testament": "New"},
+    {"name": "1 Timothy", "chapters": 6, "testament": "New"},
+    {"name": "2 Timothy", "chapters": 4, "testament": "New"},
+    {"name": "Titus", "chapters": 3, "testament": "New"},
+    {"name": "Philemon", "chapters": 1, "testament": "New"},
+    {"name": "Hebrews", "chapters": 13, "testament": "New"},
+    {"name": "James", "chapters": 5, "testament": "New"},
+    {"name": "1 Peter", "chapters": 5, "testament": "New"},
+    {"name": "2 Peter", "chapters": 3, "testament": "New"},
+    {"name": "1 John", "chapters": 5, "testament": "New"},
+    {"name": "2 John", "chapters": 1, "testament": "New"},
+    {"name": "3 John", "chapters": 1, "testament": "New"},
+    {"name": "Jude", "chapters": 1, "testament": "New"},
+    {"name": "Revelation", "chapters": 22, "testament": "New"},
+]
+
+# Verses in each chapter (KJV versification), indexed by chapter - 1
+CHAPTER_VERSES = {
+    "Genesis": [31, 25, 24, 26, 32, 22, 24, 22, 29, 32, 32, 20, 18, 24, 21, 16, 27, 33, 38, 18, 34, 24, 20, 67, 34, 35, 46, 22, 35, 43, 55, 32, 20, 31, 29, 43, 36, 30, 23, 23, 57, 38, 34, 34, 28, 34, 31, 22, 33, 26],
+    "Exodus": [22, 25, 22, 31, 23, 30, 25, 32, 35, 29, 10, 51, 22, 31, 27, 36, 16, 27, 25, 26, 36, 31, 33, 18, 40, 37, 21, 43, 46, 38, 18, 35, 23, 35, 35, 38, 29, 31, 43, 38],
+    "Leviticus": [17, 16, 17, 35, 19, 30, 38, 36, 24, 20, 47, 8, 59, 57, 33, 34, 16, 30, 37, 27, 24, 33, 44, 23, 55, 46, 34],
+    "Numbers": [54, 34, 51, 49, 31, 27, 89, 26, 23, 36, 35, 16, 33, 45, 41, 50, 13, 32, 22, 29, 35, 41, 30, 25, 18, 65, 23, 31, 40, 16, 54, 42, 56, 29, 34, 13],
+    "Deuteronomy": [46, 37, 29, 49, 33, 25, 26, 20, 29, 22, 32, 32, 18, 29, 23, 22, 20, 22, 21, 20, 23, 30, 25, 22, 19, 19, 26, 68, 29, 20, 30, 52, 29, 12],
+    "Joshua": [18, 24, 17, 24, 15, 27, 26, 35, 27, 43, 23, 24, 33, 15, 63, 10, 18, 28, 51, 9, 45, 34, 16, 33],
+    "Judges": [36, 23, 31, 24, 31, 40, 25, 35, 57, 18, 40, 15, 25, 20, 20, 31, 13, 31, 30, 48, 25],
+    "Ruth": [22, 23, 18, 22],
+    "1 Samuel": [28, 36, 21, 22, 12, 21, 17, 22, 27, 27, 15, 25, 23, 52, 35, 23, 58, 30, 24, 42, 15, 23, 29, 22, 44, 25, 12, 25, 11, 31, 13],
+    "2 Samuel": [27, 32, 39, 12, 25, 23, 29, 18, 13, 19, 27, 31, 39, 33, 37, 23, 29, 33, 43, 26, 22, 51, 39, 25],
+    "1 Kings": [53, 46, 28, 34, 18, 38, 51, 66, 28, 29, 43, 33, 34, 31, 34, 34, 24, 46, 21, 43, 29, 53],
+    "2 Kings": [18, 25, 27, 44, 27, 33, 20, 29, 37, 36, 21, 21, 25, 29, 38, 20, 41, 37, 37, 21, 26, 20, 37, 20, 30],
+    "1 Chronicles": [54, 55, 24, 43, 26, 81, 40, 40, 44, 14, 47, 40, 14, 17, 29, 43, 27, 17, 19, 8, 30, 19, 32, 31, 31, 32, 34, 21, 30],
+    "2 Chronicles": [17, 18, 17, 22, 14, 42, 22, 18, 31, 19, 23, 16, 22, 15, 19, 14, 19, 34, 11, 37, 20, 12, 21, 27, 28, 23, 9, 27, 36, 27, 21, 33, 25, 33, 27, 23],
+    "Ezra": [11, 70, 13, 24, 17, 22, 28, 36, 15, 44],
+    "Nehemiah": [11, 20, 32, 23, 19, 19, 73, 18, 38, 39, 36, 47, 31],
+    "Esther": [22, 23, 15, 17, 14, 14, 10, 17, 32, 3],
+    "Job": [22, 13, 26, 21, 27, 30, 21, 22, 35, 22, 20, 25, 28, 22, 35, 22, 16, 21, 29, 29, 34, 30, 17, 25, 6, 14, 23, 28, 25, 31, 40, 22, 33, 37, 16, 33, 24, 41, 30, 24, 34, 17],
+    "Psalms": [6, 12, 8, 8, 12, 10, 17, 9, 20, 18, 7, 8, 6, 7, 5, 11, 15, 50, 14, 9, 13, 31, 6, 10, 22, 12, 14, 9, 11, 12, 24, 11, 22, 22, 28, 12, 40, 22, 13, 17, 13, 11, 5, 26, 17, 11, 9, 14, 20, 23, 19, 9, 6, 7, 23, 13, 11, 11, 17, 12, 8, 12, 11, 10, 13, 20, 7, 35, 36, 5, 24, 20, 28, 23, 10, 12, 20, 72, 13, 19, 16, 8, 18, 12, 13, 17, 7, 18, 52, 17, 16, 15, 5, 23, 11, 13, 12, 9, 9, 5, 8, 28, 22, 35, 45, 48, 43, 13, 31, 7, 10, 10, 9, 8, 18, 19, 2, 29, 176, 7, 8, 9, 4, 8, 5, 6, 5, 6, 8, 8, 3, 18, 3, 3, 21, 26, 9, 8, 24, 13, 10, 7, 12, 15, 21, 10, 20, 14, 9, 6],
+    "Proverbs": [33, 22, 35, 27, 23, 35, 27, 36, 18, 32, 31, 28, 25, 35, 33, 33, 28, 24, 29, 30, 31, 29, 35, 34, 28, 28, 27, 28, 27, 33, 31],
+    "Ecclesiastes": [18, 26, 22, 16, 20, 12, 29, 17, 18, 20, 10, 14],
+    "Song of Solomon": [17, 17, 11, 16, 16, 13, 13, 14],
+    "Isaiah": [31, 22, 26, 6, 30, 13, 25, 22, 21, 34, 16, 6, 22, 32, 9, 14, 14, 7, 25, 6, 17, 25, 18, 23, 12, 21, 13, 29, 24, 33, 9, 20, 24, 17, 10, 22, 38, 22, 8, 31, 29, 25, 28, 28, 25, 13, 15, 22, 26, 11, 23, 15, 12, 17, 13, 12, 21, 14, 21, 22, 11, 12, 19, 12, 25, 24],
+    "Jeremiah": [19, 37, 25, 31, 31, 30, 34, 22, 26, 25, 23, 17, 27, 22, 21, 21, 27, 23, 15, 18, 14, 30, 40, 10, 38, 24, 22, 17, 32, 24, 40, 44, 26, 22, 19, 32, 21, 28, 18, 16, 18, 22, 13, 30, 5, 28, 7, 47, 39, 46, 64, 34],
+    "Lamentations": [22, 22, 66, 22, 22],
+    "Ezekiel": [28, 10, 27, 17, 17, 14, 27, 18, 11, 22, 25, 28, 23, 23, 8, 63, 24, 32, 14, 49, 32, 31, 49, 27, 17, 21, 36, 26, 21, 26, 18, 32, 33, 31, 15, 38, 28, 23, 29, 49, 26, 20, 27, 31, 25, 24, 23, 35],
+    "Daniel": [21, 49, 30, 37, 31, 28, 28, 27, 27, 21, 45, 13],
+    "Hosea": [11, 23, 5, 19, 15, 11, 16, 14, 17, 15, 12, 14, 16, 9],
+    "Joel": [20, 32, 21],
+    "Amos": [15, 16, 15, 13, 27, 14, 17, 14, 15],
+    "Obadiah": [21],
+    "Jonah": [17, 10, 10, 11],
+    "Micah": [16, 13, 12, 13, 15, 16, 20],
+    "Nahum": [15, 13, 19],
+    "Habakkuk": [17, 20, 19],
+    "Zephaniah": [18, 15, 20],
+    "Haggai": [15, 23],
+    "Zechariah": [21, 13, 10, 14, 11, 15, 14, 23, 17, 12, 17, 14, 9, 21],
+    "Malachi": [14, 17, 18, 6],
+    "Matthew": [25, 23, 17, 25, 48, 34, 29, 34, 38, 42, 30, 50, 58, 36, 39, 28, 27, 35, 30, 34, 46, 46, 39, 51, 46, 75, 66, 20],
+    "Mark": [45, 28, 35, 41, 43, 56, 37, 38, 50, 52, 33, 44, 37, 72, 47, 20],
+    "Luke": [80, 52, 38, 44, 39, 49, 50, 56, 62, 42, 54, 59, 35, 35, 32, 31, 37, 43, 48, 47, 38, 71, 56, 53],
+    "John": [51, 25, 36, 54, 47, 71, 53, 59, 41, 42, 57, 50, 38, 31, 27, 33, 26, 40, 42, 31, 25],
+    "Acts": [26, 47, 26, 37, 42, 15, 60, 40, 43, 48, 30, 25, 52, 28, 41, 40, 34, 28, 41, 38, 40, 30, 35, 27, 27, 32, 44, 31],
+    "Romans": [32, 29, 31, 25, 21, 23, 25, 39, 33, 21, 36, 21, 14, 23, 33, 27],
+    "1 Corinthians": [31, 16, 23, 21, 13, 20, 40, 13, 27, 33, 34, 31, 13, 40, 58, 24],
+    "2 Corinthians": [24, 17, 18, 18, 21, 18, 16, 24, 15, 18, 33, 21, 14],
+    "Galatians": [24, 21, 29, 31, 26, 18],
+    "Ephesians": [23, 22, 21, 32, 33, 24],
+    "Philippians": [30, 30, 21, 23],
+    "Colossians": [29, 23, 25, 18],
+    "1 Thessalonians": [10, 20, 13, 18, 28],
+    "2 Thessalonians": [12, 17, 18],
+    "1 Timothy": [20, 15, 16, 16, 25, 21],
+    "2 Timothy": [18, 26, 17, 22],
+    "Titus": [16, 15, 15],
+    "Philemon": [25],
+    "Hebrews": [14, 18, 19, 16, 14, 20, 28, 13, 28, 39, 40, 29, 25],
+    "James": [27, 26, 18, 17, 20],
+    "1 Peter": [25, 25, 22, 19, 14],
+    "2 Peter": [21, 22, 18],
+    "1 John": [10, 29, 24, 21, 21],
+    "2 John": [13],
+    "3 John": [14],
+    "Jude": [25],
+    "Revelation": [20, 29, 22, 11, 14, 17, 17, 13, 21, 11, 19, 17, 18, 20, 8, 21, 18, 24, 21, 15, 27, 21],
+}
+
+# Average KJV verse length (783,137 words / 31,102 verses) and a relaxed
+# reading pace, used to estimate how long a reading takes
+WORDS_PER_VERSE = 25.2
+READING_WORDS_PER_MINUTE = 200
+
+# Chapters are numbered 1..1189 through the canon so a reading can be held as
+# a list of ints; CHAPTER_REFS[id - 1] maps back to (book, chapter)
+CHAPTER_REFS = tuple(
+    (book["name"], chapter)
+    for book in BIBLE_BOOKS
+    for chapter in range(1, book["chapters"] + 1)
+)
+_FIRST_CHAPTER_IDS = {}
+for _id, (_book, _chapter) in enumerate(CHAPTER_REFS, start=1):
+    _FIRST_CHAPTER_IDS.setdefault(_book, _id)
+
+def chapter_id(book: str, chapter: int) -> int:
+    """Global chapter id, e.g. Genesis 1 -> 1, Revelation 22 -> 1189"""
+    if book not in CHAPTER_VERSES:
+        raise ValueError(f"Unknown book: {book}")
+    if not 1 <= chapter <= len(CHAPTER_VERSES[book]):
+        raise ValueError(f"{book} has no chapter {chapter}")
+    return _FIRST_CHAPTER_IDS[book] + chapter - 1
+
+def chapter_ref(number: int):
+    """(book, chapter) for a global chapter id"""
+    return CHAPTER_REFS[number - 1]
+
+def chapter_verse_count(number: int) -> int:
+    book, chapter = CHAPTER_REFS[number - 1]
+    return CHAPTER_VERSES[book][chapter - 1]
+
+def reading_minutes(verse_count: int) -> int:
+    return max(1, round(verse_count * WORDS_PER_VERSE / READING_WORDS_PER_MINUTE))
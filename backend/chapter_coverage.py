@@ -0,0 +1,137 @@
+# Which chapters of the Bible each user has bookmarked or read
+#
+# One document per user in `chapter_coverage` with two 1,189-bit sets over the
+# global chapter ids from bible_data (Genesis 1 = bit 0, Revelation 22 = bit
+# 1188), each stored as COVERAGE_WORDS 32-bit words: b0..b37 for chapters with
+# a bookmark and r0..r37 for chapters read as part of a completed plan day.
+# Updates are single $bit operations; per-book counts are popcounts over each
+# book's slice of the set, so building the profile summary or the heatmap
+# never touches the bookmarks themselves.
+#
+# Read coverage only grows: unticking a plan day does not un-read its
+# chapters. Users from before the bitmaps get theirs built from their
+# bookmarks and completed plan days the first time they are asked for.
+
+from datetime import datetime, timezone
+
+from bson import Int64
+from pymongo.errors import DuplicateKeyError
+
+from bible_data import BIBLE_BOOKS, CHAPTER_REFS, chapter_id
+import content_store
+import plan_engine
+import reading_progress
+
+COVERAGE_COLLECTION = "chapter_coverage"
+
+WORD_BITS = 32
+WORD_MASK = (1 << WORD_BITS) - 1
+COVERAGE_WORDS = (len(CHAPTER_REFS) + WORD_BITS - 1) // WORD_BITS
+BOOKMARK_FIELDS = tuple(f"b{i}" for i in range(COVERAGE_WORDS))
+READ_FIELDS = tuple(f"r{i}" for i in range(COVERAGE_WORDS))
+
+# (book, testament, first bit, chapter count) in canonical order
+BOOK_SLICES = [
+    (book["name"], book["testament"], chapter_id(book["name"], 1) - 1, book["chapters"])
+    for book in BIBLE_BOOKS
+]
+
+def _word_masks(chapter_ids) -> dict:
+    """{word index: mask} covering a set of chapter ids"""
+    masks = {}
+    for number in chapter_ids:
+        word, bit = divmod(number - 1, WORD_BITS)
+        masks[word] = masks.get(word, 0) | (1 << bit)
+    return masks
+
+def pack(chapter_ids, fields) -> dict:
+    words = [0] * COVERAGE_WORDS
+    for word, mask in _word_masks(chapter_ids).items():
+        words[word] = mask
+    return {field: Int64(value) for field, value in zip(fields, words)}
+
+def unpack(doc, fields) -> int:
+    bits = 0
+    for i, field in enumerate(fields):
+        bits |= (int(doc.get(field, 0)) & WORD_MASK) << (i * WORD_BITS)
+    return bits
+
+def book_counts(bits: int) -> list:
+    """[(book, testament, chapters, covered chapters, per-chapter bits), ...]"""
+    counts = []
+    for book, testament, start, chapters in BOOK_SLICES:
+        slice_bits = (bits >> start) & ((1 << chapters) - 1)
+        counts.append((book, testament, chapters, bin(slice_bits).count("1"), slice_bits))
+    return counts
+
+async def _completed_chapter_ids(db, user_id: str) -> set:
+    """Chapters in every plan day the user has ticked off, across all their plan runs"""
+    read = set()
+    async for run in db[reading_progress.PROGRESS_COLLECTION].find({"user_id": user_id}, {"_id": 0}):
+        if run["plan_id"] == reading_progress.DEFAULT_PLAN_ID:
+            plan = content_store.get_reading_plan()
+        else:
+            plan_doc = await db.reading_plans.find_one({"plan_id": run["plan_id"]}, {"_id": 0, "params": 1})
+            if not plan_doc:
+                continue
+            plan = plan_engine.generate_plan(plan_doc["params"])
+        for day in reading_progress.completed_days(reading_progress.unpack_bits(run)):
+            if day <= len(plan):
+                read.update(plan[day - 1].get("chapter_ids", []))
+    return read
+
+async def _create_coverage(db, user_id: str):
+    """Build a user's bitmaps from their bookmarks and completed plan days"""
+    bookmarked = set()
+    async for doc in db.bookmarks.aggregate([
+        {"$match": {"user_id": user_id}},
+        {"$group": {"_id": {"book": "$book", "chapter": "$chapter"}}}
+    ]):
+        try:
+            bookmarked.add(chapter_id(doc["_id"]["book"], doc["_id"]["chapter"]))
+        except (KeyError, TypeError, ValueError):
+            continue  # bookmark on a chapter outside the canon table
+
+    read = await _completed_chapter_ids(db, user_id)
+
+    doc = {
+        "user_id": user_id,
+        **pack(bookmarked, BOOKMARK_FIELDS),
+        **pack(read, READ_FIELDS),
+        "updated_at": datetime.now(timezone.utc).isoformat()
+    }
+    try:
+        await db[COVERAGE_COLLECTION].insert_one(doc)
+    except DuplicateKeyError:
+        pass  # Built concurrently by another request
+
+async def get_coverage(db, user_id: str) -> dict:
+    collection = db[COVERAGE_COLLECTION]
+    doc = await collection.find_one({"user_id": user_id}, {"_id": 0})
+    if doc is None:
+        await _create_coverage(db, user_id)
+        doc = await collection.find_one({"user_id": user_id}, {"_id": 0})
+    return {"bookmarked": unpack(doc, BOOKMARK_FIELDS), "read": unpack(doc, READ_FIELDS)}
+
+async def _apply(db, user_id: str, fields, chapter_ids, set_bits: bool):
+    masks = _word_masks(chapter_ids)
+    if not masks:
+        return
+    if set_bits:
+        update = {fields[word]: {"or": Int64(mask)} for word, mask in masks.items()}
+    else:
+        update = {fields[word]: {"and": Int64(WORD_MASK ^ mask)} for word, mask in masks.items()}
+    # No upsert: users without a document get one built from scratch on first read
+    await db[COVERAGE_COLLECTION].update_one(
+        {"user_id": user_id},
+        {"$bit": update, "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}}
+    )
+
+async def mark_bookmarked(db, user_id: str, number: int):
+    await _apply(db, user_id, BOOKMARK_FIELDS, [number], True)
+
+async def clear_bookmarked(db, user_id: str, number: int):
+    await _apply(db, user_id, BOOKMARK_FIELDS, [number], False)
+
+async def mark_read(db, user_id: str, chapter_ids):
+    await _apply(db, user_id, READ_FIELDS, chapter_ids, True)
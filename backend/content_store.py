@@ -0,0 +1,140 @@
+# Versioned devotional and reading-plan content
+#
+# The content lives in MongoDB (one document per day) so corrections can be
+# published without a redeploy. Every worker serves reads from an in-process
+# snapshot seeded from the bundled Python data, and polls a per-kind version
+# stamp in `content_meta`. When the stamp moves, only the days whose own
+# version changed are fetched, and the snapshot is replaced with a single
+# assignment so in-flight requests keep reading the old one.
+
+from datetime import datetime, timezone
+import logging
+
+from pymongo import ReturnDocument
+
+from bible_data import FULL_YEAR_DEVOTIONALS, DevotionalYear
+from reading_plan import BIBLE_IN_A_YEAR_PLAN, expand_day
+
+logger = logging.getLogger(__name__)
+
+# kind -> backing collection
+CONTENT_COLLECTIONS = {
+    "devotionals": "devotionals",
+    "reading_plan": "reading_plan_days",
+}
+
+# Bundled data each collection is seeded from
+_SOURCES = {
+    "devotionals": FULL_YEAR_DEVOTIONALS,
+    "reading_plan": BIBLE_IN_A_YEAR_PLAN,
+}
+
+# Bookkeeping fields stored alongside the content but never served
+_STORE_FIELDS = ("_id", "version", "updated_at")
+
+def _initial_snapshot(items):
+    return {
+        "meta_version": None,
+        # Devotionals stay in their deduplicated form; plan days are served
+        # pre-expanded into chapter ids, verse counts and reading time
+        "items": items if isinstance(items, DevotionalYear) else [expand_day(item) for item in items],
+        "versions": {item["day"]: 1 for item in items},
+    }
+
+def _apply_updates(items, updates):
+    if isinstance(items, DevotionalYear):
+        return items.replace_days(updates)
+    by_day = {item["day"]: item for item in items}
+    by_day.update({day: expand_day(item) for day, item in updates.items()})
+    return [by_day[day] for day in sorted(by_day)]
+
+_snapshots = {
+    kind: _initial_snapshot(items) for kind, items in _SOURCES.items()
+}
+
+def get_devotionals():
+    return _snapshots["devotionals"]["items"]
+
+def get_reading_plan():
+    return _snapshots["reading_plan"]["items"]
+
+def get_content_versions():
+    return {kind: snap["meta_version"] for kind, snap in _snapshots.items()}
+
+def _strip(doc):
+    return {k: v for k, v in doc.items() if k not in _STORE_FIELDS}
+
+async def seed_content(db):
+    """Populate the content collections from the bundled data on first run"""
+    for kind, collection_name in CONTENT_COLLECTIONS.items():
+        collection = db[collection_name]
+        await collection.create_index("day", unique=True)
+
+        if await collection.estimated_document_count() == 0:
+            now = datetime.now(timezone.utc).isoformat()
+            docs = [{**item, "version": 1, "updated_at": now} for item in _SOURCES[kind]]
+            try:
+                await collection.insert_many(docs, ordered=False)
+                logger.info(f"Seeded {len(docs)} {kind} documents")
+            except Exception as e:
+                # Another worker seeded concurrently; the unique index kept it clean
+                logger.info(f"Content seed for {kind} skipped: {e}")
+
+        await db.content_meta.update_one(
+            {"_id": kind},
+            {"$setOnInsert": {"version": 0}},
+            upsert=True
+        )
+
+async def sync_content(db) -> list:
+    """Pick up published changes. Returns the kinds whose snapshot was swapped."""
+    changed_kinds = []
+    for kind, collection_name in CONTENT_COLLECTIONS.items():
+        meta = await db.content_meta.find_one({"_id": kind})
+        if not meta:
+            continue
+
+        snapshot = _snapshots[kind]
+        if meta["version"] == snapshot["meta_version"]:
+            continue
+
+        collection = db[collection_name]
+        stamps = await collection.find({}, {"_id": 0, "day": 1, "version": 1}).to_list(1000)
+        changed_days = [
+            s["day"] for s in stamps
+            if snapshot["versions"].get(s["day"]) != s["version"]
+        ]
+
+        if changed_days:
+            updates = {}
+            versions = dict(snapshot["versions"])
+            async for doc in collection.find({"day": {"$in": changed_days}}):
+                updates[doc["day"]] = _strip(doc)
+                versions[doc["day"]] = doc["version"]
+            items = _apply_updates(snapshot["items"], updates)
+            _snapshots[kind] = {"meta_version": meta["version"], "items": items, "versions": versions}
+            changed_kinds.append(kind)
+            logger.info(f"Content {kind} updated to v{meta['version']} ({len(changed_days)} days changed)")
+        else:
+            _snapshots[kind] = {**snapshot, "meta_version": meta["version"]}
+
+    return changed_kinds
+
+async def publish_item(db, kind: str, day: int, fields: dict):
+    """Write a corrected day and bump the kind's version stamp so workers reload it"""
+    collection = db[CONTENT_COLLECTIONS[kind]]
+    doc = await collection.find_one_and_update(
+        {"day": day},
+        {
+            "$set": {**fields, "updated_at": datetime.now(timezone.utc).isoformat()},
+            "$inc": {"version": 1}
+        },
+        return_document=ReturnDocument.AFTER
+    )
+    if not doc:
+        return None
+
+    # Bump the stamp only after the document write so a poller that sees the
+    # new stamp is guaranteed to see the new document too
+    await db.content_meta.update_one({"_id": kind}, {"$inc": {"version": 1}}, upsert=True)
+    return _strip(doc)
@@ -0,0 +1,230 @@
+# Declared MongoDB indexes
+#
+# INDEX_REGISTRY lists every index the app relies on, per collection, and is
+# applied at startup. Each index is created on its own, so one that cannot be
+# built (say a unique index over existing duplicates) is logged and the rest
+# still go in. index_drift() compares the registry with what the database
+# actually has, and explain_hot_queries() runs explain() on the queries
+# behind the busiest endpoints to confirm none of them falls back to a
+# collection scan.
+
+import logging
+
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+
+from chapter_coverage import COVERAGE_COLLECTION
+from content_store import CONTENT_COLLECTIONS
+from forum_votes import VOTES_COLLECTION
+from idempotency import IDEMPOTENCY_COLLECTION
+from rate_limit import RATE_LIMIT_COLLECTION
+from reading_progress import PROGRESS_COLLECTION
+from reading_stats import DAY_STATS_COLLECTION
+from token_revocation import REVOKED_COLLECTION, VERSIONS_COLLECTION
+
+logger = logging.getLogger(__name__)
+
+INDEX_REGISTRY = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING)], unique=True),
+    ],
+    "user_settings": [
+        IndexModel([("user_id", ASCENDING)], unique=True),
+    ],
+    "user_stats": [
+        IndexModel([("user_id", ASCENDING)], unique=True),
+    ],
+    "bookmarks": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("bookmark_id", DESCENDING)]),
+        IndexModel([("bookmark_id", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING), ("book", ASCENDING), ("chapter", ASCENDING)]),
+    ],
+    COVERAGE_COLLECTION: [
+        IndexModel([("user_id", ASCENDING)], unique=True),
+    ],
+    "journals": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("journal_id", DESCENDING)]),
+        IndexModel([("journal_id", ASCENDING)], unique=True),
+    ],
+    "forum_posts": [
+        IndexModel([("created_at", DESCENDING), ("post_id", DESCENDING)]),
+        IndexModel([("hot_score", DESCENDING), ("post_id", DESCENDING)]),
+        IndexModel([("rising_score", DESCENDING), ("post_id", DESCENDING)]),
+        IndexModel([("upvotes", DESCENDING), ("post_id", DESCENDING)]),
+        IndexModel([("scripture_chapters", ASCENDING), ("created_at", DESCENDING), ("post_id", DESCENDING)]),
+        IndexModel([("title", TEXT), ("content", TEXT), ("tags", TEXT)], weights={"title": 5, "tags": 3, "content": 1}),
+        IndexModel([("post_id", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING)]),
+    ],
+    "forum_comments": [
+        IndexModel([("post_id", ASCENDING), ("created_at", ASCENDING)]),
+        IndexModel([("comment_id", ASCENDING)], unique=True),
+    ],
+    VOTES_COLLECTION: [
+        IndexModel([("target_id", ASCENDING), ("user_id", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING), ("target_id", ASCENDING)]),
+    ],
+    "reading_progress": [
+        IndexModel([("user_id", ASCENDING), ("day", ASCENDING)]),
+    ],
+    PROGRESS_COLLECTION: [
+        IndexModel([("user_id", ASCENDING), ("plan_id", ASCENDING), ("plan_start", ASCENDING)], unique=True),
+    ],
+    DAY_STATS_COLLECTION: [
+        IndexModel([("plan_id", ASCENDING), ("plan_year", ASCENDING), ("day", ASCENDING)], unique=True),
+        IndexModel([("plan_id", ASCENDING), ("plan_year", ASCENDING), ("completions", DESCENDING)]),
+    ],
+    "reading_plans": [
+        IndexModel([("plan_id", ASCENDING)], unique=True),
+    ],
+    **{
+        collection: [IndexModel([("day", ASCENDING)], unique=True)]
+        for collection in CONTENT_COLLECTIONS.values()
+    },
+    "media_history": [
+        IndexModel([("user_id", ASCENDING), ("media_id", ASCENDING)], unique=True),
+        IndexModel([("user_id", ASCENDING), ("watched_at", DESCENDING), ("media_id", DESCENDING)]),
+    ],
+    "news_analyses": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("analysis_id", DESCENDING)]),
+        IndexModel([("news_id", ASCENDING), ("user_id", ASCENDING)]),
+    ],
+    "daily_news": [
+        IndexModel([("date", ASCENDING)], unique=True),
+    ],
+    "push_subscriptions": [
+        IndexModel([("user_id", ASCENDING)], unique=True),
+    ],
+    "notification_preferences": [
+        IndexModel([("user_id", ASCENDING)], unique=True),
+    ],
+    "payment_transactions": [
+        IndexModel([("session_id", ASCENDING)], unique=True),
+    ],
+    "sessions": [
+        IndexModel([("session_id", ASCENDING)], unique=True),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ],
+    REVOKED_COLLECTION: [
+        IndexModel([("jti", ASCENDING)], unique=True),
+        IndexModel([("revoked_at", ASCENDING)]),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ],
+    VERSIONS_COLLECTION: [
+        IndexModel([("user_id", ASCENDING)], unique=True),
+        IndexModel([("updated_at", ASCENDING)]),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ],
+    IDEMPOTENCY_COLLECTION: [
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ],
+    RATE_LIMIT_COLLECTION: [
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ],
+}
+
+# Queries behind the busiest endpoints: (name, collection, filter, sort)
+HOT_QUERIES = [
+    ("login", "users", {"email": "x@example.com"}, None),
+    ("current user", "users", {"user_id": "user_x"}, None),
+    ("profile stats", "user_stats", {"user_id": "user_x"}, None),
+    ("bookmarks", "bookmarks", {"user_id": "user_x"}, [("created_at", DESCENDING), ("bookmark_id", DESCENDING)]),
+    ("chapter bookmarked", "bookmarks", {"user_id": "user_x", "book": "Genesis", "chapter": 1}, None),
+    ("chapter coverage", COVERAGE_COLLECTION, {"user_id": "user_x"}, None),
+    ("journals", "journals", {"user_id": "user_x"}, [("created_at", DESCENDING), ("journal_id", DESCENDING)]),
+    ("forum feed", "forum_posts", {}, [("created_at", DESCENDING), ("post_id", DESCENDING)]),
+    ("forum feed page", "forum_posts",
+     {"$or": [{"created_at": {"$lt": "2026-01-01"}}, {"created_at": "2026-01-01", "post_id": {"$lt": "post_x"}}]},
+     [("created_at", DESCENDING), ("post_id", DESCENDING)]),
+    ("forum hot", "forum_posts", {}, [("hot_score", DESCENDING), ("post_id", DESCENDING)]),
+    ("forum rising", "forum_posts", {}, [("rising_score", DESCENDING), ("post_id", DESCENDING)]),
+    ("forum top", "forum_posts", {}, [("upvotes", DESCENDING), ("post_id", DESCENDING)]),
+    ("posts on a chapter", "forum_posts", {"scripture_chapters": {"$elemMatch": {"$gte": 1054, "$lte": 1054}}},
+     [("created_at", DESCENDING), ("post_id", DESCENDING)]),
+    ("forum text search", "forum_posts", {"$text": {"$search": "grace"}}, None),
+    ("forum post", "forum_posts", {"post_id": "post_x"}, None),
+    ("post comments", "forum_comments", {"post_id": "post_x"}, [("created_at", ASCENDING)]),
+    ("votes on a page", VOTES_COLLECTION, {"user_id": "user_x", "target_id": {"$in": ["post_x", "post_y"]}}, None),
+    ("legacy reading progress", "reading_progress", {"user_id": "user_x", "day": 1}, None),
+    ("reading plan progress", PROGRESS_COLLECTION,
+     {"user_id": "user_x", "plan_id": "bible-in-a-year", "plan_start": "2026-01-01"}, None),
+    ("media history", "media_history", {"user_id": "user_x"}, [("watched_at", DESCENDING), ("media_id", DESCENDING)]),
+    ("media tracked", "media_history", {"user_id": "user_x", "media_id": "video_x"}, None),
+    ("analysis history", "news_analyses", {"user_id": "user_x"}, [("created_at", DESCENDING), ("analysis_id", DESCENDING)]),
+    ("push subscription", "push_subscriptions", {"user_id": "user_x"}, None),
+    ("daily news", "daily_news", {"date": "2026-01-01"}, None),
+]
+
+def _options(spec: dict) -> dict:
+    """The parts of an index definition that make two indexes differ"""
+    return {key: spec[key] for key in ("unique", "expireAfterSeconds", "sparse") if spec.get(key)}
+
+def _same_keys(spec: dict, live: dict) -> bool:
+    # A text index is stored under _fts/_ftsx keys, with its fields in weights
+    text_fields = [field for field, kind in spec["key"].items() if kind == TEXT]
+    if text_fields:
+        declared = spec.get("weights", {})
+        return live.get("weights") == {field: declared.get(field, 1) for field in text_fields}
+    return list(spec["key"].items()) == [tuple(k) for k in live["key"]]
+
+async def apply_indexes(db) -> list:
+    """Create every registered index; returns the ones that failed"""
+    failed = []
+    for collection, indexes in INDEX_REGISTRY.items():
+        for index in indexes:
+            spec = index.document
+            try:
+                options = _options(spec)
+                if "weights" in spec:
+                    options["weights"] = spec["weights"]
+                await db[collection].create_index(list(spec["key"].items()), **options)
+            except Exception as e:
+                failed.append({"collection": collection, "index": spec["name"], "error": str(e)})
+                logger.warning(f"Index {collection}.{spec['name']} could not be created: {e}")
+    return failed
+
+async def index_drift(db) -> dict:
+    """Registered indexes that are missing or differ, and live ones nobody declared"""
+    missing, different, undeclared = [], [], []
+    for collection, indexes in INDEX_REGISTRY.items():
+        live = await db[collection].index_information()
+        declared = set()
+        for index in indexes:
+            spec = index.document
+            declared.add(spec["name"])
+            if spec["name"] not in live:
+                missing.append(f"{collection}.{spec['name']}")
+            elif not _same_keys(spec, live[spec["name"]]) or _options(spec) != _options(live[spec["name"]]):
+                different.append(f"{collection}.{spec['name']}")
+        undeclared.extend(f"{collection}.{name}" for name in live if name != "_id_" and name not in declared)
+    return {"missing": missing, "different": different, "undeclared": undeclared}
+
+def _plan_stages(plan: dict) -> list:
+    stages = [plan.get("stage")]
+    for child in ("inputStage", "queryPlan"):
+        if child in plan:
+            stages.extend(_plan_stages(plan[child]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return [stage for stage in stages if stage]
+
+async def explain_hot_queries(db) -> list:
+    """Winning plan of each hot query and whether it avoids a collection scan"""
+    results = []
+    for name, collection, query, sort in HOT_QUERIES:
+        cursor = db[collection].find(query).limit(1)
+        if sort:
+            cursor = cursor.sort(sort)
+        try:
+            explain = await cursor.explain()
+        except Exception as e:
+            results.append({"query": name, "collection": collection, "error": str(e), "uses_index": False})
+            continue
+        stages = _plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+        results.append({
+            "query": name,
+            "collection": collection,
+            "stages": stages,
+            "uses_index": "COLLSCAN" not in stages,
+        })
+    return results
@@ -0,0 +1,185 @@
+# Full-text search over the devotionals
+#
+# An inverted index is built over the unique devotional bodies (see
+# bible_data.DevotionalYear) and fanned out to day numbers at query time, so
+# a year of devotionals is only ~100 bodies to index. The index is rebuilt
+# lazily whenever the content store swaps in a new DevotionalYear.
+
+from bisect import bisect_left
+import html
+import math
+import re
+
+# Field -> weight applied to each term occurrence
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "scripture": 2.0,
+    "verse_text": 1.5,
+    "reflection": 1.0,
+    "prayer": 1.0,
+}
+
+# Fields tried, in order, when picking the snippet to show
+SNIPPET_FIELDS = ("reflection", "verse_text", "prayer", "title", "scripture")
+SNIPPET_RADIUS = 70
+
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "he", "his",
+    "i", "in", "is", "it", "me", "my", "of", "on", "or", "our", "shall", "that", "the",
+    "thee", "their", "them", "they", "this", "thou", "thy", "to", "unto", "us", "was",
+    "we", "with", "ye", "you", "your",
+}
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# Suffix groups stripped at most once each, in order
+_SUFFIX_GROUPS = (
+    ("fulness", "ness", "ful", "ly"),
+    ("ing", "ed", "es", "s"),
+    ("e",),
+)
+
+def stem(word: str) -> str:
+    """Very light suffix stripping so fear/fears/fearful and forgive/forgiveness meet"""
+    if word.endswith("'s"):
+        word = word[:-2]
+    for suffixes in _SUFFIX_GROUPS:
+        for suffix in suffixes:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                word = word[:-len(suffix)]
+                break
+    return word
+
+def tokenize(text: str):
+    """Yield (term, start, end) for every indexable word in text"""
+    for match in TOKEN_RE.finditer(text.lower()):
+        word = match.group()
+        if word in STOP_WORDS:
+            continue
+        yield stem(word), match.start(), match.end()
+
+def build_index(year) -> dict:
+    """Build the inverted index for a DevotionalYear"""
+    postings = {}    # term -> {body_id: weighted term frequency}
+    positions = []   # body_id -> {field: {term: [(start, end), ...]}}
+    for body_id, body in enumerate(year.bodies):
+        body_positions = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            field_positions = {}
+            for term, start, end in tokenize(body.get(field) or ""):
+                field_positions.setdefault(term, []).append((start, end))
+                per_body = postings.setdefault(term, {})
+                per_body[body_id] = per_body.get(body_id, 0.0) + weight
+            body_positions[field] = field_positions
+        positions.append(body_positions)
+
+    body_days = [[] for _ in year.bodies]
+    for index, body_id in enumerate(year.day_index):
+        body_days[body_id].append(index + 1)
+
+    total = len(year.bodies)
+    idf = {term: math.log(1 + total / len(per_body)) for term, per_body in postings.items()}
+
+    return {
+        "year": year,
+        "postings": postings,
+        "idf": idf,
+        "vocabulary": sorted(postings),
+        "positions": positions,
+        "body_days": body_days,
+    }
+
+_index = None
+
+def get_index(year) -> dict:
+    global _index
+    if _index is None or _index["year"] is not year:
+        _index = build_index(year)
+    return _index
+
+def _expand_term(index, term):
+    """The term itself plus, for longer terms, indexed words it is a prefix of"""
+    expansions = {}
+    if term in index["postings"]:
+        expansions[term] = 1.0
+    if len(term) >= 3:
+        vocabulary = index["vocabulary"]
+        i = bisect_left(vocabulary, term)
+        while i < len(vocabulary) and vocabulary[i].startswith(term):
+            expansions.setdefault(vocabulary[i], 0.5)
+            i += 1
+    return expansions
+
+def _snippet(text: str, spans) -> str:
+    """Cut a window around the first match and wrap every match in it with <mark>"""
+    first_start = spans[0][0]
+    start = max(0, first_start - SNIPPET_RADIUS)
+    end = min(len(text), spans[0][1] + SNIPPET_RADIUS)
+    if start > 0:
+        start = text.find(" ", start, first_start) + 1 or start
+    if end < len(text):
+        cut = text.rfind(" ", spans[0][1], end)
+        end = cut if cut > 0 else end
+
+    parts = ["…" if start > 0 else ""]
+    cursor = start
+    for s, e in spans:
+        if s < cursor or e > end:
+            continue
+        parts.append(html.escape(text[cursor:s]))
+        parts.append(f"<mark>{html.escape(text[s:e])}</mark>")
+        cursor = e
+    parts.append(html.escape(text[cursor:end]))
+    if end < len(text):
+        parts.append("…")
+    return "".join(parts)
+
+def search(year, query: str, limit: int = 20) -> list:
+    """Rank days for a query. Returns [{day, title, scripture, score, field, snippet}]"""
+    index = get_index(year)
+    query_terms = list(dict.fromkeys(term for term, _, _ in tokenize(query)))
+    if not query_terms:
+        return []
+
+    scores = {}
+    matched_terms = {}   # body_id -> set of query terms it matched
+    matched_words = {}   # body_id -> set of index terms to highlight
+    for query_term in query_terms:
+        for term, boost in _expand_term(index, query_term).items():
+            idf = index["idf"][term]
+            for body_id, tf in index["postings"][term].items():
+                scores[body_id] = scores.get(body_id, 0.0) + boost * idf * tf
+                matched_terms.setdefault(body_id, set()).add(query_term)
+                matched_words.setdefault(body_id, set()).add(term)
+
+    # Favour devotionals that match more of the query
+    for body_id in scores:
+        scores[body_id] *= len(matched_terms[body_id]) / len(query_terms)
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], index["body_days"][item[0]][0]))
+
+    results = []
+    for body_id, score in ranked:
+        body = year.bodies[body_id]
+        field, snippet = None, None
+        for candidate in SNIPPET_FIELDS:
+            field_positions = index["positions"][body_id][candidate]
+            spans = sorted(
+                span for term in matched_words[body_id]
+                for span in field_positions.get(term, ())
+            )
+            if spans:
+                field, snippet = candidate, _snippet(body[candidate], spans)
+                break
+        for day in index["body_days"][body_id]:
+            results.append({
+                "day": day,
+                "title": body["title"],
+                "scripture": body["scripture"],
+                "score": round(score, 3),
+                "field": field,
+                "snippet": snippet,
+            })
+            if len(results) >= limit:
+                return results
+    return results
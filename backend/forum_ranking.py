@@ -0,0 +1,101 @@
+# Forum feed rankings
+#
+# Besides newest-first, the feed can be read as:
+#
+#   hot     log10 of engagement plus a term that grows with the post's age, so
+#           a newer post needs ten times the engagement of one HOT_HALF_LIFE
+#           older to rank with it. The score does not change as time passes,
+#           only when the post gets votes or comments.
+#   rising  engagement divided by (age + 2h) ** RISING_GRAVITY for posts from
+#           the last RISING_WINDOW_HOURS; this one does decay, so a periodic
+#           refresh recomputes it. Only posts that score are listed.
+#   top     upvotes.
+#
+# Engagement is upvotes plus COMMENT_WEIGHT per comment. Each score is stored
+# on the post and indexed with post_id, so a feed page is an index range scan
+# rather than a sort over every post.
+
+from datetime import datetime, timedelta, timezone
+import logging
+import math
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+COMMENT_WEIGHT = 2
+HOT_HALF_LIFE = 45000  # seconds for the age term to be worth one power of ten
+HOT_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+RISING_GRAVITY = 1.5
+RISING_WINDOW_HOURS = 48
+
+# feed -> field it is sorted on
+FEED_SORTS = {
+    "new": "created_at",
+    "hot": "hot_score",
+    "rising": "rising_score",
+    "top": "upvotes",
+}
+
+# feed -> filter on top of it; posts outside the rising window all score 0,
+# and ordering those by post_id would fill the feed with arbitrary old posts
+FEED_FILTERS = {
+    "rising": {"rising_score": {"$gt": 0}},
+}
+
+SCORE_FIELDS = {"_id": 0, "post_id": 1, "upvotes": 1, "comments_count": 1, "created_at": 1}
+
+def _created(post: dict) -> datetime:
+    created = datetime.fromisoformat(post["created_at"])
+    return created if created.tzinfo else created.replace(tzinfo=timezone.utc)
+
+def scores(post: dict, now: datetime = None) -> dict:
+    """hot_score and rising_score for a post with upvotes, comments_count and created_at"""
+    now = now or datetime.now(timezone.utc)
+    engagement = post.get("upvotes", 0) + COMMENT_WEIGHT * post.get("comments_count", 0)
+    created = _created(post)
+
+    hot = math.copysign(math.log10(max(abs(engagement), 1)), engagement)
+    hot += (created - HOT_EPOCH).total_seconds() / HOT_HALF_LIFE
+
+    age_hours = max((now - created).total_seconds() / 3600, 0)
+    rising = 0.0
+    if age_hours < RISING_WINDOW_HOURS and engagement > 0:
+        rising = engagement / (age_hours + 2) ** RISING_GRAVITY
+    return {"hot_score": round(hot, 7), "rising_score": round(rising, 7)}
+
+async def rescore(db, post: dict):
+    """Store fresh scores after a vote or comment.
+
+    Written only if the counts are still the ones scored, so a slower request
+    cannot overwrite the scores of a newer one; the newer one writes its own.
+    """
+    await db.forum_posts.update_one(
+        {
+            "post_id": post["post_id"],
+            "upvotes": post.get("upvotes", 0),
+            "comments_count": post.get("comments_count", 0)
+        },
+        {"$set": scores(post)}
+    )
+
+async def refresh_scores(db) -> int:
+    """Recompute scores that drift with time: recent posts, posts leaving the
+    rising window, and posts that were never scored. Returns how many changed."""
+    now = datetime.now(timezone.utc)
+    window_start = (now - timedelta(hours=RISING_WINDOW_HOURS)).isoformat()
+    query = {"$or": [
+        {"created_at": {"$gte": window_start}},
+        {"rising_score": {"$gt": 0}},
+        {"hot_score": {"$exists": False}},
+    ]}
+    updates = []
+    async for post in db.forum_posts.find(query, SCORE_FIELDS):
+        # Same guard as rescore(): skip posts whose counts moved since they were read
+        updates.append(UpdateOne(
+            {"post_id": post["post_id"], "upvotes": post.get("upvotes", 0), "comments_count": post.get("comments_count", 0)},
+            {"$set": scores(post, now)}
+        ))
+    if updates:
+        await db.forum_posts.bulk_write(updates, ordered=False)
+    return len(updates)
@@ -0,0 +1,132 @@
+# Forum upvotes
+#
+# Each vote is its own document in `votes`, unique per (target_id, user_id),
+# and posts and comments only carry the denormalised `upvotes` count. A post
+# with ten thousand votes is then the same size as one with none, and whether
+# the reader voted on a page of posts is one indexed $in query.
+#
+# Toggling relies on the unique index rather than a read-then-write: the
+# insert either lands (a new vote) or hits the duplicate key (take it back),
+# so two quick taps cannot count twice. The count only moves by the vote
+# write that actually happened, in one find_one_and_update that also returns
+# the new total, so a toggle is two round trips with no read of the target.
+# A request that dies between the two leaves the count one off; recount()
+# brings counts back in line with `votes` and runs daily.
+
+from datetime import datetime, timezone
+import logging
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+VOTES_COLLECTION = "votes"
+
+# target type -> (collection, id field)
+VOTE_TARGETS = {
+    "post": ("forum_posts", "post_id"),
+    "comment": ("forum_comments", "comment_id"),
+}
+
+async def toggle_vote(db, target_type: str, target_id: str, user_id: str):
+    """Add the user's vote, or take it back if they already voted.
+
+    Returns (voted, target) with the target's new upvotes, comments_count and
+    created_at, or None if the target does not exist.
+    """
+    collection, id_field = VOTE_TARGETS[target_type]
+    votes = db[VOTES_COLLECTION]
+    vote_filter = {"target_id": target_id, "user_id": user_id}
+    try:
+        await votes.insert_one({
+            **vote_filter,
+            "target_type": target_type,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        })
+        change = 1
+    except DuplicateKeyError:
+        result = await votes.delete_one(vote_filter)
+        # Zero when a concurrent toggle removed it first; the count is already right
+        change = -result.deleted_count
+
+    target = await db[collection].find_one_and_update(
+        {id_field: target_id},
+        {"$inc": {"upvotes": change}},
+        projection={"_id": 0, id_field: 1, "upvotes": 1, "comments_count": 1, "created_at": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if target is None:
+        if change > 0:
+            await votes.delete_one(vote_filter)
+        return None
+    return change > 0, target
+
+async def voted_ids(db, user_id: str, target_ids) -> set:
+    """Which of these posts or comments the user has voted on"""
+    target_ids = list(target_ids)
+    if not target_ids:
+        return set()
+    cursor = db[VOTES_COLLECTION].find(
+        {"user_id": user_id, "target_id": {"$in": target_ids}},
+        {"_id": 0, "target_id": 1}
+    )
+    return {doc["target_id"] async for doc in cursor}
+
+async def migrate_embedded_votes(db):
+    """Move any `upvoted_by` arrays left on posts and comments into `votes`"""
+    now = datetime.now(timezone.utc).isoformat()
+    for target_type, (collection, id_field) in VOTE_TARGETS.items():
+        moved = 0
+        async for doc in db[collection].find({"upvoted_by": {"$exists": True}}, {"_id": 0, id_field: 1, "upvoted_by": 1}):
+            target_id = doc[id_field]
+            voters = set(doc.get("upvoted_by") or [])
+            if voters:
+                await db[VOTES_COLLECTION].bulk_write([
+                    UpdateOne(
+                        {"target_id": target_id, "user_id": voter},
+                        {"$setOnInsert": {"target_type": target_type, "created_at": now}},
+                        upsert=True
+                    )
+                    for voter in voters
+                ], ordered=False)
+            upvotes = await db[VOTES_COLLECTION].count_documents({"target_id": target_id})
+            await db[collection].update_one(
+                {id_field: target_id},
+                {"$set": {"upvotes": upvotes}, "$unset": {"upvoted_by": ""}}
+            )
+            moved += 1
+        if moved:
+            logger.info(f"Moved embedded votes of {moved} {collection} documents into {VOTES_COLLECTION}")
+
+async def recount(db) -> dict:
+    """Set upvotes to the number of votes wherever they disagree.
+
+    Returns the ids fixed, per target type.
+    """
+    votes = db[VOTES_COLLECTION]
+    fixed = {}
+    for target_type, (collection, id_field) in VOTE_TARGETS.items():
+        counts = {
+            doc["_id"]: doc["count"]
+            async for doc in votes.aggregate([
+                {"$match": {"target_type": target_type}},
+                {"$group": {"_id": "$target_id", "count": {"$sum": 1}}}
+            ])
+        }
+        fixed[target_type] = []
+        async for doc in db[collection].find({}, {"_id": 0, id_field: 1, "upvotes": 1}):
+            target_id, upvotes = doc[id_field], doc.get("upvotes")
+            if upvotes == counts.get(target_id, 0):
+                continue
+            # Count again for just this target, and only write if no toggle moved it meanwhile
+            count = await votes.count_documents({"target_id": target_id})
+            result = await db[collection].update_one(
+                {id_field: target_id, "upvotes": upvotes},
+                {"$set": {"upvotes": count}}
+            )
+            if result.modified_count:
+                fixed[target_type].append(target_id)
+        if fixed[target_type]:
+            logger.info(f"Recounted upvotes of {len(fixed[target_type])} {collection} documents")
+    return fixed
@@ -0,0 +1,110 @@
+# Idempotency keys for retried requests
+#
+# A client that may retry a non-idempotent request (a flaky mobile connection
+# re-sending a vote toggle, say) sends the same Idempotency-Key header each
+# time. The first request claims the key and stores its response; a retry
+# gets that stored response back instead of running again. A retry that
+# arrives while the first is still running is told to try again shortly.
+# Keys are per user and expire after KEY_TTL_HOURS through a TTL index.
+#
+# Each claim records a fingerprint of what the request was for (the vote's
+# target, say), so reusing a key for a different request is refused rather
+# than answered with the other request's response. A claim that never
+# completes - the worker died, or the client went away mid-request - only
+# holds the key for LEASE_SECONDS; after that a retry takes it over. While
+# the request runs, renewing() keeps extending the lease so a slow request is
+# not overtaken, and every write names the claim's holder, so a request that
+# did lose its claim cannot overwrite the new holder's result.
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+import asyncio
+
+from pymongo.errors import DuplicateKeyError
+
+IDEMPOTENCY_COLLECTION = "idempotency_keys"
+KEY_TTL_HOURS = 24
+MAX_KEY_LENGTH = 128
+LEASE_SECONDS = 10
+
+class InvalidKey(ValueError):
+    pass
+
+class KeyInProgress(Exception):
+    pass
+
+class KeyMismatch(Exception):
+    """The key was already used for a different request"""
+
+def _key_id(scope: str, user_id: str, key: str) -> str:
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise InvalidKey(key)
+    return f"{scope}:{user_id}:{key}"
+
+async def claim(db, scope: str, user_id: str, key: str, fingerprint: str, holder: str):
+    """Claim a key for `holder`. Returns the stored response if it was used before, else None."""
+    collection = db[IDEMPOTENCY_COLLECTION]
+    key_id = _key_id(scope, user_id, key)
+    now = datetime.now(timezone.utc)
+    lease = {"fingerprint": fingerprint, "holder": holder, "locked_until": now + timedelta(seconds=LEASE_SECONDS)}
+    try:
+        await collection.insert_one({
+            "_id": key_id,
+            "response": None,
+            **lease,
+            "expires_at": now + timedelta(hours=KEY_TTL_HOURS)
+        })
+        return None
+    except DuplicateKeyError:
+        doc = await collection.find_one({"_id": key_id})
+    if doc is None:
+        raise KeyInProgress(key)  # Released just now; the retry can claim it
+    # Claims from before fingerprints were stored match anything
+    if doc.get("fingerprint", fingerprint) != fingerprint:
+        raise KeyMismatch(key)
+    if doc.get("response") is not None:
+        return doc["response"]
+    # Take over a claim whose lease ran out without a response
+    taken = await collection.find_one_and_update(
+        {"_id": key_id, "response": None, "$or": [
+            {"locked_until": {"$lt": now}},
+            {"locked_until": {"$exists": False}}
+        ]},
+        {"$set": lease}
+    )
+    if taken is None:
+        raise KeyInProgress(key)
+    return None
+
+async def renew(db, scope: str, user_id: str, key: str, holder: str) -> bool:
+    """Extend the holder's lease. False if it no longer holds the key."""
+    result = await db[IDEMPOTENCY_COLLECTION].update_one(
+        {"_id": _key_id(scope, user_id, key), "holder": holder, "response": None},
+        {"$set": {"locked_until": datetime.now(timezone.utc) + timedelta(seconds=LEASE_SECONDS)}}
+    )
+    return result.matched_count > 0
+
+@asynccontextmanager
+async def renewing(db, scope: str, user_id: str, key: str, holder: str):
+    """Keep the holder's lease from running out while the block runs"""
+    async def keep_alive():
+        while True:
+            await asyncio.sleep(LEASE_SECONDS / 3)
+            if not await renew(db, scope, user_id, key, holder):
+                return
+
+    task = asyncio.create_task(keep_alive())
+    try:
+        yield
+    finally:
+        task.cancel()
+
+async def complete(db, scope: str, user_id: str, key: str, holder: str, response: dict):
+    await db[IDEMPOTENCY_COLLECTION].update_one(
+        {"_id": _key_id(scope, user_id, key), "holder": holder},
+        {"$set": {"response": response}}
+    )
+
+async def release(db, scope: str, user_id: str, key: str, holder: str):
+    """Give a key back after a failed request so a retry can run it"""
+    await db[IDEMPOTENCY_COLLECTION].delete_one({"_id": _key_id(scope, user_id, key), "holder": holder})
@@ -0,0 +1,31 @@
+# Run-once leases for jobs every worker schedules
+#
+# Each worker runs the same startup tasks and scheduler jobs. A job that
+# should run once across all of them (a full recount, say) first claims a
+# lease document in `job_locks` named after the job; the claim only lands
+# when no other worker holds an unexpired lease, so the rest skip that run.
+# Leases are not released when the job finishes: they last `seconds`, which
+# covers workers starting or firing the same cron a little apart.
+
+from datetime import datetime, timedelta, timezone
+import os
+import socket
+
+from pymongo.errors import DuplicateKeyError
+
+JOB_LOCKS_COLLECTION = "job_locks"
+WORKER_NAME = f"{socket.gethostname()}:{os.getpid()}"
+
+async def acquire(db, job: str, seconds: int) -> bool:
+    """Claim the job for `seconds`. False if another worker holds it."""
+    now = datetime.now(timezone.utc)
+    try:
+        await db[JOB_LOCKS_COLLECTION].update_one(
+            {"_id": job, "locked_until": {"$lte": now}},
+            {"$set": {"locked_until": now + timedelta(seconds=seconds), "holder": WORKER_NAME, "acquired_at": now}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # The lease exists and has not run out, so the upsert tried to insert a second one
+        return False
+    return True
@@ -0,0 +1,168 @@
+# MongoDB client settings and connection pool metrics
+#
+# The Motor client takes its pool sizing, timeouts and wire compression from
+# the environment; anything left unset keeps the driver default:
+#
+#   MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_MS,
+#   MONGO_WAIT_QUEUE_TIMEOUT_MS, MONGO_SERVER_SELECTION_TIMEOUT_MS,
+#   MONGO_CONNECT_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS
+#   MONGO_COMPRESSORS="zstd,snappy,zlib"  (those without their library installed are skipped)
+#
+# Reads that can tolerate a little lag (forum listing, daily news, community
+# stats) go through a separate database handle whose read preference comes
+# from MONGO_READ_PREFERENCE, e.g. "secondaryPreferred"; MONGO_MAX_STALENESS
+# (seconds, at least 90) bounds how far behind a secondary may be. Everything
+# else stays on the primary.
+#
+# A pool listener records how long operations wait to check out a connection,
+# which is the first thing to look at when the pool is too small.
+
+import logging
+import os
+import threading
+import time
+
+from pymongo import ReadPreference, monitoring
+from pymongo.errors import ConfigurationError
+from pymongo.read_preferences import make_read_preference, read_pref_mode_from_name
+
+logger = logging.getLogger(__name__)
+
+# env var -> MongoClient keyword
+POOL_SETTINGS = {
+    "MONGO_MAX_POOL_SIZE": "maxPoolSize",
+    "MONGO_MIN_POOL_SIZE": "minPoolSize",
+    "MONGO_MAX_IDLE_MS": "maxIdleTimeMS",
+    "MONGO_WAIT_QUEUE_TIMEOUT_MS": "waitQueueTimeoutMS",
+    "MONGO_SERVER_SELECTION_TIMEOUT_MS": "serverSelectionTimeoutMS",
+    "MONGO_CONNECT_TIMEOUT_MS": "connectTimeoutMS",
+    "MONGO_SOCKET_TIMEOUT_MS": "socketTimeoutMS",
+}
+
+# compressor -> module the driver needs for it
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+def _available_compressors(names: str) -> list:
+    available = []
+    for name in (n.strip() for n in names.split(",")):
+        if not name:
+            continue
+        if name not in COMPRESSOR_MODULES:
+            logger.warning(f"Unknown MongoDB compressor {name!r}, skipping")
+            continue
+        try:
+            __import__(COMPRESSOR_MODULES[name])
+        except ImportError:
+            logger.warning(f"MongoDB compressor {name} needs {COMPRESSOR_MODULES[name]}, skipping")
+            continue
+        available.append(name)
+    return available
+
+class PoolListener(monitoring.ConnectionPoolListener):
+    """Counts checkouts and how long they waited for a connection"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # A checkout starts and finishes on the same driver thread
+        self._local = threading.local()
+        self.stats = {
+            "connections_open": 0,
+            "checked_out": 0,
+            "waiting": 0,
+            "checkouts": 0,
+            "checkout_failures": 0,
+            "checkout_timeouts": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+            "pool_clears": 0,
+        }
+        self.pool_options = {}
+
+    def _bump(self, **changes):
+        with self._lock:
+            for key, value in changes.items():
+                self.stats[key] += value
+
+    def _finish_wait(self) -> float:
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return (time.perf_counter() - started) * 1000 if started else 0.0
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+        self._bump(waiting=1)
+
+    def connection_checked_out(self, event):
+        waited = self._finish_wait()
+        with self._lock:
+            self.stats["waiting"] -= 1
+            self.stats["checked_out"] += 1
+            self.stats["checkouts"] += 1
+            self.stats["wait_ms_total"] += waited
+            self.stats["wait_ms_max"] = max(self.stats["wait_ms_max"], waited)
+
+    def connection_check_out_failed(self, event):
+        self._finish_wait()
+        timed_out = event.reason == monitoring.ConnectionCheckOutFailedReason.TIMEOUT
+        self._bump(waiting=-1, checkout_failures=1, checkout_timeouts=int(timed_out))
+
+    def connection_checked_in(self, event):
+        self._bump(checked_out=-1)
+
+    def connection_created(self, event):
+        self._bump(connections_open=1)
+
+    def connection_closed(self, event):
+        self._bump(connections_open=-1)
+
+    def pool_cleared(self, event):
+        self._bump(pool_clears=1)
+
+    def pool_created(self, event):
+        self.pool_options = dict(event.options)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+pool_listener = PoolListener()
+
+def client_options() -> dict:
+    """Keyword arguments for AsyncIOMotorClient"""
+    options = {"event_listeners": [pool_listener]}
+    for env, option in POOL_SETTINGS.items():
+        value = os.environ.get(env)
+        if value:
+            try:
+                options[option] = int(value)
+            except ValueError:
+                logger.warning(f"Ignoring malformed {env}={value!r}")
+    compressors = _available_compressors(os.environ.get("MONGO_COMPRESSORS", ""))
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    return options
+
+def read_preference():
+    """Read preference for lag-tolerant reads; primary unless configured"""
+    name = os.environ.get("MONGO_READ_PREFERENCE", "primary")
+    try:
+        max_staleness = int(os.environ.get("MONGO_MAX_STALENESS", "-1"))
+        return make_read_preference(read_pref_mode_from_name(name), None, max_staleness)
+    except (ConfigurationError, ValueError) as e:
+        logger.warning(f"Ignoring MONGO_READ_PREFERENCE={name!r}: {e}")
+        return ReadPreference.PRIMARY
+
+def pool_stats() -> dict:
+    with pool_listener._lock:
+        stats = dict(pool_listener.stats)
+    checkouts = stats["checkouts"]
+    stats["wait_ms_avg"] = round(stats["wait_ms_total"] / checkouts, 2) if checkouts else 0.0
+    stats["wait_ms_total"] = round(stats["wait_ms_total"], 1)
+    stats["wait_ms_max"] = round(stats["wait_ms_max"], 1)
+    stats["pool_options"] = pool_listener.pool_options
+    return stats
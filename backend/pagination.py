@@ -0,0 +1,86 @@
+# Keyset pagination for newest-first lists
+#
+# Lists are sorted on (sort field, id field) descending, and the cursor for
+# the next page is the last item's pair of values, base64-encoded so clients
+# treat it as opaque. Each page starts with an index seek to just past that
+# pair, so page 50 costs the same as page 1, and ties on the timestamp are
+# broken by the id so nothing is skipped or repeated between pages.
+#
+# Text searches page the same way on (relevance score, id), best match first.
+# The score only exists inside the query, so those pages come from an
+# aggregation that adds it as a field before seeking past the cursor.
+
+import base64
+import binascii
+import json
+
+MAX_PAGE_SIZE = 100
+TEXT_SCORE_FIELD = "text_score"
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(sort_value, id_value) -> str:
+    raw = json.dumps([sort_value, id_value], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, id_value = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    # Only plain values go into the query; a dict here would be an operator
+    for value in (sort_value, id_value):
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise InvalidCursor(cursor)
+    return sort_value, id_value
+
+async def fetch_page(collection, query: dict, sort_field: str, id_field: str,
+                     limit: int, cursor: str = None, projection: dict = None):
+    """One page of a newest-first list: (items, cursor for the next page or None)"""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if cursor:
+        sort_value, id_value = decode_cursor(cursor)
+        query = {"$and": [query, {"$or": [
+            {sort_field: {"$lt": sort_value}},
+            {sort_field: sort_value, id_field: {"$lt": id_value}}
+        ]}]}
+    items = await collection.find(query, projection or {"_id": 0}).sort(
+        [(sort_field, -1), (id_field, -1)]
+    ).limit(limit + 1).to_list(limit + 1)
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1][sort_field], items[-1][id_field])
+    return items, next_cursor
+
+async def fetch_text_page(collection, query: dict, id_field: str, limit: int,
+                          cursor: str = None, projection: dict = None):
+    """One page of a $text search, best match first: (items, cursor for the next page or None).
+
+    projection must exclude fields rather than pick them, so the score survives it.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    pipeline = [{"$match": query}, {"$addFields": {TEXT_SCORE_FIELD: {"$meta": "textScore"}}}]
+    if cursor:
+        score, id_value = decode_cursor(cursor)
+        pipeline.append({"$match": {"$or": [
+            {TEXT_SCORE_FIELD: {"$lt": score}},
+            {TEXT_SCORE_FIELD: score, id_field: {"$lt": id_value}}
+        ]}})
+    pipeline += [
+        {"$sort": {TEXT_SCORE_FIELD: -1, id_field: -1}},
+        {"$limit": limit + 1},
+        {"$project": projection or {"_id": 0}},
+    ]
+    items = await collection.aggregate(pipeline).to_list(limit + 1)
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1][TEXT_SCORE_FIELD], items[-1][id_field])
+    for item in items:
+        item.pop(TEXT_SCORE_FIELD, None)
+    return items, next_cursor
@@ -0,0 +1,231 @@
+# Reading plan generation
+#
+# A plan is one or more tracks (runs of books read in order) spread over a
+# number of days; each day gets one slice of every track, so "Old & New
+# Testament" style plans read two tracks side by side. Each track is cut into
+# days by verse count rather than chapter count so Psalm 117 and Psalm 119 are
+# not treated as the same amount of reading: cut points start at the even
+# prefix-sum targets and are then nudged one chapter at a time while that
+# evens out the neighbouring days.
+#
+# Plans are identified by a hash of their normalized parameters and the
+# generated days are memoized on it, so repeat requests cost nothing.
+
+from functools import lru_cache
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+import hashlib
+import json
+
+from bible_data import BIBLE_BOOKS, CHAPTER_VERSES, reading_minutes
+from reading_plan import expand_day
+
+OLD_TESTAMENT = [book["name"] for book in BIBLE_BOOKS if book["testament"] == "Old"]
+NEW_TESTAMENT = [book["name"] for book in BIBLE_BOOKS if book["testament"] == "New"]
+
+# Approximate order of events, book by book
+CHRONOLOGICAL_BOOKS = [
+    "Genesis", "Job", "Exodus", "Leviticus", "Numbers", "Deuteronomy", "Joshua",
+    "Judges", "Ruth", "1 Samuel", "2 Samuel", "1 Chronicles", "Psalms", "1 Kings",
+    "Proverbs", "Ecclesiastes", "Song of Solomon", "2 Kings", "2 Chronicles", "Jonah",
+    "Amos", "Hosea", "Isaiah", "Micah", "Nahum", "Zephaniah", "Habakkuk", "Joel",
+    "Jeremiah", "Lamentations", "Obadiah", "Ezekiel", "Daniel", "Ezra", "Haggai",
+    "Zechariah", "Esther", "Nehemiah", "Malachi", "Matthew", "Mark", "Luke", "John",
+    "Acts", "James", "Galatians", "1 Thessalonians", "2 Thessalonians",
+    "1 Corinthians", "2 Corinthians", "Romans", "Ephesians", "Philippians",
+    "Colossians", "Philemon", "1 Timothy", "Titus", "1 Peter", "Hebrews",
+    "2 Timothy", "2 Peter", "Jude", "1 John", "2 John", "3 John", "Revelation",
+]
+
+PLAN_TEMPLATES = {
+    "nt-90": {
+        "name": "New Testament in 90 Days",
+        "description": "Read the whole New Testament in three months",
+        "tracks": [NEW_TESTAMENT],
+        "days": 90,
+    },
+    "chronological": {
+        "name": "Chronological Bible in a Year",
+        "description": "Read the Bible in the order the events happened",
+        "tracks": [CHRONOLOGICAL_BOOKS],
+        "days": 365,
+    },
+    "psalms-proverbs": {
+        "name": "Psalms & Proverbs Monthly",
+        "description": "A chapter of Proverbs and a portion of Psalms every day of the month",
+        "tracks": [["Psalms"], ["Proverbs"]],
+        "days": 31,
+    },
+    "ot-nt-year": {
+        "name": "Old & New Testament in a Year",
+        "description": "Daily readings from both testaments side by side",
+        "tracks": [OLD_TESTAMENT, NEW_TESTAMENT],
+        "days": 365,
+    },
+    "custom": {
+        "name": "Custom Plan",
+        "description": "Pick the books and the number of days",
+        "tracks": None,
+        "days": None,
+    },
+}
+
+MAX_PLAN_DAYS = 730
+SMOOTHING_PASSES = 8
+
+def normalize_params(template: str, days: int = None, books=None) -> dict:
+    """Validate a plan request and reduce it to the parameters that shape the plan"""
+    if template not in PLAN_TEMPLATES:
+        raise ValueError(f"Unknown plan template: {template}")
+    spec = PLAN_TEMPLATES[template]
+
+    if template == "custom":
+        if not books:
+            raise ValueError("A custom plan needs at least one book")
+        unknown = [book for book in books if book not in CHAPTER_VERSES]
+        if unknown:
+            raise ValueError(f"Unknown books: {', '.join(unknown)}")
+        if days is None:
+            raise ValueError("A custom plan needs a number of days")
+        tracks = [list(dict.fromkeys(books))]
+    else:
+        tracks = spec["tracks"]
+        if days is None:
+            days = spec["days"]
+
+    # Every day needs something from the longest track; shorter ones may skip days
+    longest = max(sum(len(CHAPTER_VERSES[book]) for book in track) for track in tracks)
+    if not 1 <= days <= min(longest, MAX_PLAN_DAYS):
+        raise ValueError(f"Days must be between 1 and {min(longest, MAX_PLAN_DAYS)} for this plan")
+
+    return {"template": template, "days": days, "tracks": tracks}
+
+def plan_id_for(params: dict) -> str:
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    return f"plan_{digest[:12]}"
+
+def _groups_needed(prefix, cap: int) -> list:
+    """Fewest groups of weight <= cap that the chapters from each index onward fit in"""
+    n = len(prefix) - 1
+    needed = [0] * (n + 1)
+    for i in range(n - 1, -1, -1):
+        reach = bisect_right(prefix, prefix[i] + cap) - 1
+        needed[i] = needed[reach] + 1
+    return needed
+
+def balanced_cuts(weights, parts: int) -> list:
+    """End index (exclusive) of each of `parts` contiguous groups with near-equal weight"""
+    prefix = [0, *accumulate(weights)]
+    total = prefix[-1]
+    n = len(weights)
+    # Keep at least one chapter per day when there are enough to go round
+    min_size = 1 if n >= parts else 0
+
+    # Smallest possible heaviest day, by binary search: a cap works when
+    # greedy grouping under it needs no more than `parts` days
+    low, high = max(max(weights, default=0), -(-total // parts)), total
+    while low < high:
+        cap = (low + high) // 2
+        if _groups_needed(prefix, cap)[0] <= parts:
+            high = cap
+        else:
+            low = cap + 1
+    cap = low
+    needed = _groups_needed(prefix, cap)
+
+    # Within that cap, cut at the chapter boundary nearest each even share of
+    # the total, as long as the rest still fits in the days left
+    cuts = []
+    for day in range(1, parts):
+        start = cuts[-1] if cuts else 0
+        days_left = parts - day
+        first = start + min_size
+        last = min(bisect_right(prefix, prefix[start] + cap) - 1, n - days_left * min_size)
+        while first < last and needed[first] > days_left:
+            first += 1
+        target = total * day / parts
+        i = bisect_left(prefix, target)
+        if i > 0 and target - prefix[i - 1] <= prefix[i] - target:
+            i -= 1
+        cuts.append(min(max(i, first), last))
+    cuts.append(n)
+
+    # Nudge each cut while it reduces the spread of its two neighbouring days
+    mean = total / parts
+    for _ in range(SMOOTHING_PASSES):
+        moved = False
+        for j in range(parts - 1):
+            start = cuts[j - 1] if j else 0
+            end = cuts[j + 1]
+            def cost(cut):
+                return (prefix[cut] - prefix[start] - mean) ** 2 + (prefix[end] - prefix[cut] - mean) ** 2
+            best = cuts[j]
+            for candidate in (cuts[j] - 1, cuts[j] + 1):
+                if not start + min_size <= candidate <= end - min_size:
+                    continue
+                if max(prefix[candidate] - prefix[start], prefix[end] - prefix[candidate]) > cap:
+                    continue
+                if cost(candidate) < cost(best):
+                    best = candidate
+            if best != cuts[j]:
+                cuts[j] = best
+                moved = True
+        if not moved:
+            break
+    return cuts
+
+def _readings(chapters) -> list:
+    """Collapse [(book, chapter), ...] into [{"book", "chapters": "1-3"}, ...]"""
+    readings = []
+    for book, chapter in chapters:
+        if readings and readings[-1]["book"] == book:
+            readings[-1]["last"] = chapter
+        else:
+            readings.append({"book": book, "first": chapter, "last": chapter})
+    return [
+        {"book": r["book"], "chapters": str(r["first"]) if r["first"] == r["last"] else f"{r['first']}-{r['last']}"}
+        for r in readings
+    ]
+
+@lru_cache(maxsize=128)
+def _generate(params_key: str) -> tuple:
+    params = json.loads(params_key)
+    days = params["days"]
+
+    day_chapters = [[] for _ in range(days)]
+    for track in params["tracks"]:
+        chapters = [(book, c + 1) for book in track for c in range(len(CHAPTER_VERSES[book]))]
+        weights = [CHAPTER_VERSES[book][chapter - 1] for book, chapter in chapters]
+        start = 0
+        for day, end in enumerate(balanced_cuts(weights, days)):
+            day_chapters[day].append(chapters[start:end])
+            start = end
+
+    plan = []
+    for day, slices in enumerate(day_chapters, start=1):
+        readings = [reading for chapters in slices for reading in _readings(chapters)]
+        theme = " & ".join(f"{r['book']} {r['chapters']}" for r in readings)
+        plan.append(expand_day({"day": day, "readings": readings, "theme": theme}))
+    return tuple(plan)
+
+def generate_plan(params: dict) -> tuple:
+    """The plan's days, memoized on the normalized parameters"""
+    return _generate(json.dumps(params, sort_keys=True))
+
+def plan_summary(params: dict, plan) -> dict:
+    minutes = [day["reading_minutes"] for day in plan]
+    template = PLAN_TEMPLATES[params["template"]]
+    return {
+        "plan_id": plan_id_for(params),
+        "template": params["template"],
+        "name": template["name"],
+        "description": template["description"],
+        "total_days": len(plan),
+        "total_chapters": sum(len(day["chapter_ids"]) for day in plan),
+        "total_minutes": reading_minutes(sum(day["verse_count"] for day in plan)),
+        "minutes_per_day": {
+            "min": min(minutes),
+            "max": max(minutes),
+            "avg": round(sum(minutes) / len(minutes), 1),
+        },
+    }
@@ -0,0 +1,112 @@
+# Request rate limiting
+#
+# Each rule allows `limit` requests per `window` seconds for one key (an IP,
+# an IP and email pair, or a user_id). By default every worker keeps its own
+# token buckets: one (tokens, last_seen) pair per active key in a TTLCache,
+# so memory stays bounded and idle keys fall out after a window. Buckets
+# refill continuously, so a client that stops for part of a window gets part
+# of its budget back.
+#
+# With RATE_LIMIT_BACKEND=mongo the workers share a sliding-window counter
+# instead. Each (rule, key, window) gets one document that a single upsert
+# increments, and the previous window's count is weighted by how much of it
+# still overlaps. The documents expire through a TTL index.
+#
+# Limits can be overridden per rule with RATE_LIMIT_<RULE>="<limit>/<seconds>",
+# e.g. RATE_LIMIT_LOGIN="20/60".
+
+from datetime import datetime, timedelta, timezone
+import logging
+import math
+import os
+import time
+
+from cachetools import TTLCache
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_COLLECTION = "rate_limits"
+RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+MAX_TRACKED_KEYS = 50000
+
+# rule -> (limit, window seconds)
+DEFAULT_RULES = {
+    "login": (20, 60),
+    "login_account": (10, 300),
+    "register": (5, 3600),
+    "news_analysis": (20, 3600),
+}
+
+def _parse_rule(value: str):
+    limit, window = value.split("/")
+    return int(limit), int(window)
+
+def load_rules() -> dict:
+    rules = dict(DEFAULT_RULES)
+    for name in rules:
+        override = os.environ.get(f"RATE_LIMIT_{name.upper()}")
+        if override:
+            try:
+                rules[name] = _parse_rule(override)
+            except ValueError:
+                logger.warning(f"Ignoring malformed RATE_LIMIT_{name.upper()}={override!r}")
+    return rules
+
+RULES = load_rules()
+
+_buckets = {
+    name: TTLCache(maxsize=MAX_TRACKED_KEYS, ttl=window)
+    for name, (_, window) in RULES.items()
+}
+limit_stats = {"allowed": 0, "limited": 0}
+
+def _take_token(rule: str, key: str):
+    """Token bucket: (allowed, seconds until a token is available)"""
+    limit, window = RULES[rule]
+    rate = limit / window
+    now = time.monotonic()
+    buckets = _buckets[rule]
+    tokens, last = buckets.get(key, (limit, now))
+    tokens = min(limit, tokens + (now - last) * rate)
+    if tokens >= 1:
+        buckets[key] = (tokens - 1, now)
+        return True, 0
+    buckets[key] = (tokens, now)
+    return False, math.ceil((1 - tokens) / rate)
+
+async def _take_shared(db, rule: str, key: str):
+    """Sliding window across workers: (allowed, seconds until the oldest hits age out)"""
+    limit, window = RULES[rule]
+    now = datetime.now(timezone.utc)
+    current = int(now.timestamp()) // window
+    elapsed = now.timestamp() / window - current
+    collection = db[RATE_LIMIT_COLLECTION]
+    doc = await collection.find_one_and_update(
+        {"_id": f"{rule}:{key}:{current}"},
+        {"$inc": {"count": 1}, "$setOnInsert": {"expires_at": now + timedelta(seconds=2 * window)}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    previous = await collection.find_one({"_id": f"{rule}:{key}:{current - 1}"}, {"count": 1})
+    weighted = doc["count"] + (previous["count"] if previous else 0) * (1 - elapsed)
+    if weighted <= limit:
+        return True, 0
+    return False, max(1, math.ceil((1 - elapsed) * window))
+
+async def hit(db, rule: str, key: str):
+    """Count a request against a rule. Returns (allowed, retry_after seconds)."""
+    if RATE_LIMIT_BACKEND == "mongo":
+        try:
+            allowed, retry_after = await _take_shared(db, rule, key)
+        except Exception as e:
+            # Fall back to this worker's buckets rather than failing the request
+            logger.warning(f"Shared rate limit check failed, using local buckets: {e}")
+            allowed, retry_after = _take_token(rule, key)
+    else:
+        allowed, retry_after = _take_token(rule, key)
+    limit_stats["allowed" if allowed else "limited"] += 1
+    return allowed, retry_after
+
+def tracked_keys() -> dict:
+    return {rule: len(buckets) for rule, buckets in _buckets.items()}
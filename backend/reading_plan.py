@@ -1,6 +1,10 @@
 # Bible in a Year Reading Plan
 # 365 days covering all 66 books of the Bible
 
+import calendar
+
+from bible_data import chapter_id, chapter_verse_count, reading_minutes
+
 BIBLE_IN_A_YEAR_PLAN = [
     # January - Genesis & Matthew
     {"day": 1, "readings": [{"book": "Genesis", "chapters": "1-3"}, {"book": "Matthew", "chapters": "1"}], "theme": "Creation & The Genealogy of Jesus"},
@@ -395,13 +399,79 @@ BIBLE_IN_A_YEAR_PLAN = [
 def get_reading_plan():
     return BIBLE_IN_A_YEAR_PLAN
 
-def get_today_reading():
-    from datetime import datetime, timezone
-    day_of_year = datetime.now(timezone.utc).timetuple().tm_yday
-    index = (day_of_year - 1) % len(BIBLE_IN_A_YEAR_PLAN)
-    return BIBLE_IN_A_YEAR_PLAN[index]
+# Feb 29 in a leap year
+LEAP_DAY_OF_YEAR = 60
+
+def plan_day_for_date(date) -> tuple:
+    """(plan day 1-365, is_catch_up) for a calendar date.
+
+    Leap days don't shift the plan: Feb 29 is a catch-up day that keeps
+    Feb 28's reading, and Mar 1 onwards map to the same days as any year.
+    """
+    day_of_year = date.timetuple().tm_yday
+    if calendar.isleap(date.year) and day_of_year >= LEAP_DAY_OF_YEAR:
+        if day_of_year == LEAP_DAY_OF_YEAR:
+            return LEAP_DAY_OF_YEAR - 1, True
+        return day_of_year - 1, False
+    return day_of_year, False
+
+def get_today_reading(date=None):
+    if date is None:
+        from datetime import datetime, timezone
+        date = datetime.now(timezone.utc).date()
+    day, _ = plan_day_for_date(date)
+    return BIBLE_IN_A_YEAR_PLAN[day - 1]
 
 def get_reading_by_day(day: int):
     if 1 <= day <= len(BIBLE_IN_A_YEAR_PLAN):
         return BIBLE_IN_A_YEAR_PLAN[day - 1]
     return None
+
+def parse_chapters(book: str, chapters: str):
+    """Expand a chapters string ("1-3", "4", "119:1-88") into reading segments"""
+    if ":" in chapters:
+        chapter, verses = chapters.split(":")
+        first, _, last = verses.partition("-")
+        first, last = int(first), int(last or first)
+        cid = chapter_id(book, int(chapter))
+        if not 1 <= first <= last <= chapter_verse_count(cid):
+            raise ValueError(f"Invalid verse range: {book} {chapters}")
+        return [{
+            "book": book,
+            "chapter": int(chapter),
+            "chapter_id": cid,
+            "verses": [first, last],
+            "verse_count": last - first + 1,
+        }]
+
+    first, _, last = chapters.partition("-")
+    first, last = int(first), int(last or first)
+    if first > last:
+        raise ValueError(f"Invalid chapter range: {book} {chapters}")
+    segments = []
+    for chapter in range(first, last + 1):
+        cid = chapter_id(book, chapter)
+        segments.append({
+            "book": book,
+            "chapter": chapter,
+            "chapter_id": cid,
+            "verses": None,
+            "verse_count": chapter_verse_count(cid),
+        })
+    return segments
+
+def expand_day(entry: dict) -> dict:
+    """A plan day with its readings expanded into chapter ids, verse counts and minutes"""
+    segments = [
+        segment
+        for reading in entry["readings"]
+        for segment in parse_chapters(reading["book"], reading["chapters"])
+    ]
+    verse_count = sum(segment["verse_count"] for segment in segments)
+    return {
+        **entry,
+        "chapter_ids": list(dict.fromkeys(segment["chapter_id"] for segment in segments)),
+        "segments": segments,
+        "verse_count": verse_count,
+        "reading_minutes": reading_minutes(verse_count),
+    }
@@ -0,0 +1,304 @@
+# Reading-plan progress stored as a packed bitset
+#
+# Each run of a plan is a single document in `reading_plan_progress`, keyed
+# by (user_id, plan_id, plan_start) - plan_start is Jan 1 of the year for the
+# calendar Bible-in-a-Year plan and the user's chosen start date for a
+# generated plan - so this year's progress never collides with last year's.
+# The document holds PROGRESS_WORDS 32-bit words (w0, w1, ...) where bit
+# (day - 1) marks a completed day, plus a `completed_count` kept in step with
+# the bits. Marking and unmarking are one conditional update each
+# ($bitsAllClear / $bitsAllSet guard + $bit + $inc), so a day can never be
+# counted twice and progress, streak and percentage all come from one
+# indexed read. Bulk changes are one update too, compare-and-set on the
+# touched words.
+#
+# Users who still have per-day `reading_progress` documents have them folded
+# into the calendar plan for the year each day was completed in, the first
+# time that year's progress is touched.
+#
+# Every change also feeds the community counters in reading_stats: per-day
+# completion counts, and each run's `longest_streak` with its histogram bucket.
+# recount_stats recounts all of them from the bits.
+
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+import logging
+
+from bson import Int64
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+import reading_stats
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_COLLECTION = "reading_plan_progress"
+DEFAULT_PLAN_ID = "bible-in-a-year"
+
+WORD_BITS = 32
+WORD_MASK = (1 << WORD_BITS) - 1
+PROGRESS_WORDS = 23  # 736 bits, room for the longest generated plan
+MAX_DAY = WORD_BITS * PROGRESS_WORDS
+
+WORD_FIELDS = tuple(f"w{i}" for i in range(PROGRESS_WORDS))
+
+def progress_key(user_id: str, plan_id: str, plan_start) -> dict:
+    return {"user_id": user_id, "plan_id": plan_id, "plan_start": plan_start.isoformat()}
+
+def day_position(day: int):
+    """(word field, bit) holding a day"""
+    word, bit = divmod(day - 1, WORD_BITS)
+    return WORD_FIELDS[word], bit
+
+def pack_days(days) -> dict:
+    """Word fields for a set of completed days"""
+    words = [0] * PROGRESS_WORDS
+    for day in days:
+        word, bit = divmod(day - 1, WORD_BITS)
+        words[word] |= 1 << bit
+    return {field: Int64(value) for field, value in zip(WORD_FIELDS, words)}
+
+def unpack_bits(doc) -> int:
+    """The whole bitset as one int, bit (day - 1) set for each completed day"""
+    bits = 0
+    for i, field in enumerate(WORD_FIELDS):
+        bits |= (int(doc.get(field, 0)) & WORD_MASK) << (i * WORD_BITS)
+    return bits
+
+def completed_days(bits: int) -> list:
+    days = []
+    while bits:
+        low = bits & -bits
+        days.append(low.bit_length())
+        bits ^= low
+    return days
+
+def current_streak(bits: int, today: int) -> int:
+    """Consecutive completed days ending on `today`"""
+    window = (1 << today) - 1
+    gaps = ~bits & window
+    return today - gaps.bit_length()
+
+async def migrate_progress_keys(db):
+    """Key progress from before plan runs existed; runs before the unique index is built"""
+    collection = db[PROGRESS_COLLECTION]
+    # Progress used to be one document per user, for the current year's plan
+    if "user_id_1" in await collection.index_information():
+        await collection.drop_index("user_id_1")
+    async for doc in collection.find({"plan_id": {"$exists": False}}, {"_id": 1, "created_at": 1}):
+        plan_year = int(doc["created_at"][:4])
+        await collection.update_one({"_id": doc["_id"]}, {"$set": {
+            "plan_id": DEFAULT_PLAN_ID,
+            "plan_start": f"{plan_year}-01-01",
+            "plan_year": plan_year,
+            "total_days": 365
+        }})
+
+async def _create_progress(db, key: dict, total_days: int) -> bool:
+    """Create the bitset for a plan run, folding in legacy per-day documents.
+
+    Returns False if it already existed.
+    """
+    collection = db[PROGRESS_COLLECTION]
+    if await collection.find_one(key, {"_id": 1}):
+        return False
+
+    plan_year = int(key["plan_start"][:4])
+    days = set()
+    if key["plan_id"] == DEFAULT_PLAN_ID:
+        legacy = await db.reading_progress.find(
+            {"user_id": key["user_id"], "completed_at": {"$regex": f"^{plan_year}-"}},
+            {"_id": 0, "day": 1}
+        ).to_list(MAX_DAY)
+        days = {doc["day"] for doc in legacy if 1 <= doc.get("day", 0) <= total_days}
+
+    now = datetime.now(timezone.utc).isoformat()
+    doc = {
+        **key,
+        "plan_year": plan_year,
+        "total_days": total_days,
+        **pack_days(days),
+        "completed_count": len(days),
+        "created_at": now,
+        "updated_at": now
+    }
+    try:
+        await collection.insert_one(doc)
+    except DuplicateKeyError:
+        # Created concurrently by another request
+        return False
+    if days:
+        logger.info(f"Migrated {len(days)} {plan_year} reading progress days for {key['user_id']}")
+        await reading_stats.record_days(db, key, days, 1)
+    await _sync_longest_streak(db, key, doc)
+    return True
+
+async def _sync_longest_streak(db, key: dict, doc: dict):
+    """Bring the run's longest_streak (and its histogram bucket) in line with its bits"""
+    collection = db[PROGRESS_COLLECTION]
+    for _ in range(3):
+        new = reading_stats.longest_run(unpack_bits(doc))
+        old = doc.get("longest_streak")
+        if new == old:
+            return
+        # Compare-and-set so concurrent writers move the histogram once each
+        result = await collection.update_one(
+            {**key, "longest_streak": old if old is not None else {"$exists": False}},
+            {"$set": {"longest_streak": new}}
+        )
+        if result.modified_count:
+            await reading_stats.move_streak(db, key, old, new)
+            return
+        doc = await collection.find_one(key)
+        if doc is None:
+            return
+
+async def get_progress(db, key: dict, total_days: int) -> dict:
+    collection = db[PROGRESS_COLLECTION]
+    doc = await collection.find_one(key, {"_id": 0})
+    if doc is None:
+        await _create_progress(db, key, total_days)
+        doc = await collection.find_one(key, {"_id": 0})
+    return doc
+
+async def set_day(db, key: dict, day: int, completed: bool, total_days: int) -> bool:
+    """Mark or unmark a day. Returns False if it was already in that state."""
+    field, bit = day_position(day)
+    mask = 1 << bit
+    if completed:
+        query = {**key, field: {"$bitsAllClear": [bit]}}
+        update = {"$bit": {field: {"or": Int64(mask)}}, "$inc": {"completed_count": 1}}
+    else:
+        query = {**key, field: {"$bitsAllSet": [bit]}}
+        update = {"$bit": {field: {"and": Int64(WORD_MASK ^ mask)}}, "$inc": {"completed_count": -1}}
+    update["$set"] = {"updated_at": datetime.now(timezone.utc).isoformat()}
+
+    collection = db[PROGRESS_COLLECTION]
+    doc = await collection.find_one_and_update(query, update, return_document=ReturnDocument.AFTER)
+    if doc is None:
+        # Either the bit was already in place or this plan run has no bitset yet
+        if not await _create_progress(db, key, total_days):
+            return False
+        doc = await collection.find_one_and_update(query, update, return_document=ReturnDocument.AFTER)
+        if doc is None:
+            return False
+
+    await reading_stats.record_days(db, key, [day], 1 if completed else -1)
+    await _sync_longest_streak(db, key, doc)
+    return True
+
+async def set_days(db, key: dict, days, completed: bool, total_days: int):
+    """Mark or unmark many days at once.
+
+    Reads the touched words, works out which days will flip, then writes the
+    bits and the completed_count change in one update guarded on those words
+    still holding what was read; a concurrent change makes it read again.
+    Returns (changed_days, completed_count).
+    """
+    masks = {}
+    for day in set(days):
+        field, bit = day_position(day)
+        masks[field] = masks.get(field, 0) | (1 << bit)
+
+    collection = db[PROGRESS_COLLECTION]
+    projection = {"_id": 0, "completed_count": 1, **{field: 1 for field in masks}}
+    while True:
+        before = await collection.find_one(key, projection)
+        if before is None:
+            await _create_progress(db, key, total_days)
+            before = await collection.find_one(key, projection)
+
+        changed = 0
+        guard = {}
+        bit_update = {}
+        for i, field in enumerate(WORD_FIELDS):
+            if field not in masks:
+                continue
+            old = int(before.get(field, 0)) & WORD_MASK
+            flipped = masks[field] & (~old if completed else old)
+            if not flipped:
+                continue
+            changed |= flipped << (i * WORD_BITS)
+            guard[field] = before[field] if field in before else {"$exists": False}
+            bit_update[field] = {"or": Int64(flipped)} if completed else {"and": Int64(WORD_MASK ^ flipped)}
+        changed_days = completed_days(changed)
+        if not changed_days:
+            return [], before["completed_count"]
+
+        delta = len(changed_days) if completed else -len(changed_days)
+        after = await collection.find_one_and_update(
+            {**key, **guard},
+            {
+                "$bit": bit_update,
+                "$inc": {"completed_count": delta},
+                "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}
+            },
+            return_document=ReturnDocument.AFTER
+        )
+        if after is not None:
+            break
+
+    await reading_stats.record_days(db, key, changed_days, 1 if completed else -1)
+    await _sync_longest_streak(db, key, after)
+    return changed_days, after["completed_count"]
+
+async def recount_stats(db) -> int:
+    """Recount the community counters and each run's longest_streak from the bits.
+
+    Fills them in for runs from before they were kept and corrects any drift.
+    The counters move by the difference from a snapshot taken first, so a
+    change made during the scan still counts; one that lands between the
+    snapshot and the scan of its run may be counted twice until the next
+    recount. Returns how many runs were counted.
+    """
+    before = await reading_stats.snapshot_counts(db)
+    completions = Counter()
+    streaks = defaultdict(Counter)
+    fixes = []
+    runs = 0
+    projection = {"_id": 1, "plan_id": 1, "plan_start": 1, "longest_streak": 1, **{field: 1 for field in WORD_FIELDS}}
+    async for doc in db[PROGRESS_COLLECTION].find({}, projection):
+        bits = unpack_bits(doc)
+        plan_year = reading_stats.plan_year_of(doc)
+        for day in completed_days(bits):
+            completions[(doc["plan_id"], plan_year, day)] += 1
+        longest = reading_stats.longest_run(bits)
+        streaks[(doc["plan_id"], plan_year)][longest] += 1
+        if doc.get("longest_streak") != longest:
+            fixes.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"longest_streak": longest}}))
+        runs += 1
+    if fixes:
+        await db[PROGRESS_COLLECTION].bulk_write(fixes, ordered=False)
+    await reading_stats.apply_recount(db, before, completions, streaks)
+    return runs
+
+async def get_history(db, user_id: str) -> list:
+    """Completion summary per plan year, newest first"""
+    pipeline = [
+        {"$match": {"user_id": user_id}},
+        {"$sort": {"plan_start": 1}},
+        {"$group": {
+            "_id": "$plan_year",
+            "completed_days": {"$sum": "$completed_count"},
+            "total_days": {"$sum": "$total_days"},
+            "plans": {"$push": {
+                "plan_id": "$plan_id",
+                "plan_start": "$plan_start",
+                "completed_days": "$completed_count",
+                "total_days": "$total_days",
+                "last_activity": "$updated_at"
+            }}
+        }},
+        {"$sort": {"_id": -1}},
+        {"$project": {
+            "_id": 0,
+            "year": "$_id",
+            "completed_days": 1,
+            "total_days": 1,
+            "progress_percentage": {
+                "$round": [{"$multiply": [{"$divide": ["$completed_days", "$total_days"]}, 100]}, 1]
+            },
+            "plans": 1
+        }}
+    ]
+    return await db[PROGRESS_COLLECTION].aggregate(pipeline).to_list(100)
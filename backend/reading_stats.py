@@ -0,0 +1,138 @@
+# Community reading statistics
+#
+# Counters are kept up to date as progress changes (see reading_progress), so
+# serving them never scans anyone's progress:
+#
+#   reading_day_stats     one document per (plan_id, plan_year, day) counting
+#                         the readers who have completed that day
+#   reading_streak_stats  one document per (plan_id, plan_year) with the
+#                         number of readers and a histogram of their longest
+#                         streaks, from which percentile ranks are read off
+#
+# A plan run belongs to the year its plan_start falls in. Runs from before the
+# counters existed, and any drift from a write that failed halfway, are
+# picked up by reading_progress.recount_stats, which recounts them from the
+# progress bits at startup and once a day.
+
+from pymongo import UpdateOne, DESCENDING
+
+DAY_STATS_COLLECTION = "reading_day_stats"
+STREAK_STATS_COLLECTION = "reading_streak_stats"
+
+def longest_run(bits: int) -> int:
+    """Length of the longest run of set bits"""
+    length = 0
+    while bits:
+        bits &= bits << 1
+        length += 1
+    return length
+
+def plan_year_of(key: dict) -> int:
+    return int(key["plan_start"][:4])
+
+def _streak_doc_id(plan_id: str, plan_year: int) -> str:
+    return f"{plan_id}:{plan_year}"
+
+async def record_days(db, key: dict, days, delta: int):
+    """Move the completion counter of each day by delta (+1 marked, -1 unmarked)"""
+    if not days:
+        return
+    plan_year = plan_year_of(key)
+    await db[DAY_STATS_COLLECTION].bulk_write([
+        UpdateOne(
+            {"plan_id": key["plan_id"], "plan_year": plan_year, "day": day},
+            {"$inc": {"completions": delta}},
+            upsert=True
+        )
+        for day in days
+    ], ordered=False)
+
+async def move_streak(db, key: dict, old, new: int):
+    """Move a reader between longest-streak buckets; old is None for a new reader"""
+    inc = {f"counts.{new}": 1}
+    if old is None:
+        inc["readers"] = 1
+    else:
+        inc[f"counts.{old}"] = -1
+    await db[STREAK_STATS_COLLECTION].update_one(
+        {"_id": _streak_doc_id(key["plan_id"], plan_year_of(key))},
+        {"$inc": inc},
+        upsert=True
+    )
+
+async def snapshot_counts(db):
+    """The counters as they stand, in the shape apply_recount takes"""
+    completions = {}
+    async for doc in db[DAY_STATS_COLLECTION].find({}, {"_id": 0, "plan_id": 1, "plan_year": 1, "day": 1, "completions": 1}):
+        completions[(doc["plan_id"], doc["plan_year"], doc["day"])] = doc.get("completions", 0)
+    streaks = {}
+    async for doc in db[STREAK_STATS_COLLECTION].find({}):
+        plan_id, plan_year = doc["_id"].rsplit(":", 1)
+        streaks[(plan_id, int(plan_year))] = {int(length): count for length, count in doc.get("counts", {}).items()}
+    return completions, streaks
+
+async def apply_recount(db, before, completions: dict, streaks: dict):
+    """Move the counters from the `before` snapshot to recounted values.
+
+    completions maps (plan_id, plan_year, day) to a count, streaks maps
+    (plan_id, plan_year) to {longest streak: readers}. The counters move by
+    $inc of the difference, so changes made since the snapshot are kept.
+    """
+    before_completions, before_streaks = before
+    day_updates = []
+    for day_key in completions.keys() | before_completions.keys():
+        delta = completions.get(day_key, 0) - before_completions.get(day_key, 0)
+        if delta:
+            plan_id, plan_year, day = day_key
+            day_updates.append(UpdateOne(
+                {"plan_id": plan_id, "plan_year": plan_year, "day": day},
+                {"$inc": {"completions": delta}},
+                upsert=True
+            ))
+    if day_updates:
+        await db[DAY_STATS_COLLECTION].bulk_write(day_updates, ordered=False)
+
+    streak_updates = []
+    for (plan_id, plan_year) in streaks.keys() | before_streaks.keys():
+        new, old = streaks.get((plan_id, plan_year), {}), before_streaks.get((plan_id, plan_year), {})
+        inc = {
+            f"counts.{length}": new.get(length, 0) - old.get(length, 0)
+            for length in new.keys() | old.keys()
+            if new.get(length, 0) != old.get(length, 0)
+        }
+        readers = sum(new.values()) - sum(old.values())
+        if readers:
+            inc["readers"] = readers
+        if inc:
+            streak_updates.append(UpdateOne(
+                {"_id": _streak_doc_id(plan_id, plan_year)}, {"$inc": inc}, upsert=True
+            ))
+    if streak_updates:
+        await db[STREAK_STATS_COLLECTION].bulk_write(streak_updates, ordered=False)
+
+async def get_day_stats(db, plan_id: str, plan_year: int, day: int, popular: int = 5) -> dict:
+    day_stats = db[DAY_STATS_COLLECTION]
+    doc = await day_stats.find_one(
+        {"plan_id": plan_id, "plan_year": plan_year, "day": day},
+        {"_id": 0, "completions": 1}
+    )
+    popular_days = await day_stats.find(
+        {"plan_id": plan_id, "plan_year": plan_year, "completions": {"$gt": 0}},
+        {"_id": 0, "day": 1, "completions": 1}
+    ).sort("completions", DESCENDING).limit(popular).to_list(popular)
+    streaks = await db[STREAK_STATS_COLLECTION].find_one(
+        {"_id": _streak_doc_id(plan_id, plan_year)}
+    ) or {}
+    return {
+        "completions": doc["completions"] if doc else 0,
+        "readers": streaks.get("readers", 0),
+        "popular_days": popular_days,
+        "streak_counts": {int(k): v for k, v in streaks.get("counts", {}).items() if v > 0},
+    }
+
+def streak_percentile(streak_counts: dict, readers: int, streak: int) -> float:
+    """Share of readers whose longest streak is shorter than `streak`"""
+    if not readers:
+        return 0.0
+    below = sum(count for length, count in streak_counts.items() if length < streak)
+    return round(below / readers * 100, 1)
@@ -0,0 +1,160 @@
+# Scripture references as verse-id ranges
+#
+# A verse id is chapter_id * 1000 + verse, with chapter_id the global chapter
+# number from bible_data (Genesis 1 = 1 ... Revelation 22 = 1189). Ids run in
+# canonical order, so "Romans 8", "Romans 8:28-39" or "Romans 8-9" are each
+# one contiguous (start, end) range, and a passage matches a reference when
+# their ranges overlap.
+#
+# Forum posts store the ranges of their scripture_ref, plus the chapter ids
+# those ranges touch. "Posts on Romans 8" is then an indexed lookup on the
+# chapter ids, narrowed by the verse overlap.
+
+import re
+
+from bible_data import BIBLE_BOOKS, CHAPTER_VERSES, chapter_id
+
+VERSES_PER_CHAPTER_ID = 1000
+MAX_REFERENCE_LENGTH = 200
+
+def _book_key(name: str) -> str:
+    return re.sub(r"[\s.]", "", name.lower())
+
+_BOOK_KEYS = {_book_key(book["name"]): book["name"] for book in BIBLE_BOOKS}
+
+# Abbreviations that are not a unique prefix of the book name
+BOOK_ALIASES = {
+    "ps": "Psalms", "psa": "Psalms", "psalm": "Psalms",
+    "song": "Song of Solomon", "songofsongs": "Song of Solomon", "sos": "Song of Solomon",
+    "judg": "Judges", "jdg": "Judges",
+    "jn": "John", "mt": "Matthew", "mk": "Mark", "lk": "Luke", "jas": "James",
+    "phil": "Philippians", "php": "Philippians", "phlm": "Philemon", "philem": "Philemon",
+    "revelations": "Revelation",
+}
+
+# Book words are letters split by runs of spaces or dots, so the spaces before
+# the chapter can only be matched one way and long inputs stay linear
+_REF_PATTERN = re.compile(
+    r"^(?P<book>(?:[1-3]\s*)?[a-z]+(?:[ .]+[a-z]+)*\.?)\s*"
+    r"(?:(?P<c1>\d+)(?::(?P<v1>\d+))?(?:\s*[-–]\s*(?:(?P<c2>\d+):)?(?P<v2>\d+))?)?$",
+    re.IGNORECASE
+)
+
+_NUMBERS_ONLY = re.compile(r"^\d+(?::\d+)?(?:\s*[-–]\s*\d+(?::\d+)?)?$")
+
+def find_book(name: str):
+    """Canonical book name for a name or abbreviation, or None"""
+    key = _book_key(name)
+    if not key:
+        return None
+    if key in _BOOK_KEYS:
+        return _BOOK_KEYS[key]
+    if key in BOOK_ALIASES:
+        return BOOK_ALIASES[key]
+    matches = {book for book_key, book in _BOOK_KEYS.items() if book_key.startswith(key)}
+    return matches.pop() if len(matches) == 1 else None
+
+def verse_id(book: str, chapter: int, verse: int) -> int:
+    return chapter_id(book, chapter) * VERSES_PER_CHAPTER_ID + verse
+
+def _last_verse(book: str, chapter: int) -> int:
+    return CHAPTER_VERSES[book][chapter - 1]
+
+def _range(book: str, c1, v1, c2, v2):
+    """(start, end) verse ids for one parsed reference, or None if it is out of bounds"""
+    chapters = len(CHAPTER_VERSES[book])
+    if c1 is None:
+        c1, v1, c2, v2 = 1, 1, chapters, _last_verse(book, chapters)
+    elif v1 is None and chapters == 1 and c2 is None:
+        # "Jude 5" is verse 5 of a one-chapter book
+        c1, v1, c2 = 1, c1, 1
+        v2 = v2 if v2 is not None else v1
+    elif v1 is None:
+        # "Romans 8" or "Romans 8-9"
+        c2 = c2 if c2 is not None else (v2 if v2 is not None else c1)
+        v1 = 1
+        v2 = _last_verse(book, c2) if 1 <= c2 <= chapters else None
+    else:
+        c2 = c2 if c2 is not None else c1
+        v2 = v2 if v2 is not None else v1
+    if not (1 <= c1 <= c2 <= chapters) or v2 is None:
+        return None
+    if not (1 <= v1 <= _last_verse(book, c1) and 1 <= v2 <= _last_verse(book, c2)):
+        return None
+    start, end = verse_id(book, c1, v1), verse_id(book, c2, v2)
+    return (start, end) if start <= end else None
+
+def parse_reference(text: str) -> list:
+    """Verse-id ranges for a reference such as "Romans 8:28-39; John 3:16, 18".
+
+    Parts are separated by ";" or ","; a part that is only numbers carries on
+    from the previous book (and chapter, if that part named a verse).
+    Parts that cannot be read are skipped.
+    """
+    ranges = []
+    book = chapter = None
+    for part in re.split(r"[;,]", text or ""):
+        part = part.strip()
+        if not part:
+            continue
+        if book and _NUMBERS_ONLY.match(part):
+            # Continuation of the previous part: "18" or "4:1-3"
+            part = f"{book} {chapter}:{part}" if chapter and ":" not in part else f"{book} {part}"
+        match = _REF_PATTERN.match(part)
+        if not match:
+            continue
+        found = find_book(match["book"])
+        if not found:
+            continue
+        book = found
+        c1, v1, c2, v2 = (int(match[g]) if match[g] else None for g in ("c1", "v1", "c2", "v2"))
+        # "Rom 8:28-9:5, 10" carries on in chapter 9
+        chapter = (c2 or c1) if v1 is not None else None
+        verse_range = _range(book, c1, v1, c2, v2)
+        if verse_range:
+            ranges.append(verse_range)
+    return ranges
+
+def range_chapters(ranges) -> list:
+    """Sorted chapter ids the ranges touch"""
+    return sorted({
+        number
+        for start, end in ranges
+        for number in range(start // VERSES_PER_CHAPTER_ID, end // VERSES_PER_CHAPTER_ID + 1)
+    })
+
+def reference_fields(text: str) -> dict:
+    """Fields stored on a post so it can be found by the passage it is about"""
+    ranges = parse_reference(text)
+    return {
+        "scripture_ranges": [{"start": start, "end": end} for start, end in ranges],
+        "scripture_chapters": range_chapters(ranges),
+    }
+
+def overlap_filter(ranges) -> dict:
+    """Query for posts whose reference overlaps any of the ranges"""
+    clauses = [
+        {
+            "scripture_chapters": {"$elemMatch": {
+                "$gte": start // VERSES_PER_CHAPTER_ID,
+                "$lte": end // VERSES_PER_CHAPTER_ID
+            }},
+            "scripture_ranges": {"$elemMatch": {"start": {"$lte": end}, "end": {"$gte": start}}},
+        }
+        for start, end in ranges
+    ]
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+async def backfill_posts(db) -> int:
+    """Parse the references of posts written before they were indexed"""
+    count = 0
+    async for post in db.forum_posts.find(
+        {"scripture_ranges": {"$exists": False}},
+        {"_id": 0, "post_id": 1, "scripture_ref": 1}
+    ):
+        await db.forum_posts.update_one(
+            {"post_id": post["post_id"]},
+            {"$set": reference_fields(post.get("scripture_ref") or "")}
+        )
+        count += 1
+    return count
@@ -1,30 +1,63 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, Request, Response
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request, Response
 from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import uuid
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 import jwt
 import bcrypt
 import httpx
 import json
+import asyncio
+import hashlib
+import hmac
+import math
+import secrets
+import statistics
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 from pywebpush import webpush, WebPushException
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+import chapter_coverage
+import content_store
+import db_indexes
+import forum_ranking
+import forum_votes
+import idempotency
+import job_lock
+import mongo_pool
+import pagination
+import plan_engine
+import rate_limit
+import reading_progress
+import reading_stats
+import scripture_refs
+import token_revocation
+from reading_plan import expand_day, plan_day_for_date
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, **mongo_pool.client_options())
 db = client[os.environ['DB_NAME']]
+# Lag-tolerant reads (forum listing, news, community stats); see mongo_pool
+READ_PREFERENCE = mongo_pool.read_preference()
+read_db = client.get_database(os.environ['DB_NAME'], read_preference=READ_PREFERENCE)
 
 # Environment variables
 EMERGENT_LLM_KEY = os.environ.get('EMERGENT_LLM_KEY')
@@ -34,6 +67,20 @@ JWT_SECRET = os.environ.get('JWT_SECRET', 'default_secret')
 VAPID_PRIVATE_KEY = os.environ.get('VAPID_PRIVATE_KEY')
 VAPID_PUBLIC_KEY = os.environ.get('VAPID_PUBLIC_KEY')
 VAPID_EMAIL = os.environ.get('VAPID_EMAIL', 'mailto:admin@holynavigator.com')
+ADMIN_API_KEY = os.environ.get('ADMIN_API_KEY')
+TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', '1'))  # proxies that append X-Forwarded-For
+CONTENT_POLL_SECONDS = int(os.environ.get('CONTENT_POLL_SECONDS', '30'))
+REVOCATION_SYNC_SECONDS = int(os.environ.get('REVOCATION_SYNC_SECONDS', '10'))
+FORUM_RANKING_REFRESH_SECONDS = int(os.environ.get('FORUM_RANKING_REFRESH_SECONDS', '600'))
+READING_STATS_RECOUNT_LOCK_SECONDS = 3600  # one worker recounts per hour at most
+FORUM_VOTE_RECOUNT_LOCK_SECONDS = 3600
+USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', '30'))
+ACCESS_TOKEN_MINUTES = int(os.environ.get('ACCESS_TOKEN_MINUTES', '15'))
+REFRESH_TOKEN_DAYS = int(os.environ.get('REFRESH_TOKEN_DAYS', '30'))
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', '32'))
+PASSWORD_HASH_TARGET_MS = int(os.environ.get('PASSWORD_HASH_TARGET_MS', '250'))
+PASSWORD_HASH_COST = os.environ.get('PASSWORD_HASH_COST')  # fixes the cost, skipping calibration
 
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
@@ -94,7 +141,7 @@ class JournalResponse(BaseModel):
 class ForumPostCreate(BaseModel):
     title: str
     content: str
-    scripture_ref: Optional[str] = None
+    scripture_ref: Optional[str] = Field(None, max_length=scripture_refs.MAX_REFERENCE_LENGTH)
     tags: Optional[List[str]] = []
 
 class ForumPostResponse(BaseModel):
@@ -146,6 +193,32 @@ class UserProfileUpdate(BaseModel):
     notification_push: Optional[bool] = None
     preferred_translation: Optional[str] = None
     theme_preference: Optional[str] = None
+    timezone: Optional[str] = None  # IANA name, e.g. "America/Los_Angeles"
+
+class DevotionalUpdate(BaseModel):
+    title: Optional[str] = None
+    scripture: Optional[str] = None
+    verse_text: Optional[str] = None
+    reflection: Optional[str] = None
+    prayer: Optional[str] = None
+
+class ReadingPlanDayUpdate(BaseModel):
+    readings: Optional[List[Dict[str, str]]] = None
+    theme: Optional[str] = None
+
+class ReadingProgressBulk(BaseModel):
+    days: List[int] = []
+    ranges: List[List[int]] = []
+    completed: bool = True
+    plan_id: Optional[str] = None
+    start_date: Optional[str] = None
+    year: Optional[int] = Field(None, ge=1, le=9999)
+
+class ReadingPlanCreate(BaseModel):
+    template: str = "custom"
+    days: Optional[int] = None
+    books: Optional[List[str]] = None
+    start_date: Optional[str] = None
 
 class SearchRequest(BaseModel):
     query: str
@@ -153,29 +226,211 @@ class SearchRequest(BaseModel):
 
 # ==================== AUTH HELPERS ====================
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+# The bcrypt cost is calibrated at startup so one hash takes about
+# PASSWORD_HASH_TARGET_MS on this hardware, but never below the old fixed
+# cost of DEFAULT_PASSWORD_COST. Each user's cost is stored next to their
+# hash, and a successful login with a lower cost rehashes the password in
+# the background. Hashes are never rehashed downwards, so workers that
+# calibrate differently cannot undo each other's upgrades.
+MIN_PASSWORD_COST = 10
+DEFAULT_PASSWORD_COST = 12
+MAX_PASSWORD_COST = 15
+CALIBRATION_SAMPLES = 5
+password_cost = int(PASSWORD_HASH_COST) if PASSWORD_HASH_COST else DEFAULT_PASSWORD_COST
+
+def hash_password(password: str, cost: Optional[int] = None) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=cost or password_cost)).decode()
 
 def verify_password(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode(), hashed.encode())
 
-def create_token(user_id: str) -> str:
+def hash_cost(hashed: str) -> int:
+    """Cost factor of a bcrypt hash ("$2b$12$...")"""
+    return int(hashed.split("$")[2])
+
+def measure_password_cost(target_ms: int) -> int:
+    """Cost whose hash takes closest to target_ms; each step up doubles the time.
+
+    Uses the median of a few timings so one slow or fast sample cannot move it.
+    """
+    timings = []
+    for _ in range(CALIBRATION_SAMPLES):
+        start = time.perf_counter()
+        hash_password("calibration", MIN_PASSWORD_COST)
+        timings.append((time.perf_counter() - start) * 1000)
+    cost = MIN_PASSWORD_COST + round(math.log2(target_ms / max(statistics.median(timings), 1)))
+    return min(max(cost, DEFAULT_PASSWORD_COST), MAX_PASSWORD_COST)
+
+# bcrypt takes a few hundred milliseconds of CPU per call, so it runs on its
+# own small pool instead of the event loop. Past PASSWORD_HASH_MAX_PENDING
+# queued or running jobs, new logins are turned away with a 503 rather than
+# piling up behind a login storm.
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+password_job_stats = {"pending": 0, "peak_pending": 0, "completed": 0, "rejected": 0}
+
+async def run_password_job(func, *args):
+    """Run a bcrypt call on the password pool"""
+    if password_job_stats["pending"] >= PASSWORD_HASH_MAX_PENDING:
+        password_job_stats["rejected"] += 1
+        logger.warning(f"Password hashing queue full ({PASSWORD_HASH_MAX_PENDING} pending), rejecting request")
+        raise HTTPException(
+            status_code=503,
+            detail="Too many sign-in attempts right now, please try again",
+            headers={"Retry-After": "1"}
+        )
+    password_job_stats["pending"] += 1
+    password_job_stats["peak_pending"] = max(password_job_stats["peak_pending"], password_job_stats["pending"])
+    try:
+        return await asyncio.get_running_loop().run_in_executor(password_executor, func, *args)
+    finally:
+        password_job_stats["pending"] -= 1
+        password_job_stats["completed"] += 1
+
+async def calibrate_password_cost():
+    global password_cost
+    if PASSWORD_HASH_COST:
+        logger.info(f"Password hash cost fixed at {password_cost}")
+        return
+    password_cost = await asyncio.get_running_loop().run_in_executor(
+        password_executor, measure_password_cost, PASSWORD_HASH_TARGET_MS
+    )
+    logger.info(f"Password hash cost calibrated to {password_cost} for a {PASSWORD_HASH_TARGET_MS} ms target")
+
+rehash_tasks = set()
+
+async def rehash_password(user_id: str, password: str, old_hash: str):
+    """Re-hash a password at the current cost, unless it changed meanwhile"""
+    try:
+        new_hash = await run_password_job(hash_password, password)
+    except HTTPException:
+        return  # Pool is busy; try again at the next login
+    result = await db.users.update_one(
+        {"user_id": user_id, "password": old_hash},
+        {"$set": {"password": new_hash, "password_cost": hash_cost(new_hash)}}
+    )
+    if result.modified_count:
+        invalidate_user(user_id)
+        logger.info(f"Rehashed password for {user_id} from cost {hash_cost(old_hash)} to {hash_cost(new_hash)}")
+
+def schedule_rehash(user_id: str, password: str, old_hash: str):
+    task = asyncio.create_task(rehash_password(user_id, password, old_hash))
+    rehash_tasks.add(task)
+    task.add_done_callback(rehash_tasks.discard)
+
+# Access tokens live for ACCESS_TOKEN_MINUTES and carry the user fields most
+# handlers need, including is_premium, so authorizing a request reads nothing
+# from Mongo. `ver` is the user's token_version when the token was issued;
+# changes to the user bump it and publish the new version through
+# token_revocation, and a token below it is answered from the user record
+# instead of its claims. Each login opens a session holding the hash of
+# a refresh token that is swapped on every /auth/refresh. Logging out deletes
+# the session, so it ends once the current access token expires.
+TOKEN_USER_FIELDS = ("user_id", "email", "name", "picture", "is_premium")
+REFRESH_REUSE_GRACE_SECONDS = 30
+
+def create_token(user: dict, session_id: str) -> str:
     payload = {
-        "user_id": user_id,
-        "exp": datetime.now(timezone.utc) + timedelta(days=7)
+        "typ": "access",
+        "jti": uuid.uuid4().hex,
+        "sid": session_id,
+        **{field: user.get(field) for field in TOKEN_USER_FIELDS},
+        "is_premium": user.get("is_premium", False),
+        "ver": user.get("token_version", 0),
+        "exp": datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_MINUTES)
     }
     return jwt.encode(payload, JWT_SECRET, algorithm="HS256")
 
-async def get_current_user(request: Request) -> dict:
+def token_id(payload: dict, token: str) -> str:
+    """jti of a token; tokens issued before jti existed are identified by their hash"""
+    return payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+
+def hash_refresh_secret(secret: str) -> str:
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+def set_session_cookies(response: Response, access_token: str, refresh_token: str) -> dict:
+    response.set_cookie(
+        key="session_token",
+        value=access_token,
+        httponly=True,
+        secure=True,
+        samesite="none",
+        path="/",
+        max_age=ACCESS_TOKEN_MINUTES*60
+    )
+    response.set_cookie(
+        key="refresh_token",
+        value=refresh_token,
+        httponly=True,
+        secure=True,
+        samesite="none",
+        path="/api/auth",
+        max_age=REFRESH_TOKEN_DAYS*24*60*60
+    )
+    return {"token": access_token, "refresh_token": refresh_token}
+
+async def start_session(user: dict, response: Response) -> dict:
+    """Open a refresh session for a user who just signed in and set both cookies"""
+    session_id = f"sess_{uuid.uuid4().hex}"
+    secret = secrets.token_urlsafe(32)
+    now = datetime.now(timezone.utc)
+    await db.sessions.insert_one({
+        "session_id": session_id,
+        "user_id": user["user_id"],
+        "refresh_hash": hash_refresh_secret(secret),
+        "created_at": now.isoformat(),
+        "last_used_at": now.isoformat(),
+        "expires_at": now + timedelta(days=REFRESH_TOKEN_DAYS)  # a Date, for the TTL index
+    })
+    return set_session_cookies(response, create_token(user, session_id), f"{session_id}.{secret}")
+
+# User records by user_id, so authenticated requests skip the users lookup.
+# Writes to a user invalidate their entry on this worker; other workers see
+# the change once their entry expires (USER_CACHE_TTL seconds, 0 disables).
+user_cache = TTLCache(maxsize=10000, ttl=max(USER_CACHE_TTL, 1))
+user_cache_stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+def invalidate_user(user_id: str):
+    if user_cache.pop(user_id, None) is not None:
+        user_cache_stats["invalidations"] += 1
+
+async def reload_user(user_id: str):
+    """Re-cache a user after a change and stop trusting the claims of their older tokens everywhere"""
+    invalidate_user(user_id)
+    user = await load_user(user_id)
+    if user:
+        await token_revocation.raise_min_version(
+            db, user_id, user.get("token_version", 0),
+            datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_MINUTES)
+        )
+
+async def load_user(user_id: str, min_version: int = 0) -> Optional[dict]:
+    """User record, from the cache when fresh and at least min_version"""
+    user = user_cache.get(user_id) if USER_CACHE_TTL > 0 else None
+    if user is not None and user.get("token_version", 0) >= min_version:
+        user_cache_stats["hits"] += 1
+        return dict(user)
+    user_cache_stats["misses"] += 1
+    user = await db.users.find_one({"user_id": user_id}, {"_id": 0})
+    if user and USER_CACHE_TTL > 0:
+        user_cache[user_id] = user
+        return dict(user)
+    return user
+
+def get_request_token(request: Request) -> Optional[str]:
     # Check cookie first
     token = request.cookies.get("session_token")
-    
+
     # Then check Authorization header
     if not token:
         auth_header = request.headers.get("Authorization")
         if auth_header and auth_header.startswith("Bearer "):
             token = auth_header.split(" ")[1]
-    
+
+    return token
+
+async def get_current_user(request: Request) -> dict:
+    token = get_request_token(request)
+
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
@@ -183,7 +438,21 @@ async def get_current_user(request: Request) -> dict:
         payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
         user_id = payload.get("user_id")
         
-        user = await db.users.find_one({"user_id": user_id}, {"_id": 0})
+        if await token_revocation.is_revoked(db, token_id(payload, token)):
+            raise HTTPException(status_code=401, detail="Token revoked")
+        
+        if payload.get("typ") == "access":
+            # The user changed since this token was issued: its claims are stale
+            min_version = token_revocation.min_version(user_id)
+            if payload.get("ver", 0) < min_version:
+                user = await load_user(user_id, min_version)
+                if not user:
+                    raise HTTPException(status_code=401, detail="User not found")
+                return user
+            return {field: payload.get(field) for field in TOKEN_USER_FIELDS}
+        
+        # Tokens issued before sessions carry only the user_id
+        user = await load_user(user_id)
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
         return user
@@ -198,50 +467,78 @@ async def get_premium_user(request: Request) -> dict:
         raise HTTPException(status_code=403, detail="Premium subscription required")
     return user
 
+def client_ip(request: Request) -> str:
+    # Each trusted proxy appends the address it got the request from, so the
+    # client is TRUSTED_PROXY_COUNT hops from the right; anything further
+    # left was sent by the client and cannot be trusted
+    hops = [hop.strip() for hop in request.headers.get("X-Forwarded-For", "").split(",") if hop.strip()]
+    if TRUSTED_PROXY_COUNT > 0 and len(hops) >= TRUSTED_PROXY_COUNT:
+        return hops[-TRUSTED_PROXY_COUNT]
+    return request.client.host if request.client else "unknown"
+
+async def enforce_rate_limit(rule: str, key: str):
+    allowed, retry_after = await rate_limit.hit(db, rule, key)
+    if not allowed:
+        logger.info(f"Rate limit {rule} hit for {key}")
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests, please slow down",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+def require_admin(request: Request):
+    provided = request.headers.get("X-Admin-Key", "")
+    if not ADMIN_API_KEY or not hmac.compare_digest(provided.encode(), ADMIN_API_KEY.encode()):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+async def sync_revoked_tokens():
+    """Pull revocations made on other workers into this worker's filter"""
+    try:
+        await token_revocation.sync(db)
+    except Exception as e:
+        logger.warning(f"Revoked token sync failed: {e}")
+
 # ==================== AUTH ENDPOINTS ====================
 
 @api_router.post("/auth/register")
-async def register(user_data: UserCreate, response: Response):
+async def register(user_data: UserCreate, request: Request, response: Response):
+    await enforce_rate_limit("register", client_ip(request))
     existing = await db.users.find_one({"email": user_data.email})
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     user_id = f"user_{uuid.uuid4().hex[:12]}"
-    hashed_pw = hash_password(user_data.password)
+    hashed_pw = await run_password_job(hash_password, user_data.password)
     
     user_doc = {
         "user_id": user_id,
         "email": user_data.email,
         "name": user_data.name,
         "password": hashed_pw,
+        "password_cost": hash_cost(hashed_pw),
         "picture": None,
         "is_premium": False,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
     await db.users.insert_one(user_doc)
-    
-    token = create_token(user_id)
-    response.set_cookie(
-        key="session_token",
-        value=token,
-        httponly=True,
-        secure=True,
-        samesite="none",
-        path="/",
-        max_age=7*24*60*60
-    )
+    await db.user_stats.insert_one({"user_id": user_id, **{field: 0 for field in USER_STAT_FIELDS}})
+    tokens = await start_session(user_doc, response)
     
     return {
         "user_id": user_id,
         "email": user_data.email,
         "name": user_data.name,
         "is_premium": False,
-        "token": token
+        **tokens
     }
 
 @api_router.post("/auth/login")
-async def login(user_data: UserLogin, response: Response):
+async def login(user_data: UserLogin, request: Request, response: Response):
+    ip = client_ip(request)
+    await enforce_rate_limit("login", ip)
+    # Per account from each address, so guessing from one address cannot lock the owner out everywhere
+    await enforce_rate_limit("login_account", f"{ip}:{user_data.email.lower()}")
     user = await db.users.find_one({"email": user_data.email}, {"_id": 0})
     if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
@@ -250,26 +547,19 @@ async def login(user_data: UserLogin, response: Response):
     if not user.get("password"):
         raise HTTPException(status_code=401, detail="Please sign in with Google")
     
-    if not verify_password(user_data.password, user["password"]):
+    if not await run_password_job(verify_password, user_data.password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if user.get("password_cost", hash_cost(user["password"])) < password_cost:
+        schedule_rehash(user["user_id"], user_data.password, user["password"])
     
-    token = create_token(user["user_id"])
-    response.set_cookie(
-        key="session_token",
-        value=token,
-        httponly=True,
-        secure=True,
-        samesite="none",
-        path="/",
-        max_age=7*24*60*60
-    )
+    tokens = await start_session(user, response)
     
     return {
         "user_id": user["user_id"],
         "email": user["email"],
         "name": user["name"],
         "is_premium": user.get("is_premium", False),
-        "token": token
+        **tokens
     }
 
 @api_router.get("/auth/me")
@@ -283,9 +573,83 @@ async def get_me(request: Request):
         "is_premium": user.get("is_premium", False)
     }
 
+async def read_refresh_token(request: Request) -> Optional[str]:
+    """Refresh token from the JSON body, else from the cookie"""
+    body = {}
+    if await request.body():
+        try:
+            body = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Request body must be JSON")
+        if not isinstance(body, dict):
+            raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+    refresh_token = body.get("refresh_token")
+    if refresh_token is not None and not isinstance(refresh_token, str):
+        raise HTTPException(status_code=400, detail="refresh_token must be a string")
+    return refresh_token or request.cookies.get("refresh_token")
+
+@api_router.post("/auth/refresh")
+async def refresh_session(request: Request, response: Response):
+    """Swap a refresh token for a new access token and a new refresh token"""
+    refresh_token = await read_refresh_token(request)
+    if not refresh_token or "." not in refresh_token:
+        raise HTTPException(status_code=401, detail="Refresh token required")
+    session_id, secret = refresh_token.split(".", 1)
+    
+    now = datetime.now(timezone.utc)
+    new_secret = secrets.token_urlsafe(32)
+    session = await db.sessions.find_one_and_update(
+        {"session_id": session_id, "refresh_hash": hash_refresh_secret(secret), "expires_at": {"$gt": now}},
+        {"$set": {
+            "refresh_hash": hash_refresh_secret(new_secret),
+            "previous_hash": hash_refresh_secret(secret),
+            "last_used_at": now.isoformat(),
+            "expires_at": now + timedelta(days=REFRESH_TOKEN_DAYS)
+        }}
+    )
+    if not session:
+        stale = await db.sessions.find_one({"session_id": session_id, "previous_hash": hash_refresh_secret(secret)})
+        rotated_at = datetime.fromisoformat(stale["last_used_at"]) if stale else None
+        if stale and (now - rotated_at).total_seconds() > REFRESH_REUSE_GRACE_SECONDS:
+            # An old refresh token came back well after it was swapped: assume it leaked
+            await db.sessions.delete_one({"session_id": session_id})
+            logger.warning(f"Refresh token reuse for session {session_id}, session revoked")
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    
+    user = await db.users.find_one({"user_id": session["user_id"]}, {"_id": 0})
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    return set_session_cookies(response, create_token(user, session_id), f"{session_id}.{new_secret}")
+
 @api_router.post("/auth/logout")
-async def logout(response: Response):
+async def logout(request: Request, response: Response):
+    # Revoke the access token itself, then end its session so it can no longer be refreshed
+    token = get_request_token(request)
+    if token:
+        try:
+            payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+            await token_revocation.revoke(
+                db,
+                token_id(payload, token),
+                datetime.fromtimestamp(payload["exp"], tz=timezone.utc),
+                payload.get("user_id")
+            )
+            if payload.get("sid"):
+                await db.sessions.delete_one({"session_id": payload["sid"], "user_id": payload.get("user_id")})
+        except jwt.InvalidTokenError:
+            pass  # Expired or forged, nothing to revoke
+    # A refresh token only ends its session if its secret matches
+    refresh_token = await read_refresh_token(request)
+    if refresh_token and "." in refresh_token:
+        session_id, secret = refresh_token.split(".", 1)
+        secret_hash = hash_refresh_secret(secret)
+        await db.sessions.delete_one({
+            "session_id": session_id,
+            "$or": [{"refresh_hash": secret_hash}, {"previous_hash": secret_hash}]
+        })
+    
     response.delete_cookie(key="session_token", path="/")
+    response.delete_cookie(key="refresh_token", path="/api/auth")
     return {"message": "Logged out successfully"}
 
 # Emergent Google OAuth session endpoint
@@ -316,9 +680,16 @@ async def process_oauth_session(request: Request, response: Response):
         # Update user info
         await db.users.update_one(
             {"user_id": user_id},
-            {"$set": {"name": oauth_data["name"], "picture": oauth_data.get("picture")}}
+            {"$set": {"name": oauth_data["name"], "picture": oauth_data.get("picture")}, "$inc": {"token_version": 1}}
         )
+        await reload_user(user_id)
         is_premium = existing_user.get("is_premium", False)
+        user_doc = {
+            **existing_user,
+            "name": oauth_data["name"],
+            "picture": oauth_data.get("picture"),
+            "token_version": existing_user.get("token_version", 0) + 1
+        }
     else:
         user_id = f"user_{uuid.uuid4().hex[:12]}"
         user_doc = {
@@ -331,18 +702,10 @@ async def process_oauth_session(request: Request, response: Response):
             "created_at": datetime.now(timezone.utc).isoformat()
         }
         await db.users.insert_one(user_doc)
+        await db.user_stats.insert_one({"user_id": user_id, **{field: 0 for field in USER_STAT_FIELDS}})
         is_premium = False
     
-    token = create_token(user_id)
-    response.set_cookie(
-        key="session_token",
-        value=token,
-        httponly=True,
-        secure=True,
-        samesite="none",
-        path="/",
-        max_age=7*24*60*60
-    )
+    tokens = await start_session(user_doc, response)
     
     return {
         "user_id": user_id,
@@ -350,79 +713,12 @@ async def process_oauth_session(request: Request, response: Response):
         "name": oauth_data["name"],
         "picture": oauth_data.get("picture"),
         "is_premium": is_premium,
-        "token": token
+        **tokens
     }
 
 # ==================== BIBLE DATA ====================
 
-BIBLE_BOOKS = [
-    {"name": "Genesis", "chapters": 50, "testament": "Old"},
-    {"name": "Exodus", "chapters": 40, "testament": "Old"},
-    {"name": "Leviticus", "chapters": 27, "testament": "Old"},
-    {"name": "Numbers", "chapters": 36, "testament": "Old"},
-    {"name": "Deuteronomy", "chapters": 34, "testament": "Old"},
-    {"name": "Joshua", "chapters": 24, "testament": "Old"},
-    {"name": "Judges", "chapters": 21, "testament": "Old"},
-    {"name": "Ruth", "chapters": 4, "testament": "Old"},
-    {"name": "1 Samuel", "chapters": 31, "testament": "Old"},
-    {"name": "2 Samuel", "chapters": 24, "testament": "Old"},
-    {"name": "1 Kings", "chapters": 22, "testament": "Old"},
-    {"name": "2 Kings", "chapters": 25, "testament": "Old"},
-    {"name": "1 Chronicles", "chapters": 29, "testament": "Old"},
-    {"name": "2 Chronicles", "chapters": 36, "testament": "Old"},
-    {"name": "Ezra", "chapters": 10, "testament": "Old"},
-    {"name": "Nehemiah", "chapters": 13, "testament": "Old"},
-    {"name": "Esther", "chapters": 10, "testament": "Old"},
-    {"name": "Job", "chapters": 42, "testament": "Old"},
-    {"name": "Psalms", "chapters": 150, "testament": "Old"},
-    {"name": "Proverbs", "chapters": 31, "testament": "Old"},
-    {"name": "Ecclesiastes", "chapters": 12, "testament": "Old"},
-    {"name": "Song of Solomon", "chapters": 8, "testament": "Old"},
-    {"name": "Isaiah", "chapters": 66, "testament": "Old"},
-    {"name": "Jeremiah", "chapters": 52, "testament": "Old"},
-    {"name": "Lamentations", "chapters": 5, "testament": "Old"},
-    {"name": "Ezekiel", "chapters": 48, "testament": "Old"},
-    {"name": "Daniel", "chapters": 12, "testament": "Old"},
-    {"name": "Hosea", "chapters": 14, "testament": "Old"},
-    {"name": "Joel", "chapters": 3, "testament": "Old"},
-    {"name": "Amos", "chapters": 9, "testament": "Old"},
-    {"name": "Obadiah", "chapters": 1, "testament": "Old"},
-    {"name": "Jonah", "chapters": 4, "testament": "Old"},
-    {"name": "Micah", "chapters": 7, "testament": "Old"},
-    {"name": "Nahum", "chapters": 3, "testament": "Old"},
-    {"name": "Habakkuk", "chapters": 3, "testament": "Old"},
-    {"name": "Zephaniah", "chapters": 3, "testament": "Old"},
-    {"name": "Haggai", "chapters": 2, "testament": "Old"},
-    {"name": "Zechariah", "chapters": 14, "testament": "Old"},
-    {"name": "Malachi", "chapters": 4, "testament": "Old"},
-    {"name": "Matthew", "chapters": 28, "testament": "New"},
-    {"name": "Mark", "chapters": 16, "testament": "New"},
-    {"name": "Luke", "chapters": 24, "testament": "New"},
-    {"name": "John", "chapters": 21, "testament": "New"},
-    {"name": "Acts", "chapters": 28, "testament": "New"},
-    {"name": "Romans", "chapters": 16, "testament": "New"},
-    {"name": "1 Corinthians", "chapters": 16, "testament": "New"},
-    {"name": "2 Corinthians", "chapters": 13, "testament": "New"},
-    {"name": "Galatians", "chapters": 6, "testament": "New"},
-    {"name": "Ephesians", "chapters": 6, "testament": "New"},
-    {"name": "Philippians", "chapters": 4, "testament": "New"},
-    {"name": "Colossians", "chapters": 4, "testament": "New"},
-    {"name": "1 Thessalonians", "chapters": 5, "testament": "New"},
-    {"name": "2 Thessalonians", "chapters": 3, "testament": "New"},
-    {"name": "1 Timothy", "chapters": 6, "testament": "New"},
-    {"name": "2 Timothy", "chapters": 4, "testament": "New"},
-    {"name": "Titus", "chapters": 3, "testament": "New"},
-    {"name": "Philemon", "chapters": 1, "testament": "New"},
-    {"name": "Hebrews", "chapters": 13, "testament": "New"},
-    {"name": "James", "chapters": 5, "testament": "New"},
-    {"name": "1 Peter", "chapters": 5, "testament": "New"},
-    {"name": "2 Peter", "chapters": 3, "testament": "New"},
-    {"name": "1 John", "chapters": 5, "testament": "New"},
-    {"name": "2 John", "chapters": 1, "testament": "New"},
-    {"name": "3 John", "chapters": 1, "testament": "New"},
-    {"name": "Jude", "chapters": 1, "testament": "New"},
-    {"name": "Revelation", "chapters": 22, "testament": "New"},
-]
+from bible_data import BIBLE_BOOKS, CHAPTER_REFS, chapter_id
 
 # Sample Bible verses (in production, this would come from a full Bible API)
 SAMPLE_VERSES = {
@@ -601,33 +897,64 @@ BOOK_ABBREVIATIONS = {
 async def get_bible_books():
     return {"books": BIBLE_BOOKS}
 
-@api_router.get("/bible/chapter/{book}/{chapter}")
-async def get_chapter(book: str, chapter: int):
-    # Try to fetch from Bible API
+# Chapter text rarely changes, so fetched chapters are kept for a day and
+# concurrent requests for the same chapter share one upstream call
+CHAPTER_CACHE_TTL = int(os.environ.get('CHAPTER_CACHE_TTL', str(24 * 3600)))
+chapter_cache = TTLCache(maxsize=1200, ttl=CHAPTER_CACHE_TTL)
+chapter_fetches: Dict[tuple, asyncio.Task] = {}
+bible_api_http = httpx.AsyncClient(timeout=10.0)
+bible_api_slots = asyncio.Semaphore(6)
+
+async def load_chapter(book: str, chapter: int) -> Optional[dict]:
+    """Fetch a chapter from the Bible API; None when it is unavailable"""
     try:
         book_abbr = BOOK_ABBREVIATIONS.get(book, book.lower().replace(" ", ""))
         api_url = f"https://bible-api.com/{book_abbr}+{chapter}"
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.get(api_url, timeout=10.0)
-            
-            if response.status_code == 200:
-                data = response.json()
-                verses = []
-                if "verses" in data:
-                    for v in data["verses"]:
-                        verses.append({
-                            "verse": v.get("verse", 1),
-                            "text": v.get("text", "").strip()
-                        })
-                return {
-                    "book": book,
-                    "chapter": chapter,
-                    "verses": verses,
-                    "translation": data.get("translation_name", "World English Bible")
-                }
+
+        async with bible_api_slots:
+            response = await bible_api_http.get(api_url)
+
+        if response.status_code == 200:
+            data = response.json()
+            verses = []
+            if "verses" in data:
+                for v in data["verses"]:
+                    verses.append({
+                        "verse": v.get("verse", 1),
+                        "text": v.get("text", "").strip()
+                    })
+            result = {
+                "book": book,
+                "chapter": chapter,
+                "verses": verses,
+                "translation": data.get("translation_name", "World English Bible")
+            }
+            chapter_cache[(book, chapter)] = result
+            return result
     except Exception as e:
         logger.warning(f"Bible API error: {e}")
+    return None
+
+async def fetch_chapter(book: str, chapter: int) -> Optional[dict]:
+    """Get a chapter from the cache, joining any fetch already in flight"""
+    key = (book, chapter)
+    cached = chapter_cache.get(key)
+    if cached is not None:
+        return cached
+    task = chapter_fetches.get(key)
+    if task is None:
+        task = asyncio.ensure_future(load_chapter(book, chapter))
+        chapter_fetches[key] = task
+        task.add_done_callback(lambda _: chapter_fetches.pop(key, None))
+    # Shield so one caller disconnecting doesn't cancel the fetch for the others
+    return await asyncio.shield(task)
+
+@api_router.get("/bible/chapter/{book}/{chapter}")
+async def get_chapter(book: str, chapter: int):
+    # Try to fetch from Bible API
+    data = await fetch_chapter(book, chapter)
+    if data:
+        return data
     
     # Fallback to local sample verses
     key = f"{book}_{chapter}"
@@ -735,50 +1062,194 @@ async def search_dictionary(q: str):
             results.append(entry)
     return {"results": results}
 
+# ==================== TODAY CACHE ====================
+
+# Every UTC offset in use is a multiple of 15 minutes between -12:00 and +14:00,
+# so local midnight always falls on a UTC quarter hour. The "today" payloads are
+# serialized once per offset bucket and swapped in when that bucket rolls over.
+TODAY_OFFSET_BUCKETS = range(-12 * 60, 14 * 60 + 1, 15)
+today_cache: Dict[int, Dict[str, Any]] = {}
+
+def encode_json(content: Any) -> bytes:
+    """Serialize the same way JSONResponse does"""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def build_today_entry(offset: int, now: datetime) -> Dict[str, Any]:
+    """Build the serialized devotional and reading payloads for one UTC offset"""
+    devotionals = content_store.get_devotionals()
+    plan = content_store.get_reading_plan()
+
+    local_now = now + timedelta(minutes=offset)
+    date_str = local_now.strftime("%Y-%m-%d")
+    day_of_year = local_now.timetuple().tm_yday
+    plan_day, catch_up = plan_day_for_date(local_now.date())
+    devotional = devotionals[(plan_day - 1) % len(devotionals)]
+    reading = plan[(plan_day - 1) % len(plan)]
+
+    return {
+        "date": date_str,
+        "devotional": encode_json({**devotional, "date": date_str, "day_of_year": day_of_year}),
+        "reading": encode_json({**reading, "date": date_str, "day_of_year": day_of_year, "catch_up": catch_up}),
+    }
+
+def refresh_today_cache(force: bool = False):
+    """Rebuild the buckets whose local date has rolled over, then swap the cache"""
+    global today_cache
+    now = datetime.now(timezone.utc)
+    new_cache = dict(today_cache)
+    rolled = 0
+    for offset in TODAY_OFFSET_BUCKETS:
+        local_date = (now + timedelta(minutes=offset)).strftime("%Y-%m-%d")
+        entry = new_cache.get(offset)
+        if force or not entry or entry["date"] != local_date:
+            new_cache[offset] = build_today_entry(offset, now)
+            rolled += 1
+    today_cache = new_cache
+    if rolled:
+        logger.info(f"Today cache refreshed: {rolled} offset buckets rolled over")
+
+def parse_utc_offset(value: str) -> Optional[int]:
+    """Parse "+05:30", "-0800" or a plain minute count into minutes east of UTC"""
+    value = value.strip()
+    # Hours and minutes need a colon or exactly four digits; "-480" is minutes
+    match = re.fullmatch(r'([+-])?(\d{1,2}):(\d{2})', value) or re.fullmatch(r'([+-])?(\d{2})(\d{2})', value)
+    if match:
+        sign, hours, minutes = match.groups()
+        total = int(hours) * 60 + int(minutes)
+        return -total if sign == "-" else total
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+def zone_offset_minutes(tz_name: str) -> Optional[int]:
+    """Current UTC offset in minutes for an IANA timezone name (DST aware)"""
+    try:
+        offset = datetime.now(ZoneInfo(tz_name)).utcoffset()
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+    return int(offset.total_seconds() // 60) if offset is not None else None
+
+async def resolve_utc_offset(request: Request) -> int:
+    """Work out the caller's UTC offset from headers, falling back to their profile"""
+    offset = None
+    tz_header = request.headers.get("X-Timezone")
+    offset_header = request.headers.get("X-UTC-Offset")
+    if tz_header:
+        offset = zone_offset_minutes(tz_header)
+    if offset is None and offset_header:
+        offset = parse_utc_offset(offset_header)
+
+    if offset is None:
+        token = get_request_token(request)
+        if token:
+            try:
+                payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+                settings = await db.user_settings.find_one(
+                    {"user_id": payload.get("user_id")},
+                    {"_id": 0, "timezone": 1}
+                )
+                if settings and settings.get("timezone"):
+                    offset = zone_offset_minutes(settings["timezone"])
+            except jwt.InvalidTokenError:
+                pass
+
+    if offset is None:
+        return 0
+    # Snap to the nearest bucket
+    offset = round(offset / 15) * 15
+    return max(TODAY_OFFSET_BUCKETS[0], min(TODAY_OFFSET_BUCKETS[-1], offset))
+
+def get_today_entry(offset: int) -> Dict[str, Any]:
+    entry = today_cache.get(offset)
+    now = datetime.now(timezone.utc)
+    # Guard against the scheduler lagging behind a rollover
+    if not entry or entry["date"] != (now + timedelta(minutes=offset)).strftime("%Y-%m-%d"):
+        entry = build_today_entry(offset, now)
+        today_cache[offset] = entry
+    return entry
+
 # ==================== DEVOTIONAL ENDPOINTS ====================
 
 @api_router.get("/devotional/today")
-async def get_today_devotional():
-    from bible_data import FULL_YEAR_DEVOTIONALS
-    # Get devotional based on day of year
-    day_of_year = datetime.now(timezone.utc).timetuple().tm_yday
-    index = (day_of_year - 1) % len(FULL_YEAR_DEVOTIONALS)
-    devotional = FULL_YEAR_DEVOTIONALS[index]
-    return {**devotional, "date": datetime.now(timezone.utc).strftime("%Y-%m-%d"), "day_of_year": day_of_year}
+async def get_today_devotional(request: Request):
+    offset = await resolve_utc_offset(request)
+    return Response(content=get_today_entry(offset)["devotional"], media_type="application/json")
 
 @api_router.get("/devotional/all")
 async def get_all_devotionals(page: int = 1, limit: int = 30):
-    from bible_data import FULL_YEAR_DEVOTIONALS
+    all_devotionals = content_store.get_devotionals()
     start = (page - 1) * limit
     end = start + limit
-    devotionals = FULL_YEAR_DEVOTIONALS[start:end]
-    return {
-        "devotionals": devotionals,
-        "total": len(FULL_YEAR_DEVOTIONALS),
+    # Assemble the page from the shared pre-encoded devotional fragments
+    meta = encode_json({
+        "total": len(all_devotionals),
         "page": page,
-        "pages": (len(FULL_YEAR_DEVOTIONALS) + limit - 1) // limit
+        "pages": (len(all_devotionals) + limit - 1) // limit
+    })
+    content = b'{"devotionals":[' + all_devotionals.encode_range(start, end) + b'],' + meta[1:]
+    return Response(content=content, media_type="application/json")
+
+@api_router.get("/devotional/search")
+async def search_devotionals(q: str, limit: int = 20):
+    """Search all devotionals by topic, ranked, with highlighted snippets"""
+    import time
+    from devotional_search import search
+    started = time.perf_counter()
+    results = search(content_store.get_devotionals(), q, max(1, min(limit, 100)))
+    return {
+        "query": q,
+        "results": results,
+        "count": len(results),
+        "took_ms": round((time.perf_counter() - started) * 1000, 3)
     }
 
 @api_router.get("/devotional/{day}")
 async def get_devotional_by_day(day: int):
-    from bible_data import FULL_YEAR_DEVOTIONALS
-    if day < 1 or day > len(FULL_YEAR_DEVOTIONALS):
+    devotionals = content_store.get_devotionals()
+    if day < 1 or day > len(devotionals):
         raise HTTPException(status_code=404, detail="Devotional not found for this day")
-    return FULL_YEAR_DEVOTIONALS[day - 1]
+    return devotionals[day - 1]
 
 # ==================== PROFILE ENDPOINTS ====================
 
+# Per-user content counts live in `user_stats` and move by $inc as content is
+# created and deleted. Users from before the counters get theirs counted the
+# first time their profile is viewed.
+USER_STAT_FIELDS = {"bookmarks": "bookmarks", "journals": "journals", "forum_posts": "forum_posts"}
+
+async def bump_user_stat(user_id: str, field: str, delta: int):
+    # No upsert: a missing document is backfilled from real counts instead
+    await db.user_stats.update_one({"user_id": user_id}, {"$inc": {field: delta}})
+
+async def backfill_user_stats(user_id: str) -> dict:
+    stats = {
+        field: await db[collection].count_documents({"user_id": user_id})
+        for field, collection in USER_STAT_FIELDS.items()
+    }
+    try:
+        await db.user_stats.insert_one({"user_id": user_id, **stats})
+    except DuplicateKeyError:
+        # Backfilled concurrently; keep that copy
+        stats = await db.user_stats.find_one({"user_id": user_id}, {"_id": 0, "user_id": 0})
+    return stats
+
 @api_router.get("/profile")
 async def get_profile(request: Request):
     user = await get_current_user(request)
     
-    # Get user stats
-    bookmarks_count = await db.bookmarks.count_documents({"user_id": user["user_id"]})
-    journals_count = await db.journals.count_documents({"user_id": user["user_id"]})
-    posts_count = await db.forum_posts.count_documents({"user_id": user["user_id"]})
-    
-    # Get user settings
-    settings = await db.user_settings.find_one({"user_id": user["user_id"]}, {"_id": 0})
+    # Full user record, counters and settings in one round trip
+    records = await db.users.aggregate([
+        {"$match": {"user_id": user["user_id"]}},
+        {"$lookup": {"from": "user_stats", "localField": "user_id", "foreignField": "user_id", "as": "stats"}},
+        {"$lookup": {"from": "user_settings", "localField": "user_id", "foreignField": "user_id", "as": "settings"}},
+        {"$project": {"_id": 0, "password": 0, "stats._id": 0, "stats.user_id": 0, "settings._id": 0}}
+    ]).to_list(1)
+    if not records:
+        raise HTTPException(status_code=401, detail="User not found")
+    user = records[0]
+    stats = user["stats"][0] if user["stats"] else await backfill_user_stats(user["user_id"])
+    settings = user["settings"][0] if user["settings"] else None
     
     return {
         "user_id": user["user_id"],
@@ -788,11 +1259,7 @@ async def get_profile(request: Request):
         "is_premium": user.get("is_premium", False),
         "premium_since": user.get("premium_since"),
         "created_at": user.get("created_at"),
-        "stats": {
-            "bookmarks": bookmarks_count,
-            "journals": journals_count,
-            "forum_posts": posts_count
-        },
+        "stats": {field: stats.get(field, 0) for field in USER_STAT_FIELDS},
         "settings": settings or {
             "notification_email": True,
             "notification_forum": True,
@@ -810,8 +1277,9 @@ async def update_profile(update_data: UserProfileUpdate, request: Request):
         updates["name"] = update_data.name
         await db.users.update_one(
             {"user_id": user["user_id"]},
-            {"$set": {"name": update_data.name}}
+            {"$set": {"name": update_data.name}, "$inc": {"token_version": 1}}
         )
+        await reload_user(user["user_id"])
     
     # Update settings
     settings_updates = {}
@@ -823,7 +1291,11 @@ async def update_profile(update_data: UserProfileUpdate, request: Request):
         settings_updates["preferred_translation"] = update_data.preferred_translation
     if update_data.theme_preference:
         settings_updates["theme_preference"] = update_data.theme_preference
-    
+    if update_data.timezone:
+        if zone_offset_minutes(update_data.timezone) is None:
+            raise HTTPException(status_code=400, detail="Unknown timezone")
+        settings_updates["timezone"] = update_data.timezone
+
     if settings_updates:
         await db.user_settings.update_one(
             {"user_id": user["user_id"]},
@@ -837,31 +1309,61 @@ async def update_profile(update_data: UserProfileUpdate, request: Request):
 async def get_reading_progress(request: Request):
     user = await get_current_user(request)
     
-    # Get all bookmarks to calculate progress
-    bookmarks = await db.bookmarks.find(
-        {"user_id": user["user_id"]},
-        {"_id": 0}
-    ).to_list(1000)
-    
-    # Calculate books and chapters read
-    books_read = set()
-    chapters_read = set()
-    for bm in bookmarks:
-        books_read.add(bm["book"])
-        chapters_read.add(f"{bm['book']}_{bm['chapter']}")
-    
-    # Total chapters in Bible
-    total_chapters = sum(book["chapters"] for book in BIBLE_BOOKS)
+    coverage, recent = await asyncio.gather(
+        chapter_coverage.get_coverage(db, user["user_id"]),
+        db.bookmarks.find({"user_id": user["user_id"]}, {"_id": 0}).sort("created_at", -1).to_list(5)
+    )
+    bookmarked = chapter_coverage.book_counts(coverage["bookmarked"])
+    read = chapter_coverage.book_counts(coverage["read"])
+    chapters_bookmarked = sum(book[3] for book in bookmarked)
+    total_chapters = len(CHAPTER_REFS)
     
     return {
-        "books_started": len(books_read),
-        "total_books": 66,
-        "chapters_bookmarked": len(chapters_read),
+        "books_started": sum(1 for book in bookmarked if book[3]),
+        "total_books": len(BIBLE_BOOKS),
+        "chapters_bookmarked": chapters_bookmarked,
+        "books_read": sum(1 for book in read if book[3]),
+        "chapters_read": sum(book[3] for book in read),
         "total_chapters": total_chapters,
-        "progress_percentage": round((len(chapters_read) / total_chapters) * 100, 1),
-        "recent_bookmarks": bookmarks[:5]
+        "progress_percentage": round((chapters_bookmarked / total_chapters) * 100, 1),
+        "recent_bookmarks": recent
     }
 
+@api_router.get("/profile/reading-heatmap")
+async def get_reading_heatmap(request: Request):
+    """Per-book coverage, with one cell per chapter: 0 none, 1 bookmarked, 2 read, 3 both"""
+    user = await get_current_user(request)
+    coverage = await chapter_coverage.get_coverage(db, user["user_id"])
+    
+    books = []
+    for (book, testament, chapters, bookmarked, bookmark_bits), (_, _, _, read, read_bits) in zip(
+        chapter_coverage.book_counts(coverage["bookmarked"]),
+        chapter_coverage.book_counts(coverage["read"])
+    ):
+        covered = bookmark_bits | read_bits
+        books.append({
+            "book": book,
+            "testament": testament,
+            "chapters": chapters,
+            "bookmarked": bookmarked,
+            "read": read,
+            "coverage_percentage": round(bin(covered).count("1") / chapters * 100, 1),
+            "cells": "".join(
+                str((bookmark_bits >> i & 1) | (read_bits >> i & 1) << 1) for i in range(chapters)
+            )
+        })
+    return {"books": books}
+
+# ==================== PAGINATION ====================
+
+async def fetch_page(collection, query: dict, sort_field: str, id_field: str,
+                     limit: int, cursor: Optional[str], projection: dict = None):
+    """Newest-first page of a list plus the cursor for the next one"""
+    try:
+        return await pagination.fetch_page(collection, query, sort_field, id_field, limit, cursor, projection)
+    except pagination.InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 # ==================== BOOKMARK ENDPOINTS ====================
 
 @api_router.post("/bookmarks", response_model=BookmarkResponse)
@@ -880,26 +1382,43 @@ async def create_bookmark(bookmark: BookmarkCreate, request: Request):
     }
     
     await db.bookmarks.insert_one(bookmark_doc)
+    await bump_user_stat(user["user_id"], "bookmarks", 1)
+    try:
+        await chapter_coverage.mark_bookmarked(db, user["user_id"], chapter_id(bookmark.book, bookmark.chapter))
+    except ValueError:
+        pass  # Not a chapter in the canon table; nothing to cover
     return BookmarkResponse(**bookmark_doc)
 
 @api_router.get("/bookmarks")
-async def get_bookmarks(request: Request):
+async def get_bookmarks(request: Request, cursor: Optional[str] = None, limit: int = 100):
     user = await get_current_user(request)
-    bookmarks = await db.bookmarks.find(
-        {"user_id": user["user_id"]},
-        {"_id": 0}
-    ).sort("created_at", -1).to_list(100)
-    return {"bookmarks": bookmarks}
+    bookmarks, next_cursor = await fetch_page(
+        db.bookmarks, {"user_id": user["user_id"]}, "created_at", "bookmark_id", limit, cursor
+    )
+    return {"bookmarks": bookmarks, "next_cursor": next_cursor}
 
 @api_router.delete("/bookmarks/{bookmark_id}")
 async def delete_bookmark(bookmark_id: str, request: Request):
     user = await get_current_user(request)
-    result = await db.bookmarks.delete_one({
+    deleted = await db.bookmarks.find_one_and_delete({
         "bookmark_id": bookmark_id,
         "user_id": user["user_id"]
     })
-    if result.deleted_count == 0:
+    if not deleted:
         raise HTTPException(status_code=404, detail="Bookmark not found")
+    await bump_user_stat(user["user_id"], "bookmarks", -1)
+    # Clear the chapter's coverage bit once its last bookmark is gone. A
+    # bookmark created between the check and the clear would be left without
+    # its bit, so look again afterwards and put the bit back if one turned up.
+    chapter_filter = {"user_id": user["user_id"], "book": deleted["book"], "chapter": deleted["chapter"]}
+    if not await db.bookmarks.find_one(chapter_filter, {"_id": 1}):
+        try:
+            number = chapter_id(deleted["book"], deleted["chapter"])
+            await chapter_coverage.clear_bookmarked(db, user["user_id"], number)
+            if await db.bookmarks.find_one(chapter_filter, {"_id": 1}):
+                await chapter_coverage.mark_bookmarked(db, user["user_id"], number)
+        except ValueError:
+            pass
     return {"message": "Bookmark deleted"}
 
 # ==================== JOURNAL ENDPOINTS (PREMIUM) ====================
@@ -920,16 +1439,16 @@ async def create_journal(journal: JournalCreate, request: Request):
     }
     
     await db.journals.insert_one(journal_doc)
+    await bump_user_stat(user["user_id"], "journals", 1)
     return JournalResponse(**journal_doc)
 
 @api_router.get("/journal")
-async def get_journals(request: Request):
+async def get_journals(request: Request, cursor: Optional[str] = None, limit: int = 100):
     user = await get_premium_user(request)
-    journals = await db.journals.find(
-        {"user_id": user["user_id"]},
-        {"_id": 0}
-    ).sort("created_at", -1).to_list(100)
-    return {"journals": journals}
+    journals, next_cursor = await fetch_page(
+        db.journals, {"user_id": user["user_id"]}, "created_at", "journal_id", limit, cursor
+    )
+    return {"journals": journals, "next_cursor": next_cursor}
 
 @api_router.delete("/journal/{journal_id}")
 async def delete_journal(journal_id: str, request: Request):
@@ -940,10 +1459,20 @@ async def delete_journal(journal_id: str, request: Request):
     })
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Journal entry not found")
+    await bump_user_stat(user["user_id"], "journals", -1)
     return {"message": "Journal entry deleted"}
 
 # ==================== FORUM ENDPOINTS (PREMIUM) ====================
 
+# Vote lists and search fields stay out of listing payloads
+FEED_PROJECTION = {"_id": 0, "upvoted_by": 0, "scripture_ranges": 0, "scripture_chapters": 0}
+
+async def mark_upvoted(user_id: str, posts: list):
+    """Flag the posts on a page the reader has voted on"""
+    voted = await forum_votes.voted_ids(db, user_id, (post["post_id"] for post in posts))
+    for post in posts:
+        post["upvoted"] = post["post_id"] in voted
+
 @api_router.post("/forum/posts", response_model=ForumPostResponse)
 async def create_post(post: ForumPostCreate, request: Request):
     user = await get_premium_user(request)
@@ -958,28 +1487,93 @@ async def create_post(post: ForumPostCreate, request: Request):
         "scripture_ref": post.scripture_ref,
         "tags": post.tags or [],
         "upvotes": 0,
-        "upvoted_by": [],
         "comments_count": 0,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
+    post_doc.update(forum_ranking.scores(post_doc))
+    post_doc.update(scripture_refs.reference_fields(post.scripture_ref))
     
     await db.forum_posts.insert_one(post_doc)
-    return ForumPostResponse(**{k: v for k, v in post_doc.items() if k != "upvoted_by"})
+    await bump_user_stat(user["user_id"], "forum_posts", 1)
+    return ForumPostResponse(**post_doc)
 
 @api_router.get("/forum/posts")
-async def get_posts(request: Request, skip: int = 0, limit: int = 20):
+async def get_posts(request: Request, sort: str = "new", cursor: Optional[str] = None, limit: int = 20):
     user = await get_premium_user(request)
-    posts = await db.forum_posts.find(
-        {},
-        {"_id": 0, "upvoted_by": 0}
-    ).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
-    return {"posts": posts}
+    if sort not in forum_ranking.FEED_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(forum_ranking.FEED_SORTS)}")
+    posts, next_cursor = await fetch_page(
+        read_db.forum_posts, forum_ranking.FEED_FILTERS.get(sort, {}), forum_ranking.FEED_SORTS[sort], "post_id",
+        limit, cursor, FEED_PROJECTION
+    )
+    await mark_upvoted(user["user_id"], posts)
+    return {"posts": posts, "next_cursor": next_cursor}
+
+@api_router.get("/forum/search")
+async def search_posts(
+    request: Request,
+    q: Optional[str] = None,
+    ref: Optional[str] = Query(None, max_length=scripture_refs.MAX_REFERENCE_LENGTH),
+    cursor: Optional[str] = None,
+    limit: int = 20
+):
+    """Posts matching words in their title, content or tags and/or about a passage.
+
+    Word searches list the best matches first, weighted by the text index;
+    passage-only searches list the newest first.
+    """
+    user = await get_premium_user(request)
+    clauses = []
+    if q and q.strip():
+        clauses.append({"$text": {"$search": q.strip()}})
+    if ref and ref.strip():
+        ranges = scripture_refs.parse_reference(ref)
+        if not ranges:
+            raise HTTPException(status_code=400, detail=f"Unrecognised scripture reference: {ref}")
+        clauses.append(scripture_refs.overlap_filter(ranges))
+    if not clauses:
+        raise HTTPException(status_code=400, detail="Give search words (q) or a scripture reference (ref)")
+    
+    query = clauses[0] if len(clauses) == 1 else {"$and": clauses}
+    if "$text" in clauses[0]:
+        try:
+            posts, next_cursor = await pagination.fetch_text_page(
+                read_db.forum_posts, query, "post_id", limit, cursor, FEED_PROJECTION
+            )
+        except pagination.InvalidCursor:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    else:
+        posts, next_cursor = await fetch_page(
+            read_db.forum_posts, query, "created_at", "post_id", limit, cursor, FEED_PROJECTION
+        )
+    await mark_upvoted(user["user_id"], posts)
+    return {"posts": posts, "next_cursor": next_cursor}
+
+async def refresh_forum_scores():
+    """Recompute the feed scores that decay with time"""
+    try:
+        refreshed = await forum_ranking.refresh_scores(db)
+        if refreshed:
+            logger.info(f"Forum scores refreshed for {refreshed} posts")
+    except Exception as e:
+        logger.warning(f"Forum score refresh failed: {e}")
+
+async def recount_forum_votes():
+    """Bring upvote counts back in line with the votes, on one worker"""
+    try:
+        if not await job_lock.acquire(db, "forum_vote_recount", FORUM_VOTE_RECOUNT_LOCK_SECONDS):
+            return
+        fixed = await forum_votes.recount(db)
+        async for post in db.forum_posts.find({"post_id": {"$in": fixed["post"]}}, forum_ranking.SCORE_FIELDS):
+            await forum_ranking.rescore(db, post)
+    except Exception as e:
+        logger.warning(f"Forum vote recount failed: {e}")
 
 @api_router.get("/forum/posts/{post_id}")
-async def get_post(post_id: str):
+async def get_post(post_id: str, request: Request):
     post = await db.forum_posts.find_one(
         {"post_id": post_id},
-        {"_id": 0, "upvoted_by": 0}
+        FEED_PROJECTION
     )
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
@@ -989,37 +1583,72 @@ async def get_post(post_id: str):
         {"_id": 0, "upvoted_by": 0}
     ).sort("created_at", 1).to_list(100)
     
+    # Signed-in readers also see which of these they voted on
+    if get_request_token(request):
+        try:
+            user = await get_current_user(request)
+        except HTTPException:
+            user = None
+        if user:
+            voted = await forum_votes.voted_ids(
+                db, user["user_id"], [post_id] + [comment["comment_id"] for comment in comments]
+            )
+            post["upvoted"] = post_id in voted
+            for comment in comments:
+                comment["upvoted"] = comment["comment_id"] in voted
+    
     return {"post": post, "comments": comments}
 
+async def toggle_vote(request: Request, target_type: str, target_id: str) -> dict:
+    """Toggle the reader's vote, replaying the stored result for a repeated Idempotency-Key"""
+    user = await get_premium_user(request)
+    key = request.headers.get("Idempotency-Key")
+    holder = uuid.uuid4().hex
+    if key:
+        try:
+            stored = await idempotency.claim(db, "vote", user["user_id"], key, f"{target_type}:{target_id}", holder)
+        except idempotency.InvalidKey:
+            raise HTTPException(status_code=400,
+                                detail=f"Idempotency-Key must be 1-{idempotency.MAX_KEY_LENGTH} characters")
+        except idempotency.KeyMismatch:
+            raise HTTPException(status_code=422, detail="This Idempotency-Key was used for a different request")
+        except idempotency.KeyInProgress:
+            raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is in progress",
+                                headers={"Retry-After": "1"})
+        if stored:
+            return stored
+    
+    lease = idempotency.renewing(db, "vote", user["user_id"], key, holder) if key else nullcontext()
+    async with lease:
+        try:
+            toggled = await forum_votes.toggle_vote(db, target_type, target_id, user["user_id"])
+        except BaseException:
+            # Including cancellation when the client disconnects
+            if key:
+                await idempotency.release(db, "vote", user["user_id"], key, holder)
+            raise
+        if toggled is None:
+            if key:
+                await idempotency.release(db, "vote", user["user_id"], key, holder)
+            raise HTTPException(status_code=404, detail=f"{target_type.capitalize()} not found")
+        
+        upvoted, target = toggled
+        if target_type == "post":
+            await forum_ranking.rescore(db, target)
+        response = {"message": "Upvoted" if upvoted else "Upvote removed", "upvoted": upvoted, "upvotes": target["upvotes"]}
+        if key:
+            await idempotency.complete(db, "vote", user["user_id"], key, holder, response)
+    return response
+
 @api_router.post("/forum/posts/{post_id}/upvote")
 async def upvote_post(post_id: str, request: Request):
-    user = await get_premium_user(request)
-    
-    post = await db.forum_posts.find_one({"post_id": post_id})
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
-    
-    upvoted_by = post.get("upvoted_by", [])
-    if user["user_id"] in upvoted_by:
-        # Remove upvote
-        await db.forum_posts.update_one(
-            {"post_id": post_id},
-            {"$pull": {"upvoted_by": user["user_id"]}, "$inc": {"upvotes": -1}}
-        )
-        return {"message": "Upvote removed", "upvoted": False}
-    else:
-        # Add upvote
-        await db.forum_posts.update_one(
-            {"post_id": post_id},
-            {"$push": {"upvoted_by": user["user_id"]}, "$inc": {"upvotes": 1}}
-        )
-        return {"message": "Upvoted", "upvoted": True}
+    return await toggle_vote(request, "post", post_id)
 
 @api_router.post("/forum/posts/{post_id}/comments", response_model=CommentResponse)
 async def create_comment(post_id: str, comment: CommentCreate, request: Request):
     user = await get_premium_user(request)
     
-    post = await db.forum_posts.find_one({"post_id": post_id})
+    post = await db.forum_posts.find_one({"post_id": post_id}, {"_id": 1})
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
@@ -1031,39 +1660,24 @@ async def create_comment(post_id: str, comment: CommentCreate, request: Request)
         "user_name": user["name"],
         "content": comment.content,
         "upvotes": 0,
-        "upvoted_by": [],
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
     await db.forum_comments.insert_one(comment_doc)
-    await db.forum_posts.update_one(
+    post = await db.forum_posts.find_one_and_update(
         {"post_id": post_id},
-        {"$inc": {"comments_count": 1}}
+        {"$inc": {"comments_count": 1}},
+        projection=forum_ranking.SCORE_FIELDS,
+        return_document=ReturnDocument.AFTER
     )
+    if post:
+        await forum_ranking.rescore(db, post)
     
-    return CommentResponse(**{k: v for k, v in comment_doc.items() if k != "upvoted_by"})
+    return CommentResponse(**comment_doc)
 
 @api_router.post("/forum/comments/{comment_id}/upvote")
 async def upvote_comment(comment_id: str, request: Request):
-    user = await get_premium_user(request)
-    
-    comment = await db.forum_comments.find_one({"comment_id": comment_id})
-    if not comment:
-        raise HTTPException(status_code=404, detail="Comment not found")
-    
-    upvoted_by = comment.get("upvoted_by", [])
-    if user["user_id"] in upvoted_by:
-        await db.forum_comments.update_one(
-            {"comment_id": comment_id},
-            {"$pull": {"upvoted_by": user["user_id"]}, "$inc": {"upvotes": -1}}
-        )
-        return {"message": "Upvote removed", "upvoted": False}
-    else:
-        await db.forum_comments.update_one(
-            {"comment_id": comment_id},
-            {"$push": {"upvoted_by": user["user_id"]}, "$inc": {"upvotes": 1}}
-        )
-        return {"message": "Upvoted", "upvoted": True}
+    return await toggle_vote(request, "comment", comment_id)
 
 # ==================== DAILY NEWS ====================
 
@@ -1161,7 +1775,7 @@ async def get_daily_news(request: Request):
     today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
     
     # Check if we have today's news cached
-    cached = await db.daily_news.find_one({"date": today}, {"_id": 0})
+    cached = await read_db.daily_news.find_one({"date": today}, {"_id": 0})
     
     if cached and len(cached.get("stories", [])) >= 5:
         return {"date": today, "stories": cached["stories"], "cached": True}
@@ -1206,10 +1820,11 @@ async def refresh_daily_news(request: Request):
 async def analyze_daily_news(news_id: str, request: Request):
     """Analyze a specific news story with scripture (Premium)"""
     user = await get_premium_user(request)
+    await enforce_rate_limit("news_analysis", user["user_id"])
     
     # Find the news story
     today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    daily_news = await db.daily_news.find_one({"date": today}, {"_id": 0})
+    daily_news = await read_db.daily_news.find_one({"date": today}, {"_id": 0})
     
     if not daily_news:
         raise HTTPException(status_code=404, detail="No daily news found")
@@ -1426,7 +2041,7 @@ async def get_news_scripture(news_id: str):
     """Get relevant scriptures for a news story (no AI, instant)"""
     # Find the news story
     today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    daily_news = await db.daily_news.find_one({"date": today}, {"_id": 0})
+    daily_news = await read_db.daily_news.find_one({"date": today}, {"_id": 0})
     
     if not daily_news:
         raise HTTPException(status_code=404, detail="No daily news found")
@@ -1455,6 +2070,7 @@ async def get_news_scripture(news_id: str):
 @api_router.post("/analyze/news")
 async def analyze_news(analysis_req: NewsAnalysisRequest, request: Request):
     user = await get_premium_user(request)
+    await enforce_rate_limit("news_analysis", user["user_id"])
     
     from emergentintegrations.llm.chat import LlmChat, UserMessage
     
@@ -1545,13 +2161,12 @@ Please provide relevant scripture references and analysis."""
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
 @api_router.get("/analyze/history")
-async def get_analysis_history(request: Request):
+async def get_analysis_history(request: Request, cursor: Optional[str] = None, limit: int = 50):
     user = await get_premium_user(request)
-    analyses = await db.news_analyses.find(
-        {"user_id": user["user_id"]},
-        {"_id": 0}
-    ).sort("created_at", -1).to_list(50)
-    return {"analyses": analyses}
+    analyses, next_cursor = await fetch_page(
+        db.news_analyses, {"user_id": user["user_id"]}, "created_at", "analysis_id", limit, cursor
+    )
+    return {"analyses": analyses, "next_cursor": next_cursor}
 
 # ==================== STRIPE SUBSCRIPTION ====================
 
@@ -1623,8 +2238,9 @@ async def get_subscription_status(session_id: str, request: Request):
             # Update user to premium
             await db.users.update_one(
                 {"user_id": user["user_id"]},
-                {"$set": {"is_premium": True, "premium_since": datetime.now(timezone.utc).isoformat()}}
+                {"$set": {"is_premium": True, "premium_since": datetime.now(timezone.utc).isoformat()}, "$inc": {"token_version": 1}}
             )
+            await reload_user(user["user_id"])
     
     return {
         "status": status.status,
@@ -1654,8 +2270,9 @@ async def stripe_webhook(request: Request):
             if user_id:
                 await db.users.update_one(
                     {"user_id": user_id},
-                    {"$set": {"is_premium": True, "premium_since": datetime.now(timezone.utc).isoformat()}}
+                    {"$set": {"is_premium": True, "premium_since": datetime.now(timezone.utc).isoformat()}, "$inc": {"token_version": 1}}
                 )
+                await reload_user(user_id)
                 
                 await db.payment_transactions.update_one(
                     {"session_id": webhook_response.session_id},
@@ -1674,110 +2291,351 @@ async def stripe_webhook(request: Request):
 @api_router.get("/reading-plan")
 async def get_reading_plan(page: int = 1, limit: int = 30):
     """Get the Bible in a Year reading plan"""
-    from reading_plan import BIBLE_IN_A_YEAR_PLAN
+    plan = content_store.get_reading_plan()
     start = (page - 1) * limit
     end = start + limit
-    readings = BIBLE_IN_A_YEAR_PLAN[start:end]
+    readings = plan[start:end]
     return {
         "readings": readings,
-        "total": len(BIBLE_IN_A_YEAR_PLAN),
+        "total": len(plan),
         "page": page,
-        "pages": (len(BIBLE_IN_A_YEAR_PLAN) + limit - 1) // limit,
+        "pages": (len(plan) + limit - 1) // limit,
         "description": "Read through the entire Bible in one year with daily Old and New Testament readings"
     }
 
 @api_router.get("/reading-plan/today")
-async def get_today_reading():
-    """Get today's reading from the Bible in a Year plan"""
-    from reading_plan import get_today_reading
-    reading = get_today_reading()
-    day_of_year = datetime.now(timezone.utc).timetuple().tm_yday
-    return {
-        **reading,
-        "date": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
-        "day_of_year": day_of_year
-    }
+async def get_today_reading(request: Request):
+    """Get today's reading from the Bible in a Year plan in the caller's timezone"""
+    offset = await resolve_utc_offset(request)
+    return Response(content=get_today_entry(offset)["reading"], media_type="application/json")
 
 @api_router.get("/reading-plan/day/{day}")
 async def get_reading_by_day(day: int):
     """Get reading for a specific day"""
-    from reading_plan import get_reading_by_day
-    reading = get_reading_by_day(day)
-    if not reading:
+    plan = content_store.get_reading_plan()
+    if day < 1 or day > len(plan):
         raise HTTPException(status_code=404, detail="Reading not found for this day")
-    return reading
+    return plan[day - 1]
+
+@api_router.get("/reading-plan/day/{day}/text")
+async def get_reading_text(day: int):
+    """Get the full text of every chapter in a day's reading in one response"""
+    plan = content_store.get_reading_plan()
+    if day < 1 or day > len(plan):
+        raise HTTPException(status_code=404, detail="Reading not found for this day")
+    entry = plan[day - 1]
+
+    chapters = await asyncio.gather(*(
+        fetch_chapter(segment["book"], segment["chapter"]) for segment in entry["segments"]
+    ))
+
+    passages = []
+    for segment, chapter in zip(entry["segments"], chapters):
+        if chapter:
+            verses, translation = chapter["verses"], chapter["translation"]
+        else:
+            verses = SAMPLE_VERSES.get(f"{segment['book']}_{segment['chapter']}", [])
+            translation = "King James Version"
+        if segment["verses"]:
+            first, last = segment["verses"]
+            verses = [v for v in verses if first <= v["verse"] <= last]
+        passages.append({
+            "book": segment["book"],
+            "chapter": segment["chapter"],
+            "chapter_id": segment["chapter_id"],
+            "verses": verses,
+            "translation": translation,
+            "available": bool(verses),
+        })
+
+    return {
+        "day": entry["day"],
+        "theme": entry["theme"],
+        "verse_count": entry["verse_count"],
+        "reading_minutes": entry["reading_minutes"],
+        "passages": passages,
+    }
+
+async def resolve_plan_run(user: dict, plan_id: Optional[str], start_date: Optional[str], year: Optional[int]):
+    """Work out which run of which plan a progress request is about.
+
+    The calendar plan runs Jan 1 - Dec 31 of `year` (default: this year);
+    generated plans run from the user's start_date. Returns (progress key,
+    total days, today's day in the plan).
+    """
+    today = datetime.now(timezone.utc).date()
+    if not plan_id or plan_id == reading_progress.DEFAULT_PLAN_ID:
+        plan_id = reading_progress.DEFAULT_PLAN_ID
+        plan_year = year or today.year
+        start = datetime(plan_year, 1, 1).date()
+        total_days = len(content_store.get_reading_plan())
+        if plan_year == today.year:
+            today_day, _ = plan_day_for_date(today)
+        else:
+            today_day = total_days if plan_year < today.year else 0
+    else:
+        start = parse_start_date(start_date)
+        if not start:
+            raise HTTPException(status_code=400, detail="start_date is required for generated plans")
+        _, plan = await load_generated_plan(plan_id)
+        total_days = len(plan)
+        today_day = min(max((today - start).days + 1, 0), total_days)
+    return reading_progress.progress_key(user["user_id"], plan_id, start), total_days, today_day
+
+async def plan_chapter_ids(plan_id: str, days) -> set:
+    """Chapter ids covered by some days of a plan"""
+    if plan_id == reading_progress.DEFAULT_PLAN_ID:
+        plan = content_store.get_reading_plan()
+    else:
+        _, plan = await load_generated_plan(plan_id)
+    return {number for day in days for number in plan[day - 1].get("chapter_ids", [])}
 
 @api_router.get("/reading-plan/progress")
-async def get_reading_progress(request: Request):
+async def get_reading_progress(
+    request: Request,
+    plan_id: Optional[str] = None,
+    start_date: Optional[str] = None,
+    year: Optional[int] = Query(None, ge=1, le=9999)
+):
     """Get user's reading plan progress"""
     user = await get_current_user(request)
+    key, total_days, today_day = await resolve_plan_run(user, plan_id, start_date, year)
     
-    # Get completed readings
-    completed = await db.reading_progress.find(
-        {"user_id": user["user_id"]},
-        {"_id": 0}
-    ).to_list(400)
-    
-    completed_days = set(r["day"] for r in completed)
-    current_streak = 0
-    
-    # Calculate streak
-    today = datetime.now(timezone.utc).timetuple().tm_yday
-    for i in range(today, 0, -1):
-        if i in completed_days:
-            current_streak += 1
-        else:
-            break
+    progress = await reading_progress.get_progress(db, key, total_days)
+    bits = reading_progress.unpack_bits(progress)
+    completed_count = progress["completed_count"]
     
     return {
-        "completed_days": len(completed_days),
-        "total_days": 365,
-        "progress_percentage": round((len(completed_days) / 365) * 100, 1),
-        "current_streak": current_streak,
-        "completed_list": sorted(list(completed_days))
+        "plan_id": key["plan_id"],
+        "plan_start": key["plan_start"],
+        "completed_days": completed_count,
+        "total_days": total_days,
+        "progress_percentage": round((completed_count / total_days) * 100, 1),
+        "current_streak": reading_progress.current_streak(bits, today_day),
+        "completed_list": reading_progress.completed_days(bits)
     }
 
+@api_router.get("/reading-plan/history")
+async def get_reading_history(request: Request):
+    """Get the user's reading plan completion for every year they have read"""
+    user = await get_current_user(request)
+    return {"years": await reading_progress.get_history(db, user["user_id"])}
+
+async def recount_reading_stats():
+    """Recount the community reading counters from everyone's progress, on one worker"""
+    try:
+        if not await job_lock.acquire(db, "reading_stats_recount", READING_STATS_RECOUNT_LOCK_SECONDS):
+            return
+        runs = await reading_progress.recount_stats(db)
+        logger.info(f"Community reading stats recounted from {runs} plan runs")
+    except Exception as e:
+        logger.warning(f"Community reading stats recount failed: {e}")
+
+@api_router.get("/reading-plan/community")
+async def get_community_stats(
+    request: Request,
+    plan_id: Optional[str] = None,
+    year: Optional[int] = Query(None, ge=1, le=9999),
+    day: Optional[int] = None
+):
+    """How many readers finished a day (default: today's), plus the signed-in reader's streak rank"""
+    plan_id = plan_id or reading_progress.DEFAULT_PLAN_ID
+    today = datetime.now(timezone.utc).date()
+    plan_year = year or today.year
+    if day is None:
+        if plan_id != reading_progress.DEFAULT_PLAN_ID:
+            raise HTTPException(status_code=400, detail="day is required for generated plans")
+        day, _ = plan_day_for_date(today)
+    
+    stats = await reading_stats.get_day_stats(read_db, plan_id, plan_year, day)
+    readers = stats["readers"]
+    result = {
+        "plan_id": plan_id,
+        "year": plan_year,
+        "day": day,
+        "completed": stats["completions"],
+        "readers": readers,
+        "completion_rate": round(stats["completions"] / readers * 100, 1) if readers else 0.0,
+        "popular_days": stats["popular_days"]
+    }
+    
+    # Signed-in readers also get where their longest streak ranks
+    if get_request_token(request):
+        try:
+            user = await get_current_user(request)
+        except HTTPException:
+            user = None
+        if user:
+            run = await db[reading_progress.PROGRESS_COLLECTION].find_one(
+                {"user_id": user["user_id"], "plan_id": plan_id, "plan_year": plan_year},
+                {"_id": 0, "longest_streak": 1},
+                sort=[("updated_at", -1)]
+            )
+            longest = (run or {}).get("longest_streak", 0)
+            result["longest_streak"] = longest
+            result["streak_percentile"] = reading_stats.streak_percentile(stats["streak_counts"], readers, longest)
+    
+    return result
+
 @api_router.post("/reading-plan/complete/{day}")
-async def mark_reading_complete(day: int, request: Request):
+async def mark_reading_complete(
+    day: int,
+    request: Request,
+    plan_id: Optional[str] = None,
+    start_date: Optional[str] = None,
+    year: Optional[int] = Query(None, ge=1, le=9999)
+):
     """Mark a day's reading as complete"""
     user = await get_current_user(request)
+    key, total_days, _ = await resolve_plan_run(user, plan_id, start_date, year)
     
-    if day < 1 or day > 365:
+    if day < 1 or day > total_days:
         raise HTTPException(status_code=400, detail="Invalid day number")
     
-    # Check if already completed
-    existing = await db.reading_progress.find_one({
-        "user_id": user["user_id"],
-        "day": day
-    })
-    
-    if existing:
+    if not await reading_progress.set_day(db, key, day, True, total_days):
         return {"message": "Already completed", "day": day}
-    
-    # Mark as complete
-    await db.reading_progress.insert_one({
-        "user_id": user["user_id"],
-        "day": day,
-        "completed_at": datetime.now(timezone.utc).isoformat()
-    })
+    await chapter_coverage.mark_read(db, user["user_id"], await plan_chapter_ids(key["plan_id"], [day]))
     
     return {"message": "Reading marked as complete", "day": day}
 
 @api_router.delete("/reading-plan/complete/{day}")
-async def unmark_reading_complete(day: int, request: Request):
+async def unmark_reading_complete(
+    day: int,
+    request: Request,
+    plan_id: Optional[str] = None,
+    start_date: Optional[str] = None,
+    year: Optional[int] = Query(None, ge=1, le=9999)
+):
     """Unmark a day's reading as complete"""
     user = await get_current_user(request)
+    key, total_days, _ = await resolve_plan_run(user, plan_id, start_date, year)
     
-    result = await db.reading_progress.delete_one({
-        "user_id": user["user_id"],
-        "day": day
-    })
-    
-    if result.deleted_count == 0:
+    if not 1 <= day <= total_days or not await reading_progress.set_day(db, key, day, False, total_days):
         raise HTTPException(status_code=404, detail="Reading was not marked as complete")
     
     return {"message": "Reading unmarked", "day": day}
 
+@api_router.post("/reading-plan/progress/bulk")
+async def update_reading_progress_bulk(update: ReadingProgressBulk, request: Request):
+    """Mark or unmark a list of days and/or [start, end] ranges in one update"""
+    user = await get_current_user(request)
+    key, total_days, _ = await resolve_plan_run(user, update.plan_id, update.start_date, update.year)
+    
+    days = set(update.days)
+    for day_range in update.ranges:
+        if len(day_range) != 2 or not 1 <= day_range[0] <= day_range[1] <= total_days:
+            raise HTTPException(status_code=400, detail=f"Ranges must be [start, end] within days 1-{total_days}")
+        days.update(range(day_range[0], day_range[1] + 1))
+    
+    if not days:
+        raise HTTPException(status_code=400, detail="No days given")
+    if min(days) < 1 or max(days) > total_days:
+        raise HTTPException(status_code=400, detail="Invalid day number")
+    
+    changed, completed_count = await reading_progress.set_days(db, key, days, update.completed, total_days)
+    if update.completed and changed:
+        await chapter_coverage.mark_read(db, user["user_id"], await plan_chapter_ids(key["plan_id"], changed))
+    
+    changed = set(changed)
+    if update.completed:
+        statuses = ("completed", "already_completed")
+    else:
+        statuses = ("uncompleted", "not_completed")
+    
+    return {
+        "results": [
+            {"day": day, "status": statuses[0] if day in changed else statuses[1]}
+            for day in sorted(days)
+        ],
+        "changed": len(changed),
+        "completed_days": completed_count
+    }
+
+# ==================== GENERATED READING PLANS ====================
+
+def parse_start_date(start_date: Optional[str]):
+    if not start_date:
+        return None
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start_date must be YYYY-MM-DD")
+    # Leave room for the plan's last day before the end of the calendar
+    if start > date.max - timedelta(days=plan_engine.MAX_PLAN_DAYS):
+        raise HTTPException(status_code=400, detail="start_date is too far in the future")
+    return start
+
+async def load_generated_plan(plan_id: str):
+    """Look up a generated plan's parameters and return (params, days)"""
+    doc = await db.reading_plans.find_one({"plan_id": plan_id}, {"_id": 0, "params": 1})
+    if not doc:
+        raise HTTPException(status_code=404, detail="Reading plan not found")
+    return doc["params"], plan_engine.generate_plan(doc["params"])
+
+@api_router.get("/reading-plans")
+async def list_plan_templates():
+    """List the reading plans that can be generated"""
+    templates = [
+        {"template": key, "name": spec["name"], "description": spec["description"], "days": spec["days"]}
+        for key, spec in plan_engine.PLAN_TEMPLATES.items()
+    ]
+    return {"templates": templates, "max_days": plan_engine.MAX_PLAN_DAYS}
+
+@api_router.post("/reading-plans")
+async def create_reading_plan(plan_request: ReadingPlanCreate, request: Request):
+    """Generate a reading plan; identical requests return the same plan"""
+    await get_current_user(request)
+    start = parse_start_date(plan_request.start_date)
+    try:
+        params = plan_engine.normalize_params(plan_request.template, plan_request.days, plan_request.books)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    plan = plan_engine.generate_plan(params)
+    summary = plan_engine.plan_summary(params, plan)
+    
+    await db.reading_plans.update_one(
+        {"plan_id": summary["plan_id"]},
+        {"$setOnInsert": {
+            "plan_id": summary["plan_id"],
+            "params": params,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }},
+        upsert=True
+    )
+    
+    if start:
+        summary["start_date"] = start.isoformat()
+        summary["end_date"] = (start + timedelta(days=len(plan) - 1)).isoformat()
+    return summary
+
+@api_router.get("/reading-plans/{plan_id}")
+async def get_generated_plan(plan_id: str, page: int = 1, limit: int = 30, start_date: Optional[str] = None):
+    """Get a page of a generated plan, dated from start_date if given"""
+    start = parse_start_date(start_date)
+    params, plan = await load_generated_plan(plan_id)
+    
+    readings = plan[(page - 1) * limit:page * limit]
+    if start:
+        readings = [
+            {**reading, "date": (start + timedelta(days=reading["day"] - 1)).isoformat()}
+            for reading in readings
+        ]
+    return {
+        **plan_engine.plan_summary(params, plan),
+        "readings": list(readings),
+        "page": page,
+        "pages": (len(plan) + limit - 1) // limit
+    }
+
+@api_router.get("/reading-plans/{plan_id}/day/{day}")
+async def get_generated_plan_day(plan_id: str, day: int):
+    """Get one day of a generated plan"""
+    params, plan = await load_generated_plan(plan_id)
+    if day < 1 or day > len(plan):
+        raise HTTPException(status_code=404, detail="Reading not found for this day")
+    return plan[day - 1]
+
 # ==================== MEDIA LIBRARY (PREMIUM) ====================
 
 # Video sermons - Using public domain/freely licensed content about end times prophecy
@@ -1956,22 +2814,16 @@ async def track_media(media_id: str, request: Request):
     """Mark a video/audio as watched/listened"""
     user = await get_premium_user(request)
     
-    # Check if already tracked
-    existing = await db.media_history.find_one({
-        "user_id": user["user_id"],
-        "media_id": media_id
-    })
+    # One upsert, so two taps at once cannot both insert
+    result = await db.media_history.update_one(
+        {"user_id": user["user_id"], "media_id": media_id},
+        {"$setOnInsert": {"watched_at": datetime.now(timezone.utc).isoformat()}},
+        upsert=True
+    )
     
-    if existing:
+    if result.upserted_id is None:
         return {"message": "Already tracked", "media_id": media_id}
     
-    # Add to history
-    await db.media_history.insert_one({
-        "user_id": user["user_id"],
-        "media_id": media_id,
-        "watched_at": datetime.now(timezone.utc).isoformat()
-    })
-    
     return {"message": "Media tracked successfully", "media_id": media_id}
 
 @api_router.delete("/media/track/{media_id}")
@@ -1990,16 +2842,15 @@ async def untrack_media(media_id: str, request: Request):
     return {"message": "Media untracked", "media_id": media_id}
 
 @api_router.get("/media/history")
-async def get_media_history(request: Request):
+async def get_media_history(request: Request, cursor: Optional[str] = None, limit: int = 100):
     """Get user's media watch/listen history"""
     user = await get_premium_user(request)
     
-    history = await db.media_history.find(
-        {"user_id": user["user_id"]},
-        {"_id": 0}
-    ).sort("watched_at", -1).to_list(100)
+    history, next_cursor = await fetch_page(
+        db.media_history, {"user_id": user["user_id"]}, "watched_at", "media_id", limit, cursor
+    )
     
-    return {"history": history}
+    return {"history": history, "next_cursor": next_cursor}
 
 # ==================== NOTIFICATION PREFERENCES ====================
 
@@ -2203,6 +3054,77 @@ async def start_scheduler():
         id="daily_news_notification",
         replace_existing=True
     )
+    try:
+        await reading_progress.migrate_progress_keys(db)
+    except Exception as e:
+        logger.warning(f"Reading progress migration failed: {e}")
+    failed = await db_indexes.apply_indexes(db)
+    if failed:
+        logger.warning(f"{len(failed)} indexes could not be created, see /api/admin/indexes")
+    try:
+        await forum_votes.migrate_embedded_votes(db)
+    except Exception as e:
+        logger.warning(f"Forum vote migration failed: {e}")
+    try:
+        backfilled = await scripture_refs.backfill_posts(db)
+        if backfilled:
+            logger.info(f"Parsed scripture references of {backfilled} forum posts")
+    except Exception as e:
+        logger.warning(f"Scripture reference backfill failed: {e}")
+    await recount_reading_stats()
+    scheduler.add_job(
+        recount_reading_stats,
+        CronTrigger(hour=3, minute=30),
+        id="reading_stats_recount",
+        replace_existing=True
+    )
+    await recount_forum_votes()
+    scheduler.add_job(
+        recount_forum_votes,
+        CronTrigger(hour=3, minute=45),
+        id="forum_vote_recount",
+        replace_existing=True
+    )
+    await refresh_forum_scores()
+    scheduler.add_job(
+        refresh_forum_scores,
+        IntervalTrigger(seconds=FORUM_RANKING_REFRESH_SECONDS),
+        id="forum_ranking_refresh",
+        replace_existing=True
+    )
+    await calibrate_password_cost()
+    await sync_revoked_tokens()
+    scheduler.add_job(
+        sync_revoked_tokens,
+        IntervalTrigger(seconds=REVOCATION_SYNC_SECONDS),
+        id="revoked_token_sync",
+        replace_existing=True
+    )
+    # Load the published content before building anything from it
+    try:
+        await content_store.seed_content(db)
+    except Exception as e:
+        logger.warning(f"Content seed failed, serving bundled content: {e}")
+    await sync_content_snapshot()
+    scheduler.add_job(
+        sync_content_snapshot,
+        IntervalTrigger(seconds=CONTENT_POLL_SECONDS),
+        id="content_sync",
+        replace_existing=True
+    )
+
+    # Roll the per-timezone "today" payloads over at every local midnight
+    refresh_today_cache(force=True)
+
+    # Build the devotional search index up front instead of on the first query
+    from devotional_search import get_index
+    get_index(content_store.get_devotionals())
+    scheduler.add_job(
+        refresh_today_cache,
+        CronTrigger(minute="0,15,30,45"),
+        id="today_cache_refresh",
+        replace_existing=True
+    )
     scheduler.start()
     logger.info("Push notification scheduler started - daily news at 7:00 AM UTC")
 
@@ -2229,6 +3151,105 @@ async def test_push_notification(request: Request):
     else:
         raise HTTPException(status_code=400, detail="No push subscription found or notification failed")
 
+# ==================== CONTENT PUBLISHING (ADMIN) ====================
+
+async def sync_content_snapshot():
+    """Poll the content version stamps and swap in any published changes"""
+    try:
+        changed = await content_store.sync_content(db)
+    except Exception as e:
+        logger.warning(f"Content sync failed: {e}")
+        return
+    if changed:
+        refresh_today_cache(force=True)
+    if "devotionals" in changed:
+        from devotional_search import get_index
+        get_index(content_store.get_devotionals())
+
+@api_router.get("/admin/content/versions")
+async def get_content_versions(request: Request):
+    require_admin(request)
+    return {"versions": content_store.get_content_versions()}
+
+@api_router.put("/admin/content/devotionals/{day}")
+async def publish_devotional(day: int, update: DevotionalUpdate, request: Request):
+    """Publish a corrected devotional to every worker"""
+    require_admin(request)
+    fields = update.dict(exclude_none=True)
+    if not fields:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    devotional = await content_store.publish_item(db, "devotionals", day, fields)
+    if not devotional:
+        raise HTTPException(status_code=404, detail="Devotional not found for this day")
+    await sync_content_snapshot()
+    return devotional
+
+@api_router.put("/admin/content/reading-plan/{day}")
+async def publish_reading_plan_day(day: int, update: ReadingPlanDayUpdate, request: Request):
+    """Publish a corrected reading-plan day to every worker"""
+    require_admin(request)
+    fields = update.dict(exclude_none=True)
+    if not fields:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    if "readings" in fields:
+        try:
+            expand_day({"readings": fields["readings"]})
+        except (KeyError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid readings: {e}")
+    reading = await content_store.publish_item(db, "reading_plan", day, fields)
+    if not reading:
+        raise HTTPException(status_code=404, detail="Reading not found for this day")
+    await sync_content_snapshot()
+    return reading
+
+# ==================== METRICS (ADMIN) ====================
+
+@api_router.get("/admin/metrics")
+async def get_metrics(request: Request):
+    """In-process cache counters for this worker"""
+    require_admin(request)
+    lookups = user_cache_stats["hits"] + user_cache_stats["misses"]
+    return {
+        "user_cache": {
+            **user_cache_stats,
+            "size": len(user_cache),
+            "ttl_seconds": USER_CACHE_TTL,
+            "hit_rate": round(user_cache_stats["hits"] / lookups, 3) if lookups else 0.0
+        },
+        "password_hashing": {
+            **password_job_stats,
+            "cost": password_cost,
+            "rehashes_in_flight": len(rehash_tasks),
+            "workers": PASSWORD_HASH_WORKERS,
+            "max_pending": PASSWORD_HASH_MAX_PENDING
+        },
+        "token_revocation": token_revocation.filter_stats(),
+        "rate_limits": {
+            **rate_limit.limit_stats,
+            "backend": rate_limit.RATE_LIMIT_BACKEND,
+            "tracked_keys": rate_limit.tracked_keys()
+        },
+        "chapter_cache": {
+            "size": len(chapter_cache),
+            "in_flight": len(chapter_fetches)
+        },
+        "mongo_pool": {
+            **mongo_pool.pool_stats(),
+            "read_preference": READ_PREFERENCE.mongos_mode
+        }
+    }
+
+@api_router.get("/admin/indexes")
+async def get_index_report(request: Request):
+    """Index drift against the registry, and whether hot queries use an index"""
+    require_admin(request)
+    queries = await db_indexes.explain_hot_queries(db)
+    return {
+        "drift": await db_indexes.index_drift(db),
+        "queries": queries,
+        "collection_scans": [q["query"] for q in queries if not q["uses_index"]]
+    }
+
 # ==================== HEALTH CHECK ====================
 
 @api_router.get("/")
@@ -2260,3 +3281,5 @@ app.add_middleware(
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
+    await bible_api_http.aclose()
+    password_executor.shutdown(wait=False)
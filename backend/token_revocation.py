@@ -0,0 +1,158 @@
+# Revoked access tokens
+#
+# Revocations are stored in `revoked_tokens` by token id (jti) until the
+# token would have expired anyway; a TTL index clears them after that. Every
+# worker mirrors the ids in a bloom filter, so checking a token that was never
+# revoked (nearly all of them) touches no database. Only a filter hit is
+# confirmed against Mongo, since the filter may give false positives.
+#
+# The filter picks up other workers' revocations on every sync (new entries
+# since the last one), and is rebuilt from scratch every REBUILD_EVERY syncs,
+# or once it holds more ids than it was sized for, so expired ids stop taking
+# up space.
+#
+# Changing a user (a new name, going premium) makes the claims in their
+# outstanding access tokens stale. The change raises the user's minimum token
+# version in `token_versions`, kept for one access-token lifetime, and each
+# worker mirrors those minimums on the same sync. A token whose `ver` is below
+# the minimum is not trusted for its claims; the caller reads the user instead.
+
+from datetime import datetime, timedelta, timezone
+import hashlib
+import math
+
+REVOKED_COLLECTION = "revoked_tokens"
+VERSIONS_COLLECTION = "token_versions"
+FALSE_POSITIVE_RATE = 0.01
+MIN_CAPACITY = 10000
+REBUILD_EVERY = 60
+SYNC_OVERLAP_SECONDS = 5
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = FALSE_POSITIVE_RATE):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.capacity = capacity
+        self.count = 0
+
+    def _positions(self, key: str):
+        # Double hashing: position i is h1 + i * h2
+        digest = hashlib.sha256(key.encode()).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+_filter = BloomFilter(MIN_CAPACITY)
+_rebuilding = None  # filter being rebuilt, so revocations made meanwhile land in it too
+_min_versions = {}  # user_id -> (minimum token version, until)
+_synced_until = None
+_syncs = 0
+revocation_stats = {"checks": 0, "filter_hits": 0, "false_positives": 0}
+
+async def revoke(db, jti: str, expires_at: datetime, user_id: str = None):
+    """Revoke a token until it expires"""
+    await db[REVOKED_COLLECTION].update_one(
+        {"jti": jti},
+        {"$setOnInsert": {
+            "jti": jti,
+            "user_id": user_id,
+            "revoked_at": datetime.now(timezone.utc).isoformat(),
+            "expires_at": expires_at
+        }},
+        upsert=True
+    )
+    _filter.add(jti)
+    if _rebuilding is not None:
+        _rebuilding.add(jti)
+
+def _note_min_version(user_id: str, version: int, until: datetime):
+    current = _min_versions.get(user_id)
+    if current is None or version > current[0]:
+        _min_versions[user_id] = (version, until)
+    elif until > current[1]:
+        _min_versions[user_id] = (current[0], until)
+
+async def raise_min_version(db, user_id: str, version: int, until: datetime):
+    """Stop trusting the claims of this user's tokens older than `version` until `until`"""
+    await db[VERSIONS_COLLECTION].update_one(
+        {"user_id": user_id},
+        {
+            "$max": {"min_version": version, "expires_at": until},
+            "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}
+        },
+        upsert=True
+    )
+    _note_min_version(user_id, version, until)
+
+def min_version(user_id: str) -> int:
+    """Lowest token version whose claims can be trusted for this user"""
+    entry = _min_versions.get(user_id)
+    if entry is None:
+        return 0
+    if entry[1] <= datetime.now(timezone.utc):
+        # Every token older than the minimum has expired by now
+        _min_versions.pop(user_id, None)
+        return 0
+    return entry[0]
+
+async def sync(db):
+    """Bring this worker's filter up to date with revocations made anywhere"""
+    global _filter, _rebuilding, _synced_until, _syncs
+    collection = db[REVOKED_COLLECTION]
+    now = datetime.now(timezone.utc)
+    # Overlap the previous sync a little to allow for clock skew between workers
+    synced_until = (now - timedelta(seconds=SYNC_OVERLAP_SECONDS)).isoformat()
+
+    versions_query = {"expires_at": {"$gt": now}}
+    if _synced_until is not None:
+        versions_query["updated_at"] = {"$gte": _synced_until}
+    async for doc in db[VERSIONS_COLLECTION].find(versions_query, {"_id": 0}):
+        until = doc["expires_at"] if doc["expires_at"].tzinfo else doc["expires_at"].replace(tzinfo=timezone.utc)
+        _note_min_version(doc["user_id"], doc["min_version"], until)
+
+    if _synced_until is None or _syncs % REBUILD_EVERY == 0 or _filter.count > _filter.capacity:
+        for user_id in [user_id for user_id, (_, until) in _min_versions.items() if until <= now]:
+            del _min_versions[user_id]
+        query = {"expires_at": {"$gt": now}}
+        capacity = max(MIN_CAPACITY, 2 * await collection.count_documents(query))
+        _rebuilding = BloomFilter(capacity)
+        try:
+            async for doc in collection.find(query, {"_id": 0, "jti": 1}):
+                _rebuilding.add(doc["jti"])
+            _filter = _rebuilding
+        finally:
+            _rebuilding = None
+    else:
+        async for doc in collection.find({"revoked_at": {"$gte": _synced_until}}, {"_id": 0, "jti": 1}):
+            if doc["jti"] not in _filter:
+                _filter.add(doc["jti"])
+    _synced_until = synced_until
+    _syncs += 1
+
+async def is_revoked(db, jti: str) -> bool:
+    revocation_stats["checks"] += 1
+    if jti not in _filter:
+        return False
+    revocation_stats["filter_hits"] += 1
+    if await db[REVOKED_COLLECTION].find_one({"jti": jti}, {"_id": 1}):
+        return True
+    revocation_stats["false_positives"] += 1
+    return False
+
+def filter_stats() -> dict:
+    return {
+        **revocation_stats,
+        "filter_entries": _filter.count,
+        "filter_capacity": _filter.capacity,
+        "filter_bytes": len(_filter.bits),
+        "min_versions": len(_min_versions),
+    }
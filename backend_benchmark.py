@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""Latency benchmarks against a running API.
+
+    python backend_benchmark.py user-cache [base_url] [rounds]
+        Access tokens carry the user's claims, which replaced the user
+        cache for ordinary requests: the cache now only serves tokens issued
+        before a change to the user (and pre-session tokens). Times GET
+        /auth/me with a current token, then with one made stale by renaming
+        the user. Run once against a server started with USER_CACHE_TTL=0
+        and once with the default to see what the cache saves on the stale
+        path.
+
+    python backend_benchmark.py login-storm [base_url] [rounds]
+        Times GET /health on its own, then again while concurrent logins
+        hammer bcrypt. p99 should stay flat while hashing is off the event loop.
+        Raise RATE_LIMIT_LOGIN and RATE_LIMIT_LOGIN_ACCOUNT on the server
+        first (e.g. "100000/60"), or most logins are turned away with a 429.
+
+    python backend_benchmark.py vote-race [base_url] [rounds]
+        Toggles one post's upvote from many threads at once, then checks the
+        stored count still matches whether the vote exists, and that a
+        repeated Idempotency-Key does not toggle twice. Needs a premium
+        user's token in PREMIUM_TOKEN.
+
+Set ADMIN_API_KEY to also print the server's cache and hashing counters.
+"""
+
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+import requests
+
+LOGIN_STORM_THREADS = 16
+VOTE_RACE_THREADS = 16
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def report(label, timings):
+    print(f"{label} x {len(timings)}")
+    print(f"   mean {statistics.mean(timings):.2f} ms")
+    print(f"   p50  {percentile(timings, 50):.2f} ms")
+    print(f"   p95  {percentile(timings, 95):.2f} ms")
+    print(f"   p99  {percentile(timings, 99):.2f} ms")
+
+def time_requests(session, url, rounds, headers=None):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        session.get(url, headers=headers).raise_for_status()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def register(session, base_url):
+    email = f"bench_{uuid.uuid4().hex[:8]}@example.com"
+    password = "benchpass123"
+    resp = session.post(f"{base_url}/auth/register", json={
+        "email": email, "password": password, "name": "Benchmark User"
+    })
+    resp.raise_for_status()
+    return email, password, resp.json()["token"]
+
+def metrics(session, base_url):
+    admin_key = os.environ.get("ADMIN_API_KEY")
+    if not admin_key:
+        return None
+    resp = session.get(f"{base_url}/admin/metrics", headers={"X-Admin-Key": admin_key})
+    return resp.json() if resp.ok else None
+
+def bench_user_cache(session, base_url, rounds):
+    _, _, token = register(session, base_url)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    report("GET /auth/me (current token)", time_requests(session, f"{base_url}/auth/me", rounds, headers))
+
+    # Renaming bumps token_version, so this token is now answered via load_user
+    session.put(f"{base_url}/profile", json={"name": "Benchmark Renamed"}, headers=headers).raise_for_status()
+    before = metrics(session, base_url)
+    report("GET /auth/me (stale token)", time_requests(session, f"{base_url}/auth/me", rounds, headers))
+    after = metrics(session, base_url)
+    if before and after:
+        hits = after["user_cache"]["hits"] - before["user_cache"]["hits"]
+        misses = after["user_cache"]["misses"] - before["user_cache"]["misses"]
+        print(f"   user cache: {hits} hits, {misses} misses (ttl {after['user_cache']['ttl_seconds']}s)")
+
+def bench_login_storm(session, base_url, rounds):
+    email, password, _ = register(session, base_url)
+    report("GET /health (idle)", time_requests(session, f"{base_url}/health", rounds))
+
+    stop = threading.Event()
+    outcomes = {"ok": 0, "limited": 0, "busy": 0, "failed": 0}
+    lock = threading.Lock()
+
+    def storm():
+        storm_session = requests.Session()
+        while not stop.is_set():
+            resp = storm_session.post(f"{base_url}/auth/login", json={"email": email, "password": password})
+            outcome = {200: "ok", 429: "limited", 503: "busy"}.get(resp.status_code, "failed")
+            with lock:
+                outcomes[outcome] += 1
+
+    threads = [threading.Thread(target=storm, daemon=True) for _ in range(LOGIN_STORM_THREADS)]
+    for thread in threads:
+        thread.start()
+    time.sleep(1)
+    try:
+        report("GET /health (login storm)", time_requests(session, f"{base_url}/health", rounds))
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    print(f"   logins: {outcomes['ok']} ok, {outcomes['limited']} rate limited (429), "
+          f"{outcomes['busy']} turned away (503), {outcomes['failed']} failed")
+
+    after = metrics(session, base_url)
+    if after:
+        hashing = after["password_hashing"]
+        print(f"   hashing: peak {hashing['peak_pending']} pending of {hashing['max_pending']}, "
+              f"{hashing['rejected']} rejected")
+
+def bench_vote_race(session, base_url, rounds):
+    token = os.environ.get("PREMIUM_TOKEN")
+    if not token:
+        print("vote-race needs a premium user's token in PREMIUM_TOKEN")
+        return
+    headers = {"Authorization": f"Bearer {token}"}
+    resp = session.post(f"{base_url}/forum/posts", headers=headers, json={
+        "title": "Vote race", "content": "Benchmark post, safe to delete"
+    })
+    resp.raise_for_status()
+    post_id = resp.json()["post_id"]
+    upvote_url = f"{base_url}/forum/posts/{post_id}/upvote"
+
+    timings = []
+    failures = []
+    lock = threading.Lock()
+
+    def toggle(count):
+        toggle_session = requests.Session()
+        for _ in range(count):
+            start = time.perf_counter()
+            resp = toggle_session.post(upvote_url, headers=headers)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                if resp.ok:
+                    timings.append(elapsed)
+                else:
+                    failures.append(resp.status_code)
+
+    per_thread = max(1, rounds // VOTE_RACE_THREADS)
+    threads = [threading.Thread(target=toggle, args=(per_thread,)) for _ in range(VOTE_RACE_THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report(f"POST /forum/posts/{{id}}/upvote ({VOTE_RACE_THREADS} threads)", timings)
+    if failures:
+        print(f"   {len(failures)} toggles failed: {sorted(set(failures))}")
+
+    detail = session.get(f"{base_url}/forum/posts/{post_id}", headers=headers).json()["post"]
+    expected = 1 if detail["upvoted"] else 0
+    verdict = "exact" if detail["upvotes"] == expected else "WRONG"
+    print(f"   final count {detail['upvotes']}, vote {'present' if detail['upvoted'] else 'absent'}: {verdict}")
+
+    key_headers = {**headers, "Idempotency-Key": uuid.uuid4().hex}
+    first = session.post(upvote_url, headers=key_headers).json()
+    retry = session.post(upvote_url, headers=key_headers).json()
+    verdict = "replayed" if retry == first else "TOGGLED TWICE"
+    print(f"   repeated Idempotency-Key: {verdict} (upvotes {first['upvotes']} -> {retry['upvotes']})")
+
+BENCHMARKS = {
+    "user-cache": bench_user_cache,
+    "login-storm": bench_login_storm,
+    "vote-race": bench_vote_race,
+}
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        print(f"Usage: {sys.argv[0]} {{{'|'.join(BENCHMARKS)}}} [base_url] [rounds]")
+        return 1
+    base_url = sys.argv[2] if len(sys.argv) > 2 else "http://localhost:8001/api"
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    BENCHMARKS[sys.argv[1]](requests.Session(), base_url, rounds)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
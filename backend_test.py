@@ -220,7 +220,21 @@ class ProphecyNewsStudyBibleAPITester:
             print(f"   Today's devotional: '{today_data.get('title', 'N/A')}'")
             day_of_year = today_data.get('day_of_year', 0)
             print(f"   Day of year: {day_of_year}")
-        
+
+        # Timezones on either side of the date line must never be more than a day apart
+        success, west_data = self.run_test("Today's Devotional (UTC-12)", "GET", "devotional/today", 200,
+                                           headers={"X-UTC-Offset": "-12:00"})
+        success2, east_data = self.run_test("Today's Devotional (UTC+14)", "GET", "devotional/today", 200,
+                                            headers={"X-Timezone": "Pacific/Kiritimati"})
+        if success and success2:
+            west = datetime.strptime(west_data.get('date'), "%Y-%m-%d")
+            east = datetime.strptime(east_data.get('date'), "%Y-%m-%d")
+            if (east - west).days in (1, 2):
+                self.log_result("Timezone-aware Devotional Date", True)
+            else:
+                self.log_result("Timezone-aware Devotional Date", False,
+                                f"UTC-12 date {west_data.get('date')}, UTC+14 date {east_data.get('date')}")
+
         success, all_data = self.run_test("Get All Devotionals", "GET", "devotional/all", 200)
         if success and all_data.get('devotionals'):
             devotionals = all_data['devotionals']
@@ -242,6 +256,20 @@ class ProphecyNewsStudyBibleAPITester:
         # Test invalid day
         self.run_test("Invalid Day (400)", "GET", "devotional/400", 404)
 
+        # Topic search across all 365 devotionals
+        success, search_data = self.run_test("Search Devotionals - 'fear'", "GET", "devotional/search?q=fear", 200)
+        if success:
+            results = search_data.get('results', [])
+            if results and '<mark>' in (results[0].get('snippet') or ''):
+                self.log_result("Devotional Search Highlights", True)
+                print(f"   Top result: Day {results[0]['day']} - {results[0]['title']} ({search_data.get('took_ms')} ms)")
+            else:
+                self.log_result("Devotional Search Highlights", False, "No highlighted results for 'fear'")
+
+        # Publishing corrections requires the admin key
+        self.run_test("Publish Devotional (No Admin Key)", "PUT", "admin/content/devotionals/1", 403,
+                      data={"title": "Should not publish"})
+
     def test_reading_plan_endpoints(self):
         """Test Bible in a Year reading plan endpoints"""
         print("\n📅 Testing Reading Plan Endpoints...")
@@ -343,10 +371,25 @@ class ProphecyNewsStudyBibleAPITester:
                 else:
                     reading_strs.append(str(reading))
             print(f"   Day 100: {day_data.get('theme', 'No theme')} - {', '.join(reading_strs)}")
-        
+
+        # Test full text of a day with a partial chapter (Psalm 119:1-88)
+        success, text_data = self.run_test("Get Day 178 Reading Text", "GET", "reading-plan/day/178/text", 200)
+        if success and text_data:
+            passages = text_data.get('passages', [])
+            psalm = next((p for p in passages if p.get('book') == 'Psalms'), None)
+            if psalm and all(1 <= v.get('verse', 0) <= 88 for v in psalm.get('verses', [])):
+                self.log_result("Reading Text Verse Range", True)
+                print(f"   Day 178: {len(passages)} passages, ~{text_data.get('reading_minutes')} min")
+            else:
+                self.log_result("Reading Text Verse Range", False, "Psalm 119 passage missing or not trimmed to 1-88")
+
         # Test invalid day
         self.run_test("Invalid Day Reading (400)", "GET", "reading-plan/day/400", 404)
 
+        # Generating a plan stores it, so it needs an account
+        self.run_test("Generate Plan Without Auth (401)", "POST", "reading-plans", 401,
+                      data={"template": "nt-90"})
+
     def test_auth_registration(self):
         """Test user registration"""
         print("\n👤 Testing User Registration...")
@@ -400,6 +443,23 @@ class ProphecyNewsStudyBibleAPITester:
             self.token = response['token']
             self.user_id = response.get('user_id')
             print(f"   Logged in successfully")
+            
+            # Refresh tokens rotate: the new one works, the old one is spent
+            refresh_token = response.get('refresh_token')
+            success, refreshed = self.run_test("Refresh Session", "POST", "auth/refresh", 200,
+                                               data={"refresh_token": refresh_token})
+            if success and refreshed.get('token'):
+                self.token = refreshed['token']
+                self.run_test("Reuse Spent Refresh Token", "POST", "auth/refresh", 401,
+                              data={"refresh_token": refresh_token})
+            
+            # A logged-out token is rejected even though it has not expired
+            success, second = self.run_test("Second Login", "POST", "auth/login", 200,
+                                            data={"email": email, "password": password})
+            if success and second.get('token'):
+                second_auth = {'Authorization': f"Bearer {second['token']}"}
+                self.run_test("Logout Second Session", "POST", "auth/logout", 200, data={}, headers=second_auth)
+                self.run_test("Use Logged-Out Token", "GET", "auth/me", 401, headers=second_auth)
 
     def test_auth_me(self):
         """Test get current user"""
@@ -463,6 +523,12 @@ class ProphecyNewsStudyBibleAPITester:
         )
         if success:
             print("   ✓ Profile update successful")
+            # The renamed user must not be served from a stale cache
+            success, me_data = self.run_test("Get Renamed User", "GET", "auth/me", 200)
+            if success and me_data.get('name') != "Updated Test User":
+                self.log_result("Renamed User Not Stale", False, f"Got name {me_data.get('name')}")
+        self.run_test("Metrics (No Admin Key)", "GET", "admin/metrics", 403)
+        self.run_test("Index Report (No Admin Key)", "GET", "admin/indexes", 403)
         
         # Test reading progress
         success, progress_data = self.run_test("Get Reading Progress", "GET", "profile/reading-progress", 200)
@@ -496,6 +562,16 @@ class ProphecyNewsStudyBibleAPITester:
             else:
                 self.log_result("Bible Chapters Count", False, f"Unexpected chapter count: {total_chapters}")
 
+        # Test the per-book heatmap agrees with the progress summary
+        success, heatmap_data = self.run_test("Get Reading Heatmap", "GET", "profile/reading-heatmap", 200)
+        if success and progress_data:
+            books = heatmap_data.get('books', [])
+            bookmarked = sum(book['bookmarked'] for book in books)
+            if len(books) == 66 and bookmarked == progress_data.get('chapters_bookmarked'):
+                self.log_result("Reading Heatmap Matches Progress", True)
+            else:
+                self.log_result("Reading Heatmap Matches Progress", False, f"{len(books)} books, {bookmarked} chapters bookmarked")
+
     def test_bookmarks_protected(self):
         """Test bookmark endpoints (requires auth)"""
         print("\n🔖 Testing Bookmark Endpoints...")
@@ -528,6 +604,16 @@ class ProphecyNewsStudyBibleAPITester:
         if success and bookmarks_data.get('bookmarks'):
             print(f"   Found {len(bookmarks_data['bookmarks'])} bookmarks")
         
+        # Test paging through bookmarks one at a time
+        success, first_page = self.run_test("Get Bookmarks Page", "GET", "bookmarks?limit=1", 200)
+        if success and first_page.get('next_cursor'):
+            success, second_page = self.run_test("Get Next Bookmarks Page", "GET", f"bookmarks?limit=1&cursor={first_page['next_cursor']}", 200)
+            if success and second_page['bookmarks'] and second_page['bookmarks'][0] != first_page['bookmarks'][0]:
+                self.log_result("Bookmark Pages Distinct", True)
+            else:
+                self.log_result("Bookmark Pages Distinct", False, "Second page repeated the first")
+        self.run_test("Bookmarks Invalid Cursor", "GET", "bookmarks?cursor=not-a-cursor", 400)
+        
     def test_reading_plan_progress(self):
         """Test reading plan progress tracking (requires auth)"""
         print("\n📊 Testing Reading Plan Progress...")
@@ -536,6 +622,21 @@ class ProphecyNewsStudyBibleAPITester:
             self.log_result("Reading Plan Progress Test", False, "No authentication token")
             return
         
+        # Test generated plans: the same parameters must give the same plan
+        success, plan_data = self.run_test("Generate NT in 90 Days Plan", "POST", "reading-plans", 200,
+                                           data={"template": "nt-90"})
+        if success and plan_data:
+            success2, again_data = self.run_test("Generate NT in 90 Days Plan Again", "POST", "reading-plans", 200,
+                                                 data={"template": "nt-90"})
+            if success2 and again_data.get('plan_id') == plan_data.get('plan_id') and plan_data.get('total_days') == 90:
+                self.log_result("Generated Plan Is Stable", True)
+                print(f"   {plan_data.get('name')}: {plan_data.get('minutes_per_day')} minutes/day")
+            else:
+                self.log_result("Generated Plan Is Stable", False, f"Got {plan_data} then {again_data}")
+            self.run_test("Get Generated Plan Day 90", "GET", f"reading-plans/{plan_data.get('plan_id')}/day/90", 200)
+        self.run_test("Generate Custom Plan Without Days", "POST", "reading-plans", 400,
+                      data={"template": "custom", "books": ["Romans"]})
+
         # Test getting initial progress
         success, progress_data = self.run_test("Get Reading Plan Progress", "GET", "reading-plan/progress", 200)
         if success and progress_data:
@@ -574,7 +675,15 @@ class ProphecyNewsStudyBibleAPITester:
                 print(f"   ✓ Marked day {test_day} as complete")
             else:
                 self.log_result("Mark Reading Complete", False, f"Unexpected response: {complete_data}")
-        
+
+        # Marking the same day again must not count it twice
+        success, repeat_data = self.run_test("Mark Day Complete Again", "POST", f"reading-plan/complete/{test_day}", 200)
+        if success and repeat_data:
+            if repeat_data.get('message') == "Already completed":
+                self.log_result("Repeat Mark Is Idempotent", True)
+            else:
+                self.log_result("Repeat Mark Is Idempotent", False, f"Unexpected response: {repeat_data}")
+
         # Test getting progress after marking complete
         success, updated_progress = self.run_test("Get Updated Progress", "GET", "reading-plan/progress", 200)
         if success and updated_progress:
@@ -621,6 +730,43 @@ class ProphecyNewsStudyBibleAPITester:
         # Test unmarking non-existent completion
         self.run_test("Unmark Non-existent", "DELETE", "reading-plan/complete/999", 404)
 
+        # Test bulk catch-up: a range plus a list, then undo it
+        success, bulk_data = self.run_test("Bulk Mark Days", "POST", "reading-plan/progress/bulk", 200,
+                                           data={"ranges": [[60, 69]], "days": [75, 75]})
+        if success and bulk_data:
+            results = bulk_data.get('results', [])
+            if len(results) == 11 and all(r.get('status') in ('completed', 'already_completed') for r in results):
+                self.log_result("Bulk Mark Results", True)
+                print(f"   ✓ {bulk_data.get('changed')} days newly completed")
+            else:
+                self.log_result("Bulk Mark Results", False, f"Unexpected results: {results}")
+        self.run_test("Bulk Unmark Days", "POST", "reading-plan/progress/bulk", 200,
+                      data={"ranges": [[60, 69]], "days": [75], "completed": False})
+        self.run_test("Bulk Mark Invalid Day", "POST", "reading-plan/progress/bulk", 400, data={"days": [0]})
+
+        # Test last year's progress is kept apart from this year's
+        last_year = datetime.now().year - 1
+        self.run_test("Mark Day Complete (Last Year)", "POST", f"reading-plan/complete/{test_day}?year={last_year}", 200)
+        success, history_data = self.run_test("Get Reading History", "GET", "reading-plan/history", 200)
+        if success and history_data:
+            years = [y.get('year') for y in history_data.get('years', [])]
+            if last_year in years:
+                self.log_result("History Per Year", True)
+                print(f"   Years with progress: {years}")
+            else:
+                self.log_result("History Per Year", False, f"{last_year} missing from {years}")
+        self.run_test("Unmark Day Complete (Last Year)", "DELETE", f"reading-plan/complete/{test_day}?year={last_year}", 200)
+
+        # Test community stats for the day just marked and unmarked
+        success, community_data = self.run_test("Get Community Stats", "GET", f"reading-plan/community?day={test_day}", 200)
+        if success:
+            readers = community_data.get('readers', 0)
+            if 'streak_percentile' in community_data and readers >= 1 and community_data.get('completed', 0) <= readers:
+                self.log_result("Community Stats Fields", True)
+                print(f"   ✓ {community_data.get('completed')} of {readers} readers finished day {test_day}")
+            else:
+                self.log_result("Community Stats Fields", False, f"Unexpected community stats: {community_data}")
+
     def test_premium_endpoints_without_subscription(self):
         """Test premium endpoints without subscription (should fail)"""
         print("\n👑 Testing Premium Endpoints (Without Subscription)...")
@@ -632,6 +778,7 @@ class ProphecyNewsStudyBibleAPITester:
         # These should all return 403 Forbidden
         self.run_test("Journal Access (No Premium)", "GET", "journal", 403)
         self.run_test("Forum Access (No Premium)", "GET", "forum/posts", 403)
+        self.run_test("Forum Search (No Premium)", "GET", "forum/search?ref=Romans%208", 403)
         self.run_test("News Analysis (No Premium)", "POST", "analyze/news", 403, data={
             "news_headline": "Test headline",
             "news_content": "Test content"
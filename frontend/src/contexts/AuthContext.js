@@ -5,13 +5,79 @@ const AuthContext = createContext(null);
 
 const API_URL = process.env.REACT_APP_BACKEND_URL + '/api';
 
+// Access tokens are short-lived; one refresh is shared by every request
+// that fails while it is in flight.
+let refreshPromise = null;
+
+const storeTokens = ({ token, refresh_token }) => {
+  localStorage.setItem('token', token);
+  if (refresh_token) {
+    localStorage.setItem('refresh_token', refresh_token);
+  }
+};
+
+const clearTokens = () => {
+  localStorage.removeItem('token');
+  localStorage.removeItem('refresh_token');
+};
+
+const refreshTokens = () => {
+  if (!refreshPromise) {
+    const refreshToken = localStorage.getItem('refresh_token');
+    refreshPromise = (refreshToken
+      ? axios.post(`${API_URL}/auth/refresh`, { refresh_token: refreshToken })
+      : Promise.reject(new Error('No refresh token')))
+      .then(response => {
+        storeTokens(response.data);
+        return response.data.token;
+      })
+      .catch(error => {
+        // Another tab may have swapped the same refresh token a moment
+        // earlier; its new pair is already stored, so use that instead
+        const current = localStorage.getItem('refresh_token');
+        if (current && current !== refreshToken && localStorage.getItem('token')) {
+          return localStorage.getItem('token');
+        }
+        throw error;
+      })
+      .finally(() => {
+        refreshPromise = null;
+      });
+  }
+  return refreshPromise;
+};
+
 export const AuthProvider = ({ children }) => {
   const [user, setUser] = useState(null);
   const [loading, setLoading] = useState(true);
   const [token, setToken] = useState(localStorage.getItem('token'));
 
   useEffect(() => {
+    // Retry a request once with a fresh access token when the old one has expired
+    const interceptor = axios.interceptors.response.use(
+      response => response,
+      async error => {
+        const original = error.config;
+        const isAuthCall = original?.url?.startsWith(`${API_URL}/auth/`) && !original.url.endsWith('/auth/me');
+        if (error.response?.status !== 401 || !original || original._retried || isAuthCall) {
+          return Promise.reject(error);
+        }
+        original._retried = true;
+        try {
+          const newToken = await refreshTokens();
+          setToken(newToken);
+          original.headers = { ...original.headers, Authorization: `Bearer ${newToken}` };
+          return axios(original);
+        } catch (refreshError) {
+          clearTokens();
+          setToken(null);
+          setUser(null);
+          return Promise.reject(error);
+        }
+      }
+    );
     checkAuth();
+    return () => axios.interceptors.response.eject(interceptor);
   }, []);
 
   const checkAuth = async () => {
@@ -22,11 +88,11 @@ export const AuthProvider = ({ children }) => {
           headers: { Authorization: `Bearer ${storedToken}` }
         });
         setUser(response.data);
-        setToken(storedToken);
+        setToken(localStorage.getItem('token'));
       }
     } catch (error) {
       console.error('Auth check failed:', error);
-      localStorage.removeItem('token');
+      clearTokens();
       setToken(null);
       setUser(null);
     } finally {
@@ -38,8 +104,8 @@ export const AuthProvider = ({ children }) => {
     const response = await axios.post(`${API_URL}/auth/login`, 
       { email, password }
     );
-    const { token: newToken, ...userData } = response.data;
-    localStorage.setItem('token', newToken);
+    const { token: newToken, refresh_token: refreshToken, ...userData } = response.data;
+    storeTokens({ token: newToken, refresh_token: refreshToken });
     setToken(newToken);
     setUser(userData);
     return response.data;
@@ -49,8 +115,8 @@ export const AuthProvider = ({ children }) => {
     const response = await axios.post(`${API_URL}/auth/register`, 
       { name, email, password }
     );
-    const { token: newToken, ...userData } = response.data;
-    localStorage.setItem('token', newToken);
+    const { token: newToken, refresh_token: refreshToken, ...userData } = response.data;
+    storeTokens({ token: newToken, refresh_token: refreshToken });
     setToken(newToken);
     setUser(userData);
     return response.data;
@@ -60,8 +126,8 @@ export const AuthProvider = ({ children }) => {
     const response = await axios.post(`${API_URL}/auth/session`, 
       { session_id: sessionId }
     );
-    const { token: newToken, ...userData } = response.data;
-    localStorage.setItem('token', newToken);
+    const { token: newToken, refresh_token: refreshToken, ...userData } = response.data;
+    storeTokens({ token: newToken, refresh_token: refreshToken });
     setToken(newToken);
     setUser(userData);
     return response.data;
@@ -69,11 +135,13 @@ export const AuthProvider = ({ children }) => {
 
   const logout = async () => {
     try {
-      await axios.post(`${API_URL}/auth/logout`, {});
+      await axios.post(`${API_URL}/auth/logout`, {
+        refresh_token: localStorage.getItem('refresh_token')
+      });
     } catch (error) {
       console.error('Logout error:', error);
     }
-    localStorage.removeItem('token');
+    clearTokens();
     setToken(null);
     setUser(null);
   };
@@ -82,6 +150,13 @@ export const AuthProvider = ({ children }) => {
     setUser(prev => ({ ...prev, ...updates }));
   };
 
+  // Pick up entitlement changes (e.g. a new subscription) without waiting for expiry
+  const refreshSession = async () => {
+    const newToken = await refreshTokens();
+    setToken(newToken);
+    return newToken;
+  };
+
   const getAuthHeaders = () => {
     return token ? { Authorization: `Bearer ${token}` } : {};
   };
@@ -96,6 +171,7 @@ export const AuthProvider = ({ children }) => {
       logout,
       processOAuthSession,
       updateUser,
+      refreshSession,
       getAuthHeaders,
       isAuthenticated: !!user,
       isPremium: user?.is_premium || false
@@ -110,10 +110,18 @@ const BiblePage = () => {
 
   const fetchBookmarks = async () => {
     try {
-      const response = await axios.get(`${API_URL}/bookmarks`, {
-        headers: getAuthHeaders()
-      });
-      setBookmarks(response.data.bookmarks);
+      // Follow the cursor so readers with many bookmarks see all of them
+      let all = [];
+      let cursor = null;
+      do {
+        const response = await axios.get(`${API_URL}/bookmarks`, {
+          headers: getAuthHeaders(),
+          params: cursor ? { cursor } : {}
+        });
+        all = all.concat(response.data.bookmarks);
+        cursor = response.data.next_cursor;
+      } while (cursor);
+      setBookmarks(all);
     } catch (error) {
       console.error('Error fetching bookmarks:', error);
     }
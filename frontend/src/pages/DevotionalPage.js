@@ -19,7 +19,9 @@ const DevotionalPage = () => {
 
   const fetchTodayDevotional = async () => {
     try {
-      const response = await axios.get(`${API_URL}/devotional/today`);
+      const response = await axios.get(`${API_URL}/devotional/today`, {
+        headers: { 'X-Timezone': Intl.DateTimeFormat().resolvedOptions().timeZone }
+      });
       setDevotional(response.data);
     } catch (error) {
       console.error('Error fetching devotional:', error);
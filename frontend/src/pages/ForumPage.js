@@ -83,12 +83,15 @@ const ForumPage = () => {
 
   const handleUpvotePost = async (postId) => {
     try {
-      await axios.post(`${API_URL}/forum/posts/${postId}/upvote`, {}, {
+      const response = await axios.post(`${API_URL}/forum/posts/${postId}/upvote`, {}, {
         headers: getAuthHeaders()
       });
-      fetchPosts();
+      const { upvoted, upvotes } = response.data;
+      setPosts(posts => posts.map(post => (
+        post.post_id === postId ? { ...post, upvoted, upvotes } : post
+      )));
       if (selectedPost?.post_id === postId) {
-        fetchPostDetail(postId);
+        setSelectedPost({ ...selectedPost, upvoted, upvotes });
       }
     } catch (error) {
       toast.error('Failed to upvote');
@@ -115,10 +118,13 @@ const ForumPage = () => {
 
   const handleUpvoteComment = async (commentId) => {
     try {
-      await axios.post(`${API_URL}/forum/comments/${commentId}/upvote`, {}, {
+      const response = await axios.post(`${API_URL}/forum/comments/${commentId}/upvote`, {}, {
         headers: getAuthHeaders()
       });
-      fetchPostDetail(selectedPost.post_id);
+      const { upvoted, upvotes } = response.data;
+      setComments(comments => comments.map(comment => (
+        comment.comment_id === commentId ? { ...comment, upvoted, upvotes } : comment
+      )));
     } catch (error) {
       toast.error('Failed to upvote');
     }
@@ -269,7 +275,7 @@ const ForumPage = () => {
                         className="p-2 rounded-lg hover:bg-muted/50 transition-colors"
                         data-testid={`upvote-post-${post.post_id}`}
                       >
-                        <ThumbsUp className="w-5 h-5" />
+                        <ThumbsUp className={`w-5 h-5 ${post.upvoted ? 'fill-current' : ''}`} />
                       </button>
                       <span className="font-medium">{post.upvotes}</span>
                       <div className="flex items-center gap-1 text-muted-foreground">
@@ -321,7 +327,7 @@ const ForumPage = () => {
                             onClick={() => handleUpvoteComment(comment.comment_id)}
                             className="flex items-center gap-1 text-sm text-muted-foreground hover:text-foreground"
                           >
-                            <ThumbsUp className="w-3 h-3" />
+                            <ThumbsUp className={`w-3 h-3 ${comment.upvoted ? 'fill-current' : ''}`} />
                             {comment.upvotes}
                           </button>
                         </div>
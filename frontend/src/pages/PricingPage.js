@@ -9,7 +9,7 @@ import { toast } from 'sonner';
 const API_URL = process.env.REACT_APP_BACKEND_URL + '/api';
 
 const PricingPage = () => {
-  const { isAuthenticated, isPremium, getAuthHeaders, updateUser } = useAuth();
+  const { isAuthenticated, isPremium, getAuthHeaders, updateUser, refreshSession } = useAuth();
   const [searchParams] = useSearchParams();
   const navigate = useNavigate();
   const [loading, setLoading] = useState(false);
@@ -39,6 +39,8 @@ const PricingPage = () => {
       });
 
       if (response.data.payment_status === 'paid') {
+        // New access token so premium endpoints accept us straight away
+        await refreshSession().catch(() => {});
         updateUser({ is_premium: true });
         toast.success('Welcome to Premium! 🎉');
         navigate('/bible');
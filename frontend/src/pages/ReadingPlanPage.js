@@ -44,7 +44,9 @@ const ReadingPlanPage = () => {
 
   const fetchTodayReading = async () => {
     try {
-      const response = await axios.get(`${API_URL}/reading-plan/today`);
+      const response = await axios.get(`${API_URL}/reading-plan/today`, {
+        headers: { 'X-Timezone': Intl.DateTimeFormat().resolvedOptions().timeZone }
+      });
       setTodayReading(response.data);
     } catch (error) {
       console.error('Error fetching today reading:', error);